@@ -2,23 +2,52 @@
 FastAPI Backend — Bidirectional Voice Translator
 Compatible with Python 3.13 + pydantic v2
 """
-import os, sys, json, time, base64
+import os, sys, json, time, base64, asyncio
 sys.path.insert(0, os.path.dirname(__file__))
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from typing import Optional
+from contextlib import asynccontextmanager
 
-from translator     import translate, supported_languages
+from translator     import (translate_async, translate_batch_async, fanout_legs, supported_languages,
+                            phrase_store_stats, engine_stats, _norm, LANGUAGES)
 from text_to_speech import synthesize
-from speech_to_text import transcribe_audio_bytes
+import speech_to_text
+from speech_to_text import transcribe_audio_bytes_async, stt_stats
+from workers        import run_stage, pool_stats, shutdown_pools
+import http_pool
+import provider_health
+import stt_pool
+import audio_decode
+import audio_upload
+import hedging
+import langid
+from vad import VoiceActivityDetector
+from singleflight import SingleFlight
+from translation_cache import get_cache as get_translation_cache
+from tts_cache       import get_cache as get_tts_cache
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load + warm STT models in the background: /health answers at once,
+    # /ready only once no request would hit a cold model.
+    preload = asyncio.ensure_future(run_stage("stt", speech_to_text.preload))
+    yield
+    preload.cancel()
+    await http_pool.aclose()
+    stt_pool.shutdown()
+    await asyncio.to_thread(get_translation_cache().flush, 5)   # write-behind rows still queued
+    shutdown_pools(wait=False)
 
 app = FastAPI(
     title       = "Bidirectional Voice Translator",
     description = "Translate between English, Hindi, Telugu, Tamil, Malayalam, German, French, Spanish",
     version     = "3.0.0",
+    lifespan    = lifespan,
 )
 
 app.add_middleware(
@@ -34,46 +63,160 @@ class TranslateRequest(BaseModel):
     tgt_lang: str = "telugu"
     tts:      bool = True
 
+class BatchItem(BaseModel):
+    text:     str
+    src_lang: Optional[str] = None
+    tgt_lang: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    texts:    list[str]       = []
+    items:    list[BatchItem] = []
+    src_lang: str = "english"
+    tgt_lang: str = "telugu"
+
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 1000))
+
+class FanoutRequest(BaseModel):
+    text:     str
+    src_lang: str = "english"
+    targets:  Optional[list[str]] = None      # default: every target language but the source
+    tts:      bool = True
+
 class DetectRequest(BaseModel):
     text: str
 
-class AudioRequest(BaseModel):
-    audio_b64:   str
+class AudioParams(BaseModel):
     src_lang:    str = "english"
     tgt_lang:    str = "telugu"
     sample_rate: int = 16000
+    channels:    int = 1                  # interleaved 16-bit PCM, downmixed before STT
+    format:      Optional[str] = None     # pcm | wav | webm | ogg | … or a MIME type; sniffed if absent
+    stt_engine:  Optional[str] = None     # default STT_ENGINE
+    stt_model:   Optional[str] = None     # whisper model size
+
+class AudioRequest(AudioParams):
+    audio_b64:   str
+
+# ── Translate + speak, coalescing identical in-flight requests ───────────────
+_flights = SingleFlight()
+
+async def _run_pipeline(text: str, src_lang: str, tgt_lang: str, tts: bool, endpoint: str):
+    tr    = await translate_async(text, src_lang, tgt_lang)
+    audio = {}
+    if tts and tr.get("translated") and not tr["translated"].startswith("⚠"):
+        try:
+            audio = await run_stage("tts", synthesize, tr["translated"], tgt_lang, endpoint)
+        except Exception:
+            pass
+    return tr, audio
+
+async def translate_and_speak(text: str, src_lang: str, tgt_lang: str, tts: bool = True,
+                              endpoint: str = "default"):
+    """
+    (translation, tts) for `text`.  Concurrent requests for the same normalized
+    text and language pair share one provider call and one synthesized clip;
+    the returned dicts are shared, so callers must not mutate them.  `endpoint`
+    only labels TTS cache stats and is not part of the coalescing key.
+    """
+    key = (_norm(text) or text, src_lang.lower().strip(), tgt_lang.lower().strip(), tts)
+    return await _flights.do(key, _run_pipeline, text, src_lang, tgt_lang, tts, endpoint)
+
+async def fanout_and_speak(text: str, src_lang: str, targets: Optional[list[str]] = None,
+                           tts: bool = True, endpoint: str = "default"):
+    """
+    Yield (tgt_lang, translation, tts) for every target as soon as that
+    language is done — translations and syntheses for all targets run
+    concurrently, so a fast dictionary hit never waits for a slow provider.
+    """
+    async def leg(tgt, pending):
+        tr    = await pending
+        audio = {}
+        if tts and tr.get("translated") and tr.get("source") not in ("error", "not-found"):
+            try:
+                audio = await run_stage("tts", synthesize, tr["translated"], tgt, endpoint)
+            except Exception:
+                pass
+        return tgt, tr, audio
+
+    tasks = [asyncio.ensure_future(leg(tgt, pending))
+             for tgt, pending in fanout_legs(text, src_lang, targets).items()]
+    try:
+        for done in asyncio.as_completed(tasks):
+            yield await done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def _fanout_message(tgt: str, tr: dict, tts: dict) -> dict:
+    msg = {
+        "tgt_lang":   tgt,
+        "translated": tr.get("translated"),
+        "source":     tr.get("source"),
+        "confidence": tr.get("confidence"),
+        "latency_ms": tr.get("latency_ms"),
+    }
+    if tr.get("detected_src"):
+        msg["detected_src"] = tr["detected_src"]
+    if tts:
+        msg["audio_b64"]  = tts.get("audio_b64")
+        msg["audio_mime"] = tts.get("mime_type", "audio/mpeg")
+    return msg
+
+def _check_targets(targets: Optional[list[str]]):
+    if targets is not None and (not isinstance(targets, list)
+                                or not all(isinstance(t, str) for t in targets)):
+        return "targets must be a list of language names"
+    unknown = [t for t in targets or [] if t.lower().strip() not in LANGUAGES]
+    if unknown:
+        return f"unsupported target language(s): {', '.join(unknown)}"
+    return None
 
 @app.get("/health")
 async def health():
-    return {"status": "ok", "timestamp": time.time()}
+    """Liveness: the process is up and serving (models may still be loading)."""
+    return {
+        "status":    "degraded" if provider_health.any_open() else "ok",
+        "providers": provider_health.snapshot(),
+        "timestamp": time.time(),
+    }
+
+@app.get("/ready")
+async def ready():
+    """Readiness: every preloaded STT model is loaded and warmed."""
+    stats = stt_stats()
+    failed = (stats["processes"] or {}).get("failed")
+    body  = {"status": "ready" if stats["ready"] else "failed" if failed else "starting",
+             "stt": stats["preload"], "timestamp": time.time()}
+    if failed:
+        body["stt_processes"] = failed
+    return JSONResponse(body, status_code=200 if stats["ready"] else 503)
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "pools":             pool_stats(),
+        "http":              http_pool.pool_stats(),
+        "translation_cache": get_translation_cache().stats(),
+        "phrase_store":      phrase_store_stats(),
+        "hedging":           hedging.stats(),
+        "coalescing":        _flights.stats(),
+        "langid":            langid.stats(),
+        "mt_engines":        engine_stats(),
+        "stt":               stt_stats(),
+        "tts_cache":         get_tts_cache().stats(),
+        "timestamp":         time.time(),
+    }
 
 @app.post("/detect")
 async def detect_language(req: DetectRequest):
     text = req.text.strip()
     if not text:
         raise HTTPException(400, "text is empty")
-    try:
-        from deep_translator import GoogleTranslator
-        # Use translate to detect: translate to English and get source
-        from deep_translator.exceptions import LanguageNotSupportedException
-        import unicodedata
-        # Script-based detection first (fast, offline)
-        counts = {"telugu":0,"hindi":0,"tamil":0,"malayalam":0}
-        for ch in text:
-            cp = ord(ch)
-            if 0x0C00 <= cp <= 0x0C7F: counts["telugu"] += 1
-            elif 0x0900 <= cp <= 0x097F: counts["hindi"] += 1
-            elif 0x0B80 <= cp <= 0x0BFF: counts["tamil"] += 1
-            elif 0x0D00 <= cp <= 0x0D7F: counts["malayalam"] += 1
-        mx = max(counts.values())
-        if mx > 0:
-            lang = max(counts, key=counts.get)
-            labels = {"telugu":"Telugu","hindi":"Hindi","tamil":"Tamil","malayalam":"Malayalam"}
-            return {"language": lang, "language_name": labels[lang], "confidence": 0.99}
-        # Default to English for Latin script
-        return {"language": "english", "language_name": "English", "confidence": 0.90}
-    except Exception as e:
+    lang, conf = langid.detect(text)
+    if lang is None:
+        # No letters at all — keep the old default
         return {"language": "english", "language_name": "English", "confidence": 0.5}
+    return {"language": lang, "language_name": langid.LABELS[lang], "confidence": conf}
 
 @app.get("/languages")
 async def get_languages():
@@ -84,11 +227,12 @@ async def translate_text(req: TranslateRequest):
     if not req.text.strip():
         raise HTTPException(400, "text cannot be empty")
     t0 = time.perf_counter()
-    tr = translate(req.text, req.src_lang, req.tgt_lang)
+    tr, tts = await translate_and_speak(req.text, req.src_lang, req.tgt_lang, req.tts,
+                                        endpoint="/translate")
     if "error" in tr:
         raise HTTPException(500, tr["error"])
     result = {
-        "original":     tr["original"],
+        "original":     req.text,
         "translated":   tr["translated"],
         "src_lang":     tr["src_lang"],
         "tgt_lang":     tr["tgt_lang"],
@@ -96,34 +240,143 @@ async def translate_text(req: TranslateRequest):
         "source":       tr["source"],
         "confidence":   tr["confidence"],
         "translate_ms": tr["latency_ms"],
+        "round_trips":  tr.get("round_trips", 0),
+        "provider_ms":  tr.get("provider_ms", 0.0),
     }
-    if req.tts and tr.get("translated") and not tr["translated"].startswith("⚠"):
-        try:
-            tts = synthesize(tr["translated"], req.tgt_lang)
-            result["audio_b64"]  = tts.get("audio_b64")
-            result["audio_mime"] = tts.get("mime_type", "audio/mpeg")
-            result["tts_ms"]     = tts.get("latency_ms", 0)
-        except Exception:
-            pass
+    if tts:
+        result["audio_b64"]  = tts.get("audio_b64")
+        result["audio_mime"] = tts.get("mime_type", "audio/mpeg")
+        result["tts_ms"]     = tts.get("latency_ms", 0)
     result["total_ms"] = round((time.perf_counter() - t0) * 1000, 2)
     return JSONResponse(content=result)
 
-@app.post("/translate-audio")
-async def translate_audio(req: AudioRequest):
+@app.post("/translate/batch")
+async def translate_batch(req: BatchRequest):
+    items = [(t, req.src_lang, req.tgt_lang) for t in req.texts]
+    items += [(i.text, i.src_lang or req.src_lang, i.tgt_lang or req.tgt_lang) for i in req.items]
+    if not items:
+        raise HTTPException(400, "texts/items cannot both be empty")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(413, f"batch of {len(items)} exceeds the {BATCH_MAX_ITEMS}-item limit")
     t0 = time.perf_counter()
+    batch   = await translate_batch_async(items)
+    return JSONResponse({
+        "results": [{
+            "original":    r["original"],
+            "translated":  r["translated"],
+            "src_lang":    r["src_lang"],
+            "tgt_lang":    r["tgt_lang"],
+            "source":      r["source"],
+            "confidence":  r["confidence"],
+            "latency_ms":  r["latency_ms"],
+        } for r in batch["results"]],
+        "count":       len(items),
+        "unique":      batch["unique"],
+        "round_trips": batch["round_trips"],
+        "total_ms":    round((time.perf_counter() - t0) * 1000, 2),
+    })
+
+@app.post("/translate/fanout")
+async def translate_fanout(req: FanoutRequest):
+    """Streams one NDJSON line per target language as it completes, then a summary line."""
+    if not req.text.strip():
+        raise HTTPException(400, "text cannot be empty")
+    error = _check_targets(req.targets)
+    if error:
+        raise HTTPException(400, error)
+    t0 = time.perf_counter()
+
+    async def lines():
+        count = 0
+        async for tgt, tr, tts in fanout_and_speak(req.text, req.src_lang, req.targets, req.tts,
+                                                   endpoint="/translate/fanout"):
+            count += 1
+            yield json.dumps(_fanout_message(tgt, tr, tts), ensure_ascii=False) + "\n"
+        yield json.dumps({"done": True, "original": req.text, "count": count,
+                          "total_ms": round((time.perf_counter() - t0) * 1000, 2)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+async def _decode_audio(audio_bytes, fmt: Optional[str], sample_rate: int, channels: int):
+    """Upload → (pcm, sample_rate, channels, info); compressed containers are decoded off the event loop."""
+    try:
+        fmt = audio_decode.resolve_format(audio_bytes, fmt)
+        if fmt == "pcm":
+            return audio_decode.decode(audio_bytes, fmt, sample_rate, channels)
+        return await run_stage("stt", audio_decode.decode, audio_bytes, fmt, sample_rate, channels)
+    except audio_decode.UnsupportedAudio as e:
+        raise HTTPException(415, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+async def _read_audio_upload(request: Request):
+    """
+    (AudioParams, audio bytes, Content-Type hint, mode) for the three upload
+    forms /translate-audio takes (see audio_upload.py for the streaming ones).
+    """
+    ctype = request.headers.get("content-type", "").split(";")[0].strip().lower()
     try:
-        audio_bytes = base64.b64decode(req.audio_b64)
+        if ctype == "multipart/form-data":
+            audio, fields, part_type = await audio_upload.read_multipart(request)
+            return AudioParams.model_validate({**request.query_params, **fields}), audio, part_type, "multipart"
+        if ctype == "application/octet-stream" or ctype.startswith("audio/"):
+            audio = await audio_upload.read_raw(request)
+            return AudioParams.model_validate(dict(request.query_params)), audio, ctype, "raw"
+        req = AudioRequest.model_validate_json(await audio_upload.read_json(request))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except audio_upload.UploadTooLarge as e:
+        raise HTTPException(413, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    try:
+        audio = base64.b64decode(req.audio_b64)
     except Exception:
         raise HTTPException(400, "Invalid base64 audio")
-    stt = transcribe_audio_bytes(audio_bytes, req.sample_rate)
+    if len(audio) > audio_upload.MAX_BYTES:
+        raise HTTPException(413, f"audio upload is larger than {audio_upload.MAX_BYTES} bytes")
+    return req, audio, None, "json"
+
+_AUDIO_BODY = {"requestBody": {"required": True, "content": {
+    "application/json":         {"schema": AudioRequest.model_json_schema()},
+    "application/octet-stream": {"schema": {"type": "string", "format": "binary"}},
+    "multipart/form-data":      {"schema": {"type": "object", "required": ["audio"], "properties": {
+        "audio": {"type": "string", "format": "binary"},
+        **{k: v for k, v in AudioParams.model_json_schema()["properties"].items()}}}},
+}}}
+
+@app.post("/translate-audio", openapi_extra=_AUDIO_BODY)
+async def translate_audio(request: Request):
+    """
+    Audio → STT → translate → TTS.  The audio is either base64 in a JSON
+    body (AudioRequest), the raw request body (application/octet-stream or
+    audio/*; the AudioParams fields go in the query string), or the "audio"
+    file of a multipart/form-data upload (fields as form fields).
+    """
+    t0 = time.perf_counter()
+    req, audio_bytes, hint, mode = await _read_audio_upload(request)
+    ingest = {"mode": mode, "bytes": len(audio_bytes), "parse_ms": round((time.perf_counter() - t0) * 1000, 2)}
+    if req.channels < 1:
+        raise HTTPException(400, "channels must be positive")
+    fmt = req.format or audio_decode.format_from_mime(hint)
+    try:
+        audio_decode.check_rate(req.sample_rate)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    pcm, rate, channels, decoded = await _decode_audio(audio_bytes, fmt, req.sample_rate, req.channels)
+    if decoded["format"] == "wav":
+        try:
+            audio_decode.check_rate(rate)
+        except ValueError as e:
+            raise HTTPException(400, f"WAV header: {e}")
+    try:
+        stt = await transcribe_audio_bytes_async(pcm, rate, req.stt_engine, req.stt_model, channels)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
     if stt.get("error") or not stt.get("text"):
         return JSONResponse({"error": stt.get("error", "STT failed"), "text": ""})
-    tr  = translate(stt["text"], req.src_lang, req.tgt_lang)
-    tts = {}
-    try:
-        tts = synthesize(tr.get("translated", ""), req.tgt_lang)
-    except Exception:
-        pass
+    tr, tts = await translate_and_speak(stt["text"], req.src_lang, req.tgt_lang,
+                                        endpoint="/translate-audio")
     return JSONResponse({
         "spoken_text":  stt["text"],
         "translated":   tr.get("translated"),
@@ -132,6 +385,9 @@ async def translate_audio(req: AudioRequest):
         "confidence":   tr.get("confidence"),
         "audio_b64":    tts.get("audio_b64"),
         "audio_mime":   tts.get("mime_type", "audio/mpeg"),
+        "ingest":       ingest,
+        "decode":       decoded,
+        "frontend":     stt.get("frontend"),
         "total_ms":     round((time.perf_counter()-t0)*1000, 2),
     })
 
@@ -141,19 +397,43 @@ async def ws_translate(websocket: WebSocket):
     try:
         while True:
             data    = await websocket.receive_text()
-            payload = json.loads(data)
-            text     = payload.get("text", "").strip()
+            try:
+                payload = json.loads(data)
+            except ValueError:
+                payload = None
+            if not isinstance(payload, dict):
+                await websocket.send_json({"error": "messages must be JSON objects"})
+                continue
+            text     = payload.get("text", "")
             src_lang = payload.get("src_lang", "english")
             tgt_lang = payload.get("tgt_lang", "telugu")
+            if not all(isinstance(v, str) for v in (text, src_lang, tgt_lang)):
+                await websocket.send_json({"error": "text, src_lang and tgt_lang must be strings"})
+                continue
+            text = text.strip()
             if not text:
                 await websocket.send_json({"error": "Empty text"})
                 continue
-            tr = translate(text, src_lang, tgt_lang)
-            tts = {}
-            try:
-                tts = synthesize(tr.get("translated", ""), tgt_lang)
-            except Exception:
-                pass
+            targets = payload.get("targets")
+            if targets is not None and targets != []:
+                # Fan-out: one message per language as it completes, then {"done": true}
+                if targets == "all":
+                    targets = None
+                elif isinstance(targets, str):
+                    targets = [targets]
+                error   = _check_targets(targets)
+                if error:
+                    await websocket.send_json({"error": error})
+                    continue
+                t0, count = time.perf_counter(), 0
+                async for tgt, tr, tts in fanout_and_speak(text, src_lang, targets,
+                                                           endpoint="/ws/translate"):
+                    count += 1
+                    await websocket.send_json({"original": text, **_fanout_message(tgt, tr, tts)})
+                await websocket.send_json({"done": True, "original": text, "count": count,
+                                           "total_ms": round((time.perf_counter() - t0) * 1000, 2)})
+                continue
+            tr, tts = await translate_and_speak(text, src_lang, tgt_lang, endpoint="/ws/translate")
             await websocket.send_json({
                 "original":   text,
                 "translated": tr.get("translated"),
@@ -164,6 +444,120 @@ async def ws_translate(websocket: WebSocket):
     except WebSocketDisconnect:
         pass
 
+@app.websocket("/ws/audio")
+async def ws_audio(websocket: WebSocket):
+    """
+    Streaming speech translation.  Binary frames are 16-bit little-endian
+    mono PCM; text frames are JSON control messages:
+      {"src_lang", "tgt_lang", "sample_rate", "tts",
+       "stt_engine", "stt_model"}                       settings (any time)
+      {"event": "end"}                                  close the open utterance
+    The VAD cuts utterances at pauses and each one is transcribed,
+    translated and spoken as soon as it closes.  Per utterance the client
+    gets speech_start → segment → transcript → translation → audio events,
+    all tagged with the utterance index (a speech_start with no segment
+    was a sound too short to keep); "end" is answered with "done" once
+    every utterance has been delivered.
+    """
+    await websocket.accept()
+    cfg   = {"src_lang": "english", "tgt_lang": "telugu", "sample_rate": 16000, "tts": True,
+             "stt_engine": None, "stt_model": None}
+    vad   = VoiceActivityDetector(cfg["sample_rate"])
+    send_lock = asyncio.Lock()
+    tasks: set[asyncio.Task] = set()
+    count = 0
+
+    async def send(msg: dict):
+        async with send_lock:
+            await websocket.send_json(msg)
+
+    async def process(index: int, seg: dict, cfg: dict):
+        t0  = time.perf_counter()
+        stt = await transcribe_audio_bytes_async(seg["pcm"], cfg["sample_rate"],
+                                                 cfg["stt_engine"], cfg["stt_model"])
+        if stt.get("error") or not stt.get("text"):
+            await send({"event": "transcript", "index": index, "text": "",
+                        "error": stt.get("error") or "no speech recognized"})
+            return
+        await send({"event": "transcript", "index": index, "text": stt["text"],
+                    "stt_ms": stt.get("latency_ms")})
+        tr, _ = await translate_and_speak(stt["text"], cfg["src_lang"], cfg["tgt_lang"], tts=False)
+        await send({"event": "translation", "index": index, "original": stt["text"],
+                    "translated": tr.get("translated"), "source": tr.get("source"),
+                    "confidence": tr.get("confidence"),
+                    "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2)})
+        if cfg["tts"] and tr.get("translated") and tr.get("source") not in ("error", "not-found"):
+            try:
+                audio = await run_stage("tts", synthesize, tr["translated"], cfg["tgt_lang"], "/ws/audio")
+            except Exception:
+                audio = {}
+            await send({"event": "audio", "index": index, "audio_b64": audio.get("audio_b64"),
+                        "audio_mime": audio.get("mime_type", "audio/mpeg"),
+                        "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2)})
+
+    async def dispatch(events: list[dict]):
+        nonlocal count
+        for ev in events:
+            if ev["type"] == "start":
+                await send({"event": "speech_start", "start_s": ev["start_s"]})
+                continue
+            count += 1
+            await send({"event": "segment", "index": count, "start_s": ev["start_s"],
+                        "end_s": ev["end_s"], "speech_s": ev["speech_s"]})
+            task = asyncio.ensure_future(process(count, ev, dict(cfg)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    try:
+        while True:
+            msg = await websocket.receive()
+            if msg["type"] == "websocket.disconnect":
+                break
+            if msg.get("bytes"):
+                await dispatch(vad.push(msg["bytes"]))
+                continue
+            try:
+                payload = json.loads(msg.get("text") or "{}")
+            except ValueError:
+                payload = None
+            if not isinstance(payload, dict):
+                await send({"event": "error", "error": "control messages must be JSON objects"})
+                continue
+            if payload.get("event") == "end":
+                await dispatch(vad.flush())
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await send({"event": "done", "segments": count, "vad": vad.stats()})
+                continue
+            error = None
+            if not all(isinstance(payload.get(k, ""), str) for k in ("src_lang", "tgt_lang")):
+                error = "src_lang and tgt_lang must be language names"
+            error = error or _check_targets([payload["tgt_lang"]] if "tgt_lang" in payload else None)
+            if not error and payload.get("stt_engine"):
+                try:
+                    speech_to_text._key(payload["stt_engine"])
+                except ValueError as e:
+                    error = str(e)
+            rate = cfg["sample_rate"]
+            if not error and payload.get("sample_rate") is not None:
+                try:
+                    rate = audio_decode.check_rate(payload["sample_rate"])
+                except ValueError as e:
+                    error = str(e)
+            if error:
+                await send({"event": "error", "error": error})
+                continue
+            cfg.update({k: payload[k] for k in ("src_lang", "tgt_lang", "tts", "stt_engine", "stt_model")
+                        if k in payload})
+            if rate != cfg["sample_rate"]:
+                await dispatch(vad.flush())
+                cfg["sample_rate"] = rate
+                vad = VoiceActivityDetector(rate)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app:app", host="0.0.0.0", port=int(os.environ.get("PORT", 8000)), reload=False)
@@ -0,0 +1,222 @@
+"""
+=============================================================
+  AUDIO DECODE — Real-Time Voice Translator
+  Turns uploaded audio (raw PCM, WAV, or compressed browser
+  recordings: WebM/Opus, OGG/Opus, FLAC, MP3) into 16-bit PCM
+  for the STT front-end — in memory, no temp files.
+=============================================================
+
+MediaRecorder in the browser produces WebM/Opus (Chrome) or OGG/Opus
+(Firefox) at ~24–32 kbit/s, about a tenth of the bytes of 16 kHz PCM.
+/translate-audio accepts those containers directly:
+
+  pcm, wav   handled here — WAV is parsed with the stdlib `wave` module from
+             a BytesIO, raw PCM is passed through untouched.
+  the rest   decoded incrementally, packet by packet, to 16 kHz mono s16:
+               av      PyAV (libav in-process) reading a BytesIO, frames
+                       resampled as they come out of the decoder
+               ffmpeg  an `ffmpeg -i pipe:0 … pipe:1` subprocess; a writer
+                       thread feeds stdin in DECODE_CHUNK pieces while the
+                       caller drains stdout, so neither pipe blocks
+
+The format is sniffed from the container's magic bytes unless the client
+names it; anything without a known signature is taken as raw PCM, which is
+what /translate-audio accepted before.
+
+Settings (environment):
+  AUDIO_DECODER    auto | av | ffmpeg               (default auto: av, then ffmpeg)
+  FFMPEG_BIN       ffmpeg executable                (default ffmpeg)
+  DECODE_CHUNK     pipe read / write size in bytes  (default 65536)
+  DECODE_TIMEOUT_S kill an ffmpeg decode after      (default 30)
+"""
+
+import io, os, time, wave, shutil, threading, subprocess
+
+# ── Optional: PyAV (libav bindings) ──────────────────────────────────────────
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
+DECODER          = os.environ.get("AUDIO_DECODER", "auto").lower().strip()
+FFMPEG_BIN       = os.environ.get("FFMPEG_BIN", "ffmpeg")
+DECODE_CHUNK     = int(os.environ.get("DECODE_CHUNK", 1 << 16))
+DECODE_TIMEOUT_S = float(os.environ.get("DECODE_TIMEOUT_S", 30))
+
+OUTPUT_RATE = 16000              # what compressed input is decoded to (the STT rate)
+MIN_RATE    = 4000               # accepted sample rates for PCM / WAV input
+MAX_RATE    = 192000
+FORMATS     = ("pcm", "wav", "webm", "ogg", "flac", "mp3", "mp4")
+ALIASES     = {"opus": "ogg", "oga": "ogg", "weba": "webm", "mkv": "webm", "m4a": "mp4", "aac": "mp4",
+               "mpeg": "mp3", "raw": "pcm", "s16le": "pcm", "l16": "pcm", "wave": "wav", "x-wav": "wav",
+               "x-flac": "flac", "auto": None, "octet-stream": None}
+
+
+class UnsupportedAudio(ValueError):
+    """The format is known but no decoder for it is installed."""
+
+
+# ── Format detection ──────────────────────────────────────────────────────────
+def sniff(data) -> str:
+    """Container format from the leading magic bytes; "pcm" if none match."""
+    head = bytes(data[:12])
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[:4] == b"\x1aE\xdf\xa3":                 # EBML: Matroska / WebM
+        return "webm"
+    if head[:4] == b"fLaC":
+        return "flac"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    if head[:3] == b"ID3":                          # bare MP3 frames look like PCM — pass format="mp3"
+        return "mp3"
+    return "pcm"
+
+
+def _format_name(fmt: str) -> str | None:
+    fmt = fmt.lower().strip().split(";")[0].rpartition("/")[2]         # also takes MIME types
+    return ALIASES.get(fmt, fmt)
+
+
+def format_from_mime(mime: str | None) -> str | None:
+    """Format named by a Content-Type header; None (sniff the bytes) if it names none we know."""
+    fmt = _format_name(mime) if mime else None
+    return fmt if fmt in FORMATS else None
+
+
+def resolve_format(data, fmt: str | None = None) -> str:
+    """Normalise a client-supplied format name, or sniff when it is absent / "auto"."""
+    if fmt:
+        fmt = _format_name(fmt)
+    if not fmt:
+        return sniff(data)
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown audio format {fmt!r} (choose from {', '.join(FORMATS)})")
+    return fmt
+
+
+def check_rate(rate) -> int:
+    """`rate` as an int; ValueError unless it is a whole number in [MIN_RATE, MAX_RATE]."""
+    try:
+        value = int(rate)
+    except (TypeError, ValueError):
+        raise ValueError(f"sample_rate must be an integer, not {rate!r}") from None
+    if isinstance(rate, bool) or value != rate and not isinstance(rate, str) \
+            or not MIN_RATE <= value <= MAX_RATE:
+        raise ValueError(f"sample_rate must be an integer between {MIN_RATE} and {MAX_RATE} Hz")
+    return value
+
+
+def available_decoders() -> list[str]:
+    found = []
+    if AV_AVAILABLE and DECODER in ("auto", "av"):
+        found.append("av")
+    if DECODER in ("auto", "ffmpeg") and shutil.which(FFMPEG_BIN):
+        found.append("ffmpeg")
+    return found
+
+
+# ── Decoders ──────────────────────────────────────────────────────────────────
+def _decode_wav(data) -> tuple[bytes, int, int] | None:
+    """16-bit PCM WAV via the stdlib; None for other sample widths / codecs."""
+    try:
+        with wave.open(io.BytesIO(data), "rb") as w:
+            if w.getsampwidth() != 2:
+                return None
+            return w.readframes(w.getnframes()), w.getframerate(), w.getnchannels()
+    except wave.Error:
+        return None
+
+
+def _decode_av(data) -> bytes:
+    out = bytearray()
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=OUTPUT_RATE)
+    with av.open(io.BytesIO(data), mode="r") as container:
+        if not container.streams.audio:
+            raise ValueError("no audio stream in the upload")
+        for frame in container.decode(container.streams.audio[0]):
+            for chunk in resampler.resample(frame):
+                out += chunk.to_ndarray().tobytes()
+        for chunk in resampler.resample(None):                          # flush
+            out += chunk.to_ndarray().tobytes()
+    return bytes(out)
+
+
+def _decode_ffmpeg(data) -> bytes:
+    proc = subprocess.Popen(
+        [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(OUTPUT_RATE), "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+
+    def feed():
+        view = memoryview(data)
+        try:
+            for pos in range(0, len(view), DECODE_CHUNK):
+                proc.stdin.write(view[pos:pos + DECODE_CHUNK])
+        except (BrokenPipeError, ValueError):
+            pass                                  # ffmpeg gave up early; its stderr says why
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    writer = threading.Thread(target=feed, daemon=True, name="ffmpeg-feed")
+    writer.start()
+    timer = threading.Timer(DECODE_TIMEOUT_S, proc.kill)
+    timer.start()
+    out = bytearray()
+    try:
+        while chunk := proc.stdout.read(DECODE_CHUNK):
+            out += chunk
+        writer.join()
+        err = proc.stderr.read().decode(errors="replace").strip()
+        code = proc.wait()
+    finally:
+        timer.cancel()
+    if code:
+        raise ValueError(f"ffmpeg could not decode the audio: {err[-300:] or f'exit code {code}'}")
+    return bytes(out)
+
+
+def decode(data, fmt: str | None = None, sample_rate: int = OUTPUT_RATE,
+           channels: int = 1) -> tuple[bytes, int, int, dict]:
+    """
+    Upload → (16-bit PCM, sample rate, channels, info).  Raw PCM keeps the
+    client's sample_rate / channels; WAV reports its header's; compressed
+    formats come back as 16 kHz mono.  info = {format, decoder, bytes_in,
+    bytes_out, decode_ms}.
+    """
+    t0  = time.perf_counter()
+    fmt = resolve_format(data, fmt)
+    decoder = "none"
+    if fmt == "pcm":
+        pcm = data
+    else:
+        wav = _decode_wav(data) if fmt == "wav" else None
+        if wav is not None:
+            (pcm, sample_rate, channels), decoder = wav, "wave"
+        else:
+            decoders = available_decoders()
+            if not decoders and fmt == "wav":
+                raise UnsupportedAudio("only 16-bit PCM WAV can be read without PyAV or ffmpeg")
+            if not decoders:
+                raise UnsupportedAudio(f"{fmt} audio needs PyAV (pip install av) or ffmpeg on PATH; "
+                                       "send 16-bit PCM or WAV instead")
+            decoder = decoders[0]
+            try:
+                pcm = _decode_av(data) if decoder == "av" else _decode_ffmpeg(data)
+            except Exception as e:
+                raise ValueError(f"could not decode {fmt} audio: {e}") from e
+            sample_rate, channels = OUTPUT_RATE, 1
+    return pcm, sample_rate, channels, {
+        "format":    fmt,
+        "decoder":   decoder,
+        "bytes_in":  len(data),
+        "bytes_out": len(pcm),
+        "decode_ms": round((time.perf_counter() - t0) * 1000, 2),
+    }
@@ -0,0 +1,179 @@
+"""
+=============================================================
+  AUDIO UPLOAD — Real-Time Voice Translator
+  Reads /translate-audio request bodies straight into one
+  preallocated buffer: raw application/octet-stream (or audio/*)
+  bodies and multipart/form-data file uploads.
+=============================================================
+
+base64 inside JSON costs three copies of the audio before STT sees it: a
+body a third larger than the audio, the decoded str pydantic builds from
+it, and the bytes base64.b64decode returns.  Here the body is consumed
+chunk by chunk from request.stream() into a bytearray sized from
+Content-Length (grown geometrically only when the client sends no length),
+and the audio is passed on as a memoryview of that buffer — about one copy
+per request.
+
+Multipart bodies go through python-multipart's streaming MultipartParser:
+the bytes of the first file part land in the same kind of buffer, the
+other parts are short text fields (src_lang, tgt_lang, …) returned as a
+dict.  Nothing is spooled to a temp file the way request.form() would.
+
+Uploads larger than AUDIO_MAX_BYTES raise UploadTooLarge (413) as soon as
+Content-Length or the running total says so, before the rest is read —
+base64 JSON bodies included (read_json), chunked or not.
+
+Settings (environment):
+  AUDIO_MAX_BYTES   largest accepted audio upload   (default 26214400 = 25 MiB)
+"""
+
+import os
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:                                  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+MAX_BYTES       = int(os.environ.get("AUDIO_MAX_BYTES", 25 << 20))
+INITIAL_BYTES   = 1 << 20        # first allocation when there is no Content-Length
+MAX_FIELD_BYTES = 4096           # per non-file multipart field
+FILE_FIELDS     = ("audio", "file")
+FIELDS_BYTES    = 64 * 1024      # allowance for the other fields and part headers
+
+
+class UploadTooLarge(ValueError):
+    """The upload is over the configured size limit."""
+
+
+class AudioBuffer:
+    """Append-only byte buffer: allocated once when the size is known up front."""
+
+    def __init__(self, size_hint: int = 0, max_bytes: int | None = None):
+        self.max_bytes = max_bytes = max_bytes or MAX_BYTES
+        self.size      = 0
+        self._buf      = bytearray(min(size_hint, max_bytes) or min(INITIAL_BYTES, max_bytes))
+
+    def write(self, data):
+        end = self.size + len(data)
+        if end > self.max_bytes:
+            raise UploadTooLarge(f"audio upload is larger than {self.max_bytes} bytes")
+        if end > len(self._buf):
+            self._buf.extend(bytes(min(self.max_bytes, max(end, 2 * len(self._buf))) - len(self._buf)))
+        with memoryview(self._buf) as view:     # bytearray slice assignment would copy `data` first
+            view[self.size:end] = data
+        self.size = end
+
+    def view(self) -> memoryview:
+        return memoryview(self._buf)[:self.size]
+
+    def detach(self) -> bytearray:
+        """The buffer itself, cut to what was written (no copy; the AudioBuffer is done)."""
+        del self._buf[self.size:]
+        return self._buf
+
+
+def content_length(request) -> int:
+    try:
+        return max(0, int(request.headers.get("content-length", 0)))
+    except ValueError:
+        return 0
+
+
+async def _read_body(request, max_bytes: int) -> AudioBuffer:
+    length = content_length(request)
+    if length > max_bytes:
+        raise UploadTooLarge(f"audio upload is larger than {max_bytes} bytes")
+    buf = AudioBuffer(length, max_bytes)
+    async for chunk in request.stream():
+        buf.write(chunk)
+    return buf
+
+
+async def read_raw(request, max_bytes: int | None = None) -> memoryview:
+    """The whole request body, as a view of one buffer."""
+    return (await _read_body(request, max_bytes or MAX_BYTES)).view()
+
+
+async def read_json(request, max_bytes: int | None = None) -> bytearray:
+    """A JSON body carrying base64 audio, bounded by the same audio limit (plus base64 overhead)."""
+    max_bytes = max_bytes or MAX_BYTES
+    try:
+        return (await _read_body(request, max_bytes * 4 // 3 + FIELDS_BYTES)).detach()
+    except UploadTooLarge:
+        raise UploadTooLarge(f"audio upload is larger than {max_bytes} bytes") from None
+
+
+async def read_multipart(request, max_bytes: int | None = None) -> tuple[memoryview, dict, str | None]:
+    """
+    (audio, text fields, audio part's Content-Type) from a multipart/form-data
+    body.  The audio is the first part with a filename, or the first part
+    named "audio" / "file".
+    """
+    max_bytes  = max_bytes or MAX_BYTES
+    _, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary   = options.get(b"boundary")
+    if not boundary:
+        raise ValueError("multipart body without a boundary")
+    length = content_length(request)
+    if length > max_bytes + FIELDS_BYTES:
+        raise UploadTooLarge(f"audio upload is larger than {max_bytes} bytes")
+
+    fields: dict[str, str] = {}
+    audio: AudioBuffer | None = None
+    audio_type: str | None = None
+    part = {}
+
+    def on_part_begin():
+        part.clear()
+        part.update(headers={}, field=bytearray(), value=bytearray(), data=None)
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][bytes(part["field"]).lower()] = bytes(part["value"])
+        part["field"], part["value"] = bytearray(), bytearray()
+
+    def on_headers_finished():
+        nonlocal audio, audio_type
+        _, opts = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["name"] = opts.get(b"name", b"").decode("utf-8", "replace")
+        if audio is None and (b"filename" in opts or part["name"] in FILE_FIELDS):
+            audio      = part["data"] = AudioBuffer(length, max_bytes)
+            audio_type = part["headers"].get(b"content-type", b"").decode("latin-1") or None
+        elif b"filename" not in opts:
+            part["data"] = bytearray()               # a text field; extra files are skipped
+
+    def on_part_data(data, start, end):
+        target = part.get("data")
+        if target is None:
+            return
+        if isinstance(target, bytearray) and len(target) + end - start > MAX_FIELD_BYTES:
+            raise ValueError(f"form field {part['name']!r} is longer than {MAX_FIELD_BYTES} bytes")
+        if isinstance(target, AudioBuffer):
+            target.write(memoryview(data)[start:end])
+        else:
+            target += data[start:end]
+
+    def on_part_end():
+        if isinstance(part.get("data"), bytearray):
+            fields[part["name"]] = part["data"].decode("utf-8", "replace")
+
+    parser = MultipartParser(boundary, callbacks={
+        "on_part_begin":       on_part_begin,
+        "on_header_field":     on_header_field,
+        "on_header_value":     on_header_value,
+        "on_header_end":       on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data":        on_part_data,
+        "on_part_end":         on_part_end,
+    })
+    async for chunk in request.stream():
+        parser.write(chunk)
+    parser.finalize()
+    if audio is None:
+        raise ValueError("multipart upload has no audio file part (send it as 'audio' or 'file')")
+    return audio.view(), fields, audio_type
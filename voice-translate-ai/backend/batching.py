@@ -0,0 +1,130 @@
+"""
+=============================================================
+  MICRO-BATCHING — Real-Time Voice Translator
+  Groups concurrent single-item requests into one batched
+  model call (MarianMT generate, Whisper transcribe, ...),
+  trading at most `max_wait_ms` of latency for throughput.
+=============================================================
+
+One worker thread per batcher owns the model: it takes the first queued
+item, keeps collecting until `max_batch` items or `max_wait_ms` have
+passed, calls `fn(items) -> results` once and resolves every caller's
+future.  A failing batch fails each of its callers with the same error.
+
+Callers submit from any thread (submit() → concurrent Future, call()
+blocks) or from the event loop (await submit_async()).
+"""
+
+import time, queue, asyncio, threading
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    def __init__(self, fn, max_batch: int = 16, max_wait_ms: float = 5.0, name: str = "batch"):
+        self.fn        = fn
+        self.max_batch = max_batch
+        self.max_wait  = max_wait_ms / 1000
+        self.name      = name
+        self._queue: queue.Queue = queue.Queue()
+        self._lock     = threading.Lock()
+        self._worker   = None
+        self._closed   = False
+        self.counters  = {"items": 0, "batches": 0, "errors": 0, "full_batches": 0,
+                          "wait_ms": 0.0, "run_ms": 0.0, "latency_ms": 0.0}
+
+    # ── Submission ────────────────────────────────────────────────────────────
+    def submit(self, item) -> Future:
+        if self._closed:
+            raise RuntimeError(f"batcher '{self.name}' is closed")
+        fut = Future()
+        self._ensure_worker()
+        self._queue.put((item, fut, time.perf_counter()))
+        return fut
+
+    def call(self, item):
+        return self.submit(item).result()
+
+    async def submit_async(self, item):
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._loop, daemon=True,
+                                                    name=f"{self.name}-batcher")
+                    self._worker.start()
+
+    # ── Worker ────────────────────────────────────────────────────────────────
+    def _collect(self) -> list | None:
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch    = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:             # close() — finish this batch first
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            batch = [(item, fut, t) for item, fut, t in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            t0 = time.perf_counter()
+            try:
+                results = self.fn([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name}: {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                with self._lock:
+                    self.counters["errors"] += 1
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+            done = time.perf_counter()
+            run  = done - t0
+            for (_, fut, _), result in zip(batch, results):
+                fut.set_result(result)
+            with self._lock:
+                c = self.counters
+                c["items"]        += len(batch)
+                c["batches"]      += 1
+                c["full_batches"] += len(batch) == self.max_batch
+                c["wait_ms"]      += sum(t0 - t for _, _, t in batch) * 1000
+                c["run_ms"]       += run * 1000
+                c["latency_ms"]   += sum(done - t for _, _, t in batch) * 1000
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+        items, batches = c.pop("items"), c.pop("batches")
+        wait_ms, run_ms, latency_ms = c.pop("wait_ms"), c.pop("run_ms"), c.pop("latency_ms")
+        return {
+            "max_batch":       self.max_batch,
+            "max_wait_ms":     round(self.max_wait * 1000, 2),
+            "queued":          self._queue.qsize(),
+            "items":           items,
+            "batches":         batches,
+            "mean_batch":      round(items / batches, 2) if batches else 0.0,
+            "mean_wait_ms":    round(wait_ms / items, 2) if items else 0.0,
+            "mean_run_ms":     round(run_ms / batches, 2) if batches else 0.0,
+            "mean_latency_ms": round(latency_ms / items, 2) if items else 0.0,
+            "items_per_s":     round(items / run_ms * 1000, 2) if run_ms else 0.0,
+            **c,
+        }
@@ -0,0 +1,1815 @@
+"""
+=============================================================
+  BENCHMARKS — Real-Time Voice Translator
+  Load and micro-benchmarks for the serving pipeline.
+  External providers are replaced by local stubs so every
+  benchmark runs offline and is repeatable.
+=============================================================
+
+Usage:
+  python benchmark.py load   [--latency-ms 50] [--requests 200]
+  python benchmark.py pool   [--handshake-ms 30] [--requests 200]
+  python benchmark.py fuzzy  [--queries 500]
+  python benchmark.py store
+  python benchmark.py hedge  [--requests 2000] [--tail 0.03]
+  python benchmark.py batch  [--items 500] [--latency-ms 20]
+  python benchmark.py fanout [--utterances 20] [--latency-ms 40]
+  python benchmark.py segment [--chars 2000]
+  python benchmark.py langid
+  python benchmark.py auto
+  python benchmark.py marian [--sentences 128]
+  python benchmark.py export [--sentences 50]
+  python benchmark.py whisper-pcm [--utterances 200]
+  python benchmark.py vad
+  python benchmark.py whisper-batch [--utterances 64]
+  python benchmark.py stt-pool [--utterances 64]
+  python benchmark.py ready
+  python benchmark.py frontend [--minutes 1 3 5]
+  python benchmark.py formats [--uplink-mbps 2]
+  python benchmark.py upload [--seconds 60]
+  python benchmark.py tts-cache [--requests 600] [--tts-ms 30]
+"""
+
+import os, sys, time, json, random, asyncio, argparse, threading, statistics
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _memory_only_cache():
+    """Keep benchmarks from reading or writing the on-disk translation cache."""
+    import translation_cache
+    translation_cache._cache = translation_cache.TranslationCache(path=None)
+
+
+# ── Local stand-in for the Google gtx endpoint ────────────────────────────────
+
+class StubGoogleServer:
+    """
+    Threaded HTTP/1.1 server answering like translate_a/single (gtx).
+
+    latency      — callable returning seconds to sleep per request
+    handshake_ms — extra delay on every *new* connection, standing in for
+                   the TCP + TLS setup a real HTTPS provider costs
+    per_char_ms  — extra delay per character of `q` (long texts are slower)
+    max_chars    — reject longer `q` with HTTP 413, like a provider length limit
+    """
+
+    def __init__(self, latency=lambda: 0.0, handshake_ms: float = 0.0,
+                 per_char_ms: float = 0.0, max_chars: int | None = None):
+        outer = self
+        self.latency      = latency
+        self.handshake_ms = handshake_ms
+        self.per_char_ms  = per_char_ms
+        self.max_chars    = max_chars
+        self.requests     = 0
+        self.connections  = 0
+        self._lock        = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version         = "HTTP/1.1"
+            disable_nagle_algorithm  = True     # headers and body go out as separate writes
+
+            def setup(self):
+                super().setup()
+                with outer._lock:
+                    outer.connections += 1
+                if outer.handshake_ms:
+                    time.sleep(outer.handshake_ms / 1000)
+
+            def do_GET(self):
+                with outer._lock:
+                    outer.requests += 1
+                q    = parse_qs(urlsplit(self.path).query)
+                text = q.get("q", [""])[0]
+                sl   = q.get("sl", ["en"])[0]
+                if outer.max_chars and len(text) > outer.max_chars:
+                    self.send_response(413)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                time.sleep(outer.latency() + len(text) * outer.per_char_ms / 1000)
+                body = json.dumps([[[f"<{q.get('tl', ['xx'])[0]}>{text}", text]], None,
+                                   "en" if sl == "auto" else sl]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            def handle_error(self, request, client_address):
+                # Clients hang up on purpose (cancelled hedges); don't spam tracebacks
+                if not isinstance(sys.exc_info()[1], ConnectionError):
+                    super().handle_error(request, client_address)
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/translate_a/single"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ── Load test: /translate throughput vs concurrency ──────────────────────────
+
+def bench_load(latency_ms: float = 50, requests: int = 200,
+               concurrency: tuple = (1, 4, 16, 32, 64)):
+    """
+    Drives /translate through the ASGI app with a stubbed provider that
+    blocks for `latency_ms` (like a Google round-trip).  Throughput should
+    scale with concurrency until the MT/TTS pools are saturated.
+    """
+    import httpx
+    import app as app_module
+    import workers
+
+    async def slow_translate(text, src_lang="english", tgt_lang="telugu"):
+        await asyncio.sleep(latency_ms / 1000)
+        return {"original": text, "translated": text[::-1], "src_lang": src_lang,
+                "tgt_lang": tgt_lang, "model_used": "stub", "source": "google",
+                "confidence": 0.97, "latency_ms": latency_ms}
+
+    def slow_synthesize(text, language="french", endpoint="default"):
+        time.sleep(latency_ms / 1000)
+        return {"audio_b64": "", "mime_type": "audio/mpeg", "latency_ms": latency_ms,
+                "engine": "stub", "error": None}
+
+    app_module.translate_async = slow_translate
+    app_module.synthesize      = slow_synthesize
+    workers.configure(tts=max(concurrency))
+
+    async def run(c: int) -> dict:
+        transport = httpx.ASGITransport(app=app_module.app)
+        sem       = asyncio.Semaphore(c)
+        lat       = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def one(i):
+                async with sem:
+                    t = time.perf_counter()
+                    r = await client.post("/translate", json={"text": f"hello {i}", "tgt_lang": "hindi"})
+                    r.raise_for_status()
+                    lat.append((time.perf_counter() - t) * 1000)
+            t0 = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(requests)))
+            wall = time.perf_counter() - t0
+        return {"concurrency": c, "rps": round(requests / wall, 1),
+                "p50_ms": round(_percentile(lat, 50), 1), "p99_ms": round(_percentile(lat, 99), 1)}
+
+    print(f"\n{'='*60}")
+    print(f"  LOAD TEST — /translate (stub provider {latency_ms:.0f} ms MT + {latency_ms:.0f} ms TTS)")
+    print(f"{'='*60}")
+    print(f"  {'Concurrency':>12} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    print("  " + "─" * 46)
+    results = []
+    for c in concurrency:
+        res = asyncio.run(run(c))
+        results.append(res)
+        print(f"  {res['concurrency']:>12} {res['rps']:>10.1f} {res['p50_ms']:>10.1f} {res['p99_ms']:>10.1f}")
+    print(f"\n  TTS pool stats: {json.dumps(workers.pool_stats()['tts'])}")
+    workers.shutdown_pools()
+    return results
+
+
+# ── Connection pooling: shared keep-alive client vs fresh connection per call ─
+
+def bench_pool(handshake_ms: float = 30, requests: int = 200, concurrency: int = 8):
+    """
+    Compares translate_async() over the pooled client with the old pattern of
+    a new connection per call, against a local stub that charges
+    `handshake_ms` for each new connection.
+    """
+    import httpx
+    import http_pool, translator
+
+    _memory_only_cache()
+    texts = [f"custom sentence number {i}" for i in range(requests)]
+
+    async def pooled() -> list[float]:
+        sem, lat = asyncio.Semaphore(concurrency), []
+        async def one(t):
+            async with sem:
+                r = await translator.translate_async(t, "english", "french")
+                lat.append(r["latency_ms"])
+        await asyncio.gather(*(one(t) for t in texts))
+        await http_pool.aclose()
+        return lat
+
+    async def fresh(url: str) -> list[float]:
+        sem, lat = asyncio.Semaphore(concurrency), []
+        async def one(t):
+            async with sem:
+                t0 = time.perf_counter()
+                async with httpx.AsyncClient() as client:
+                    r = await client.get(url, params={"client": "gtx", "sl": "en", "tl": "fr", "dt": "t", "q": t})
+                    http_pool.parse_google_response(r.json())
+                lat.append((time.perf_counter() - t0) * 1000)
+        await asyncio.gather(*(one(t) for t in texts))
+        return lat
+
+    print(f"\n{'='*60}")
+    print(f"  CONNECTION POOL — {requests} requests, concurrency {concurrency}, handshake {handshake_ms:.0f} ms")
+    print(f"{'='*60}")
+    print(f"  {'Mode':<22} {'conns':>7} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+    print("  " + "─" * 58)
+    rows = {}
+    for mode in ("fresh-connection", "pooled-keepalive"):
+        with StubGoogleServer(latency=lambda: 0.005, handshake_ms=handshake_ms) as server:
+            http_pool.GOOGLE_TRANSLATE_URL = server.url
+            lat = asyncio.run(fresh(server.url) if mode == "fresh-connection" else pooled())
+            rows[mode] = {"connections": server.connections, "p50_ms": _percentile(lat, 50),
+                          "p99_ms": _percentile(lat, 99), "mean_ms": statistics.mean(lat)}
+        r = rows[mode]
+        print(f"  {mode:<22} {r['connections']:>7} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['mean_ms']:>9.1f}")
+    saved = rows["fresh-connection"]["mean_ms"] - rows["pooled-keepalive"]["mean_ms"]
+    print(f"\n  Connection setup share of latency_ms (fresh): "
+          f"{saved / rows['fresh-connection']['mean_ms'] * 100:.1f}%")
+    return rows
+
+
+# ── Fuzzy phrase matching: linear scan vs PhraseIndex ────────────────────────
+
+def bench_fuzzy(queries: int = 500, sizes: tuple = (100, 10_000, 100_000)):
+    """
+    Synthetic phrase tables of increasing size; every query is checked to
+    return the same match as the original linear scan.
+    """
+    from phrase_index import PhraseIndex, linear_best_match
+
+    rng   = random.Random(7)
+    vocab = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+             for _ in range(3000)]
+
+    def phrase():
+        return " ".join(rng.choice(vocab) for _ in range(rng.randint(2, 6)))
+
+    print(f"\n{'='*60}")
+    print(f"  FUZZY MATCH — {queries} queries per table size")
+    print(f"{'='*60}")
+    print(f"  {'Phrases':>9} {'build ms':>10} {'linear µs':>11} {'index µs':>10} {'speed-up':>9}")
+    print("  " + "─" * 54)
+    rows = []
+    for size in sizes:
+        table = {}
+        while len(table) < size:
+            table[phrase()] = str(len(table))
+        keys = list(table)
+        qs   = []
+        for _ in range(queries):
+            k = rng.choice(keys)
+            r = rng.random()
+            if r < 0.4:   qs.append(k[: max(3, int(len(k) * 0.8))])      # partial phrase
+            elif r < 0.7: qs.append(f"{k} {rng.choice(vocab)}")          # phrase + extra word
+            else:         qs.append(phrase())                            # usually a miss
+
+        t = time.perf_counter(); index = PhraseIndex(table); build = time.perf_counter() - t
+
+        t = time.perf_counter()
+        expected = [linear_best_match(table, q) for q in qs]
+        linear = (time.perf_counter() - t) / len(qs)
+        t = time.perf_counter()
+        got = [index.best_match(q) for q in qs]
+        indexed = (time.perf_counter() - t) / len(qs)
+        assert got == expected, "PhraseIndex disagrees with the linear scan"
+
+        rows.append({"phrases": size, "build_ms": build * 1000,
+                     "linear_us": linear * 1e6, "index_us": indexed * 1e6})
+        print(f"  {size:>9} {build*1000:>10.1f} {linear*1e6:>11.1f} {indexed*1e6:>10.1f} {linear/indexed:>8.0f}x")
+    return rows
+
+
+# ── Phrase store: mmap'd binary vs in-memory reverse dictionary ──────────────
+
+def bench_store(lookups: int = 20000):
+    """
+    Load time, memory and exact-lookup cost of the compiled phrase store
+    against the old approach: a Python dict with two entries (normalized
+    and raw) per phrase per language, extended to cover the same corpus.
+    """
+    import tracemalloc, tempfile
+    import phrase_store
+    from translator import PHRASE_TABLE, _norm
+
+    path  = os.path.join(tempfile.mkdtemp(), "phrase_store.bin")
+    t     = time.perf_counter()
+    built = phrase_store.build(PHRASE_TABLE, _norm, path)
+    build_ms = (time.perf_counter() - t) * 1000
+
+    rows = list(PHRASE_TABLE.values()) + phrase_store._corpus_rows(phrase_store.DATASET_PATH)
+    tracemalloc.start()
+    t = time.perf_counter()
+    reverse = {}
+    for row in rows:
+        for phrase in row.values():
+            reverse[_norm(phrase)] = row
+            reverse[phrase.lower().strip()] = row
+    dict_ms = (time.perf_counter() - t) * 1000
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = phrase_store.PhraseStore(path)
+    store_heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    keys = [_norm(phrase) for row in rows for phrase in row.values()]
+    qs   = [keys[i % len(keys)] for i in range(lookups)]
+    t = time.perf_counter()
+    for q in qs:
+        row = reverse.get(q)
+        row and row.get("french")
+    dict_us = (time.perf_counter() - t) / lookups * 1e6
+    t = time.perf_counter()
+    for q in qs:
+        store.get(q, "french")
+    store_us = (time.perf_counter() - t) / lookups * 1e6
+
+    print(f"\n{'='*60}")
+    print(f"  PHRASE STORE — {built['phrases']} phrases, {built['languages']} languages")
+    print(f"{'='*60}")
+    print(f"  {'':<26} {'reverse dict':>14} {'phrase store':>14}")
+    print("  " + "─" * 56)
+    print(f"  {'entries / keys':<26} {len(reverse):>14} {built['keys']:>14}")
+    print(f"  {'startup ms':<26} {dict_ms:>14.2f} {store.load_ms:>14.3f}")
+    print(f"  {'private heap bytes':<26} {dict_bytes:>14} {store_heap:>14}")
+    print(f"  {'shared mmap bytes':<26} {0:>14} {built['file_bytes']:>14}")
+    print(f"  {'exact lookup µs':<26} {dict_us:>14.2f} {store_us:>14.2f}")
+    print(f"\n  (one-off build step: {build_ms:.1f} ms)")
+    store.close()
+    return {"dict_bytes": dict_bytes, "store": built, "dict_us": dict_us, "store_us": store_us}
+
+
+# ── Hedged requests: p50/p99 against a heavy-tailed stub provider ─────────────
+
+def bench_hedge(requests: int = 2000, concurrency: int = 16, tail: float = 0.03):
+    """
+    Stub latency: ~20 ms for most requests, 300–600 ms for a `tail` fraction.
+    Runs translate_async() with hedging off, then on, and reports p50/p99
+    and the extra provider load hedging cost.
+    """
+    import http_pool, translator, hedging
+
+    rng = random.Random(3)
+    def latency():
+        if rng.random() < tail:
+            return rng.uniform(0.3, 0.6)
+        return max(0.005, rng.gauss(0.020, 0.004))
+
+    async def run(tag: str) -> list[float]:
+        sem, lat = asyncio.Semaphore(concurrency), []
+        async def one(i):
+            async with sem:
+                r = await translator.translate_async(f"{tag} request number {i}", "english", "german")
+                lat.append(r["latency_ms"])
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        await http_pool.aclose()
+        return lat
+
+    print(f"\n{'='*60}")
+    print(f"  HEDGING — {requests} requests, concurrency {concurrency}, {tail*100:.0f}% slow tail")
+    print(f"{'='*60}")
+    print(f"  {'Mode':<10} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'provider reqs':>14} {'extra':>7}")
+    print("  " + "─" * 62)
+    rows = {}
+    for enabled in (False, True):
+        _memory_only_cache()
+        policy = translator._google_hedge = hedging.HedgePolicy("google_translate", enabled=enabled)
+        with StubGoogleServer(latency=latency) as server:
+            http_pool.GOOGLE_TRANSLATE_URL = server.url
+            lat = asyncio.run(run("hedged" if enabled else "plain"))
+            sent = server.requests
+        mode = "hedged" if enabled else "baseline"
+        rows[mode] = {"p50_ms": _percentile(lat, 50), "p90_ms": _percentile(lat, 90),
+                      "p99_ms": _percentile(lat, 99), "provider_requests": sent,
+                      "extra_load": sent / requests - 1, "policy": policy.stats()}
+        r = rows[mode]
+        print(f"  {mode:<10} {r['p50_ms']:>9.1f} {r['p90_ms']:>9.1f} {r['p99_ms']:>9.1f} "
+              f"{sent:>14} {r['extra_load']*100:>6.1f}%")
+    print(f"\n  Hedge policy: {json.dumps(rows['hedged']['policy'])}")
+    return rows
+
+
+# ── Batch endpoint: N single /translate calls vs one /translate/batch ───────
+
+def bench_batch(items: int = 500, concurrency: int = 8, latency_ms: float = 20):
+    """
+    Subtitle-style workload (~30% repeated lines, a few dictionary phrases)
+    sent as `items` single /translate calls at `concurrency`, then as one
+    /translate/batch call.  Both go through the ASGI app to a stub provider
+    that takes `latency_ms` per request.
+    """
+    import httpx
+    import app as app_module
+    import http_pool
+
+    rng    = random.Random(11)
+    unique = [f"subtitle line {i} about the weather" for i in range(int(items * 0.6))]
+    unique += ["good morning", "thank you", "how are you"]
+    texts  = [rng.choice(unique) if i >= len(unique) or rng.random() < 0.3 else unique[i]
+              for i in range(items)]
+
+    async def singles(client) -> None:
+        sem = asyncio.Semaphore(concurrency)
+        async def one(t):
+            async with sem:
+                r = await client.post("/translate", json={"text": t, "tgt_lang": "french", "tts": False})
+                r.raise_for_status()
+        await asyncio.gather(*(one(t) for t in texts))
+
+    async def batch(client) -> dict:
+        r = await client.post("/translate/batch", json={"texts": texts, "tgt_lang": "french"})
+        r.raise_for_status()
+        return r.json()
+
+    async def run(mode: str):
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            t0 = time.perf_counter()
+            out = await (singles(client) if mode == "single" else batch(client))
+            wall = time.perf_counter() - t0
+        await http_pool.aclose()
+        return wall, out
+
+    print(f"\n{'='*60}")
+    print(f"  BATCH — {items} texts ({len(set(texts))} distinct), stub provider {latency_ms:.0f} ms")
+    print(f"{'='*60}")
+    print(f"  {'Mode':<28} {'wall ms':>10} {'provider reqs':>14}")
+    print("  " + "─" * 54)
+    rows = {}
+    for mode in ("single", "batch"):
+        _memory_only_cache()
+        with StubGoogleServer(latency=lambda: latency_ms / 1000) as server:
+            http_pool.GOOGLE_TRANSLATE_URL = server.url
+            wall, out = asyncio.run(run(mode))
+            rows[mode] = {"wall_ms": wall * 1000, "provider_requests": server.requests}
+        label = f"{items} x /translate (c={concurrency})" if mode == "single" else "1 x /translate/batch"
+        print(f"  {label:<28} {rows[mode]['wall_ms']:>10.1f} {rows[mode]['provider_requests']:>14}")
+    if out["count"] != items:
+        print(f"  [!] batch returned {out['count']} results for {items} texts")
+    print(f"\n  Speed-up: {rows['single']['wall_ms'] / rows['batch']['wall_ms']:.1f}x  "
+          f"(batch: {out['unique']} unique, {out['round_trips']} round trip(s))")
+    return rows
+
+
+# ── Fan-out: one utterance into every target language ────────────────────────
+
+def bench_fanout(utterances: int = 20, latency_ms: float = 40, tts_ms: float = 60):
+    """
+    Each utterance goes to all target languages: first as the client used to
+    do it (one translate + TTS per language, in sequence), then through the
+    fan-out pipeline behind /translate/fanout.  Reports time to the first and
+    the last language.  Provider and TTS are stubs taking `latency_ms` /
+    `tts_ms`; every eighth utterance is a dictionary phrase.
+    """
+    import app as app_module
+    import http_pool, workers, translator
+
+    def slow_synthesize(text, language="french", endpoint="default"):
+        time.sleep(tts_ms / 1000)
+        return {"audio_b64": "", "mime_type": "audio/mpeg", "latency_ms": tts_ms,
+                "engine": "stub", "error": None}
+
+    app_module.synthesize = slow_synthesize
+    workers.configure(tts=32)
+    targets = [t for t in translator.TARGET_LANGUAGES if t != "english"]
+    rng     = random.Random(5)
+
+    # Both modes call the app's pipeline functions directly: httpx's
+    # ASGITransport buffers streamed bodies, which would hide time-to-first.
+    async def sequential(text) -> tuple[float, float]:
+        t0, first = time.perf_counter(), None
+        for tgt in targets:
+            await app_module.translate_and_speak(text, "english", tgt)
+            first = first or time.perf_counter() - t0
+        return first, time.perf_counter() - t0
+
+    async def fanout(text) -> tuple[float, float]:
+        t0, first, seen = time.perf_counter(), None, 0
+        async for _ in app_module.fanout_and_speak(text, "english", targets):
+            seen += 1
+            first = first or time.perf_counter() - t0
+        assert seen == len(targets), seen
+        return first, time.perf_counter() - t0
+
+    async def run(mode: str) -> list[tuple[float, float]]:
+        out = []
+        for i in range(utterances):
+            text = "good morning" if i % 8 == 0 else f"{mode} utterance {i} for the whole room"
+            out.append(await (sequential if mode == "sequential" else fanout)(text))
+        await http_pool.aclose()
+        return out
+
+    print(f"\n{'='*60}")
+    print(f"  FAN-OUT — {utterances} utterances x {len(targets)} languages "
+          f"(stub MT {latency_ms:.0f} ms, TTS {tts_ms:.0f} ms)")
+    print(f"{'='*60}")
+    print(f"  {'Mode':<22} {'first lang p50':>15} {'all langs p50':>15} {'all langs p99':>15}")
+    print("  " + "─" * 70)
+    rows = {}
+    for mode in ("sequential", "fanout"):
+        _memory_only_cache()
+        with StubGoogleServer(latency=lambda: max(0.005, rng.gauss(latency_ms, latency_ms / 4) / 1000)) as server:
+            http_pool.GOOGLE_TRANSLATE_URL = server.url
+            res = asyncio.run(run(mode))
+        first = [f * 1000 for f, _ in res]
+        last  = [l * 1000 for _, l in res]
+        rows[mode] = {"first_p50_ms": _percentile(first, 50), "all_p50_ms": _percentile(last, 50),
+                      "all_p99_ms": _percentile(last, 99)}
+        r = rows[mode]
+        print(f"  {mode:<22} {r['first_p50_ms']:>15.1f} {r['all_p50_ms']:>15.1f} {r['all_p99_ms']:>15.1f}")
+    workers.shutdown_pools()
+    return rows
+
+
+# ── Long inputs: one request vs parallel sentence segments ───────────────────
+
+def bench_segment(chars: int = 2000, latency_ms: float = 40, per_char_ms: float = 0.2,
+                  max_chars: int = 1000):
+    """
+    Translates a ~`chars`-character paragraph with segmentation off and on.
+    The stub provider costs `latency_ms` + `per_char_ms` per character and
+    rejects requests over `max_chars`, so the unsegmented paragraph fails
+    and drops into the word-wise path.  A final run re-sends the paragraph
+    with one sentence edited: only that segment should reach the provider.
+    """
+    import http_pool, translator
+
+    rng   = random.Random(2)
+    words = [f"{w}{i}" for i in range(40) for w in ("meet", "plan", "cost", "team", "note")]
+    sentences = []
+    while sum(len(x) + 1 for x in sentences) < chars:
+        sentences.append(" ".join(rng.choice(words) for _ in range(rng.randint(8, 16))).capitalize() + ".")
+    text   = " ".join(sentences)
+    edited = " ".join(sentences[:-1] + ["This last sentence was edited."])
+
+    async def once(t: str) -> dict:
+        r = await translator.translate_async(t, "english", "german")
+        await http_pool.aclose()
+        return r
+
+    print(f"\n{'='*60}")
+    print(f"  SEGMENTATION — {len(text)} chars, {len(sentences)} sentences "
+          f"(stub {latency_ms:.0f} ms + {per_char_ms} ms/char, limit {max_chars})")
+    print(f"{'='*60}")
+    print(f"  {'Mode':<26} {'latency ms':>11} {'provider reqs':>14}  source")
+    print("  " + "─" * 66)
+    rows = {}
+    min_chars = translator.SEGMENT_MIN_CHARS
+    for mode, t in (("whole text", text), ("segmented", text), ("segmented, 1 edit", edited)):
+        if mode != "segmented, 1 edit":
+            _memory_only_cache()
+        translator.SEGMENT_MIN_CHARS = 10**9 if mode == "whole text" else min_chars
+        with StubGoogleServer(latency=lambda: latency_ms / 1000, per_char_ms=per_char_ms,
+                              max_chars=max_chars) as server:
+            http_pool.GOOGLE_TRANSLATE_URL = server.url
+            r = asyncio.run(once(t))
+            rows[mode] = {"latency_ms": r["latency_ms"], "provider_requests": server.requests,
+                          "source": r["source"], "segments": r.get("segments", 1)}
+        print(f"  {mode:<26} {r['latency_ms']:>11.1f} {server.requests:>14}  {r['source']}")
+    translator.SEGMENT_MIN_CHARS = min_chars
+    return rows
+
+
+# ── Language ID: langid vs langdetect ────────────────────────────────────────
+
+def bench_langid(holdout: float = 0.2, repeats: int = 3):
+    """
+    Accuracy and µs/call of langid vs langdetect.  langid's n-gram model is
+    retrained on the dataset minus a `holdout` fraction of its Latin-script
+    sentences; the test set is that holdout, the dataset's Hindi outputs and
+    every PHRASE_TABLE entry (all eight languages, none of them in training).
+    """
+    import langid, translator
+
+    rng     = random.Random(13)
+    samples = langid._dataset_samples()
+    rng.shuffle(samples)
+    cut     = int(len(samples) * holdout)
+    test    = samples[:cut]
+    langid._model = langid.NGramModel(samples[cut:])
+    langid.detect.cache_clear()
+    with open(langid.DATASET_PATH, encoding="utf-8") as f:
+        for line in f:
+            rec = json.loads(line)
+            if rec["language_pair"].endswith("Hindi"):
+                test.append((rec["output"], "hindi"))
+    test += [(text, lang) for row in translator.PHRASE_TABLE.values() for lang, text in row.items()]
+    test  = list(dict.fromkeys(test))
+
+    detectors = {"langid (cold)": langid.detect.__wrapped__, "langid (cached)": langid.detect}
+    try:
+        from langdetect import DetectorFactory, detect as ld_detect
+        DetectorFactory.seed = 0
+        def langdetect_detect(text):
+            try:
+                return translator.LANG_CODE_MAP.get(ld_detect(text)), 0.0
+            except Exception:
+                return None, 0.0
+        detectors["langdetect"] = langdetect_detect
+    except ImportError:
+        print("[!] langdetect not installed — comparing langid only")
+
+    print(f"\n{'='*60}")
+    print(f"  LANGUAGE ID — {len(test)} held-out texts, 8 languages")
+    print(f"{'='*60}")
+    print(f"  {'Detector':<18} {'accuracy':>9} {'latin acc':>10} {'µs/call':>9}")
+    print("  " + "─" * 50)
+    rows = {}
+    for name, fn in detectors.items():
+        fn("warm up")
+        correct = latin = latin_n = 0
+        for text, lang in test:
+            ok = fn(text)[0] == lang
+            correct += ok
+            if lang in langid.LATIN_LANGUAGES:
+                latin_n += 1
+                latin   += ok
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            for text, _ in test:
+                fn(text)
+        us = (time.perf_counter() - t0) / (repeats * len(test)) * 1e6
+        rows[name] = {"accuracy": correct / len(test), "latin_accuracy": latin / latin_n, "us_per_call": us}
+        print(f"  {name:<18} {correct / len(test) * 100:>8.1f}% {latin / latin_n * 100:>9.1f}% {us:>9.1f}")
+    langid._model = None
+    langid.detect.cache_clear()
+    return rows
+
+
+# ── Auto source: detect-then-translate vs provider-side detection ────────────
+
+def bench_auto(requests: int = 500, latency_ms: float = 5):
+    """
+    Mean latency of translate_async(src_lang="auto") for distinct sentences:
+    the old pipeline (local detection pass, then translate with the detected
+    source — with langdetect and with langid) vs the fused mode where the
+    provider's sl=auto call reports the source.  Stub provider: `latency_ms`.
+    """
+    import http_pool, translator, langid
+
+    texts = [f"Das ist der Satz Nummer {i} für den Test" if i % 2 else f"This is test sentence number {i}"
+             for i in range(requests)]
+    detectors = {"langid": lambda t: langid.detect.__wrapped__(t)[0]}
+    try:
+        from langdetect import DetectorFactory, detect as ld_detect
+        DetectorFactory.seed = 0
+        detectors["langdetect"] = lambda t: translator.LANG_CODE_MAP.get(ld_detect(t))
+    except ImportError:
+        pass
+
+    async def run(detect) -> list[float]:
+        lat = []
+        for t in texts:
+            t0 = time.perf_counter()
+            src = (detect(t) or "english") if detect else "auto"
+            await translator.translate_async(t, src, "french")
+            lat.append((time.perf_counter() - t0) * 1000)
+        await http_pool.aclose()
+        return lat
+
+    print(f"\n{'='*60}")
+    print(f"  AUTO SOURCE — {requests} requests, stub provider {latency_ms:.0f} ms")
+    print(f"{'='*60}")
+    print(f"  {'Mode':<34} {'mean ms':>9} {'p99 ms':>9}")
+    print("  " + "─" * 48)
+    rows = {}
+    modes = [(f"detect ({name}) + translate", fn) for name, fn in detectors.items()] + [("fused (provider sl=auto)", None)]
+    for mode, detect in modes:
+        _memory_only_cache()
+        with StubGoogleServer(latency=lambda: latency_ms / 1000) as server:
+            http_pool.GOOGLE_TRANSLATE_URL = server.url
+            lat = asyncio.run(run(detect))
+        rows[mode] = {"mean_ms": statistics.mean(lat), "p99_ms": _percentile(lat, 99)}
+        print(f"  {mode:<34} {rows[mode]['mean_ms']:>9.2f} {rows[mode]['p99_ms']:>9.2f}")
+    return rows
+
+
+# ── MarianMT engine: micro-batched CPU inference ─────────────────────────────
+
+def _tiny_marian(out_dir: str, max_length: int = 32) -> str:
+    """
+    Save a tiny randomly-initialised Marian model + tokenizer to `out_dir`
+    (exactly what training.py's save_pretrained() produces, just small), with
+    a SentencePiece vocabulary trained on the dataset at runtime.
+    """
+    import sentencepiece as spm
+    from transformers import MarianConfig, MarianMTModel, MarianTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(os.path.dirname(__file__), "..", "dataset", "translations.jsonl"), encoding="utf-8") as f:
+        lines = [t for rec in map(json.loads, f) for t in (rec["input"], rec["output"])]
+    prefix = os.path.join(out_dir, "spm")
+    spm.SentencePieceTrainer.train(sentence_iterator=iter(lines), model_prefix=prefix, vocab_size=800,
+                                   character_coverage=1.0, minloglevel=2)
+    sp     = spm.SentencePieceProcessor(model_file=prefix + ".model")
+    pieces = [sp.id_to_piece(i) for i in range(sp.get_piece_size()) if sp.id_to_piece(i) not in ("<unk>", "<s>", "</s>")]
+    vocab  = {"</s>": 0, "<unk>": 1, **{p: i + 2 for i, p in enumerate(pieces)}}
+    vocab["<pad>"] = len(vocab)
+    with open(os.path.join(out_dir, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(vocab, f, ensure_ascii=False)
+    for name in ("source.spm", "target.spm"):
+        with open(prefix + ".model", "rb") as src, open(os.path.join(out_dir, name), "wb") as dst:
+            dst.write(src.read())
+
+    tokenizer = MarianTokenizer(os.path.join(out_dir, "source.spm"), os.path.join(out_dir, "target.spm"),
+                                os.path.join(out_dir, "vocab.json"))
+    config = MarianConfig(vocab_size=len(vocab), d_model=64, encoder_layers=2, decoder_layers=2,
+                          encoder_attention_heads=4, decoder_attention_heads=4,
+                          encoder_ffn_dim=128, decoder_ffn_dim=128, max_position_embeddings=max_length * 4,
+                          pad_token_id=vocab["<pad>"], eos_token_id=0, decoder_start_token_id=vocab["<pad>"])
+    MarianMTModel(config).save_pretrained(out_dir)
+    tokenizer.save_pretrained(out_dir)
+    return out_dir
+
+
+def bench_marian(sentences: int = 128, batch_sizes: tuple = (1, 2, 4, 8, 16, 32), max_length: int = 32):
+    """
+    Sentences/sec of the MarianMT engine at max batch sizes 1–32.  All
+    `sentences` are submitted at once (as concurrent requests would be) and
+    the MicroBatcher groups them.  Uses a tiny random Marian config, so the
+    output is gibberish — only throughput is measured.
+    """
+    import tempfile, torch
+    from transformers.utils import logging as hf_logging
+    import marian_engine, translator
+
+    hf_logging.disable_progress_bar()
+    with open(os.path.join(os.path.dirname(__file__), "..", "dataset", "translations.jsonl"), encoding="utf-8") as f:
+        texts = list(dict.fromkeys(json.loads(line)["input"] for line in f))
+    texts = (texts * (sentences // len(texts) + 1))[:sentences]
+
+    with tempfile.TemporaryDirectory() as root:
+        path = _tiny_marian(os.path.join(root, "french"), max_length)
+        torch.set_num_threads(marian_engine.THREADS)
+
+        print(f"\n{'='*60}")
+        print(f"  MARIAN ENGINE — {sentences} sentences, tiny random model, "
+              f"{torch.get_num_threads()} thread(s), ≤{max_length} tokens")
+        print(f"{'='*60}")
+        print(f"  {'max batch':>10} {'sent/s':>10} {'mean batch':>11} {'speed-up':>9}")
+        print("  " + "─" * 44)
+        rows, base = {}, None
+        for b in batch_sizes:
+            engine = marian_engine.MarianTranslator(path, max_batch=b, max_wait_ms=5, max_length=max_length)
+            engine.translate("warm up")
+            t0 = time.perf_counter()
+            futures = [engine.batcher.submit(t) for t in texts]
+            for fut in futures:
+                fut.result()
+            rate = sentences / (time.perf_counter() - t0)
+            base = base or rate
+            st   = engine.batcher.stats()
+            engine.batcher.close()
+            rows[b] = {"sentences_per_s": rate, "mean_batch": st["mean_batch"]}
+            print(f"  {b:>10} {rate:>10.1f} {st['mean_batch']:>11.2f} {rate / base:>8.1f}x")
+
+        # End to end through the translator's engine list
+        marian_engine.MODEL_DIR, marian_engine.MAX_LENGTH = root, max_length
+        translator.MT_ENGINES = ["marian"]
+        translator.ENGINES["marian"]._languages = None
+        _memory_only_cache()
+        r = asyncio.run(translator.translate_async("Where is the library?", "english", "french"))
+        print(f"\n  translate_async via MT_ENGINES=marian → source={r['source']!r}, "
+              f"model_used={r['model_used']!r}, {r['latency_ms']} ms")
+    return rows
+
+
+def bench_export(sentences: int = 50, max_length: int = 32):
+    """
+    fp32 vs int8 / onnx / onnx-int8 through model_export's export + report
+    (tiny random Marian, so BLEU is near zero for every variant — the point
+    is that the variants agree with fp32), then check that
+    MARIAN_VARIANT=auto serves the variant the report favours.
+    """
+    import tempfile
+    from transformers.utils import logging as hf_logging
+    import model_export, marian_engine
+
+    hf_logging.disable_progress_bar()
+    with tempfile.TemporaryDirectory() as root:
+        path = _tiny_marian(os.path.join(root, "french"), max_length)
+        model_export.export(path, ["int8", "onnx", "onnx-int8"])
+        result = model_export.report(path, "french", sentences)
+        engine = marian_engine.MarianTranslator(path, max_length=max_length, variant="auto")
+        out    = engine.translate("Where is the library?")
+        engine.batcher.close()
+        print(f"\n  MARIAN_VARIANT=auto → {engine.variant!r} "
+              f"(loaded in {engine.load_ms} ms), output {out!r}")
+    return result
+
+
+# ── Whisper input: temp WAV file vs in-memory PCM ────────────────────────────
+
+class StubWhisperModel:
+    """
+    Stands in for whisper's model.transcribe(): a path is decoded the way
+    whisper.load_audio does (read the file → int16 → float32, resampled to
+    16 kHz), an array is used as is.  "Inference" is one pass over the
+    samples, so the timing is all input handling.
+    """
+
+    def __init__(self):
+        self.shapes = []
+
+    def transcribe(self, audio, language=None):
+        import wave, numpy as np
+        from audio_frontend import resample
+        if isinstance(audio, str):
+            with wave.open(audio, "rb") as w:
+                rate, frames = w.getframerate(), w.readframes(w.getnframes())
+            audio = resample(np.frombuffer(frames, np.int16).flatten().astype(np.float32) / 32768.0, rate)
+        self.shapes.append(audio.shape)
+        return {"text": f"{len(audio)} samples, rms {float(np.sqrt(np.mean(audio * audio))):.3f}"}
+
+
+def _legacy_whisper_file(model, audio_bytes: bytes, sample_rate: int) -> dict:
+    """The old path: AudioData.get_wav_data() → NamedTemporaryFile → transcribe(path)."""
+    import io, wave, tempfile
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(sample_rate)
+        w.writeframes(audio_bytes)
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+        tmp.write(buf.getvalue())
+        tmp_path = tmp.name
+    result = model.transcribe(tmp_path, language="en")
+    os.unlink(tmp_path)
+    return {"text": result["text"].strip()}
+
+
+def bench_whisper_pcm(utterances: int = 200, seconds: float = 4.0):
+    """Per-utterance input overhead with a stubbed Whisper model, at 16 kHz and 44.1 kHz input."""
+    import numpy as np
+    from speech_to_text import SpeechToText
+
+    stt = SpeechToText(engine="google")
+    stt.engine, stt.whisper_model = "whisper", StubWhisperModel()
+
+    print(f"\n{'='*60}")
+    print(f"  WHISPER INPUT — {utterances} × {seconds:.0f} s utterances, stub model")
+    print(f"{'='*60}")
+    print(f"  {'input rate':>10} {'temp WAV ms':>12} {'PCM ms':>8} {'speed-up':>9}")
+    print("  " + "─" * 42)
+    rows = {}
+    for rate in (16000, 44100):
+        t   = np.arange(int(seconds * rate)) / rate
+        pcm = (np.sin(2 * np.pi * 220 * t) * 8000).astype("<i2").tobytes()
+        a = _legacy_whisper_file(stt.whisper_model, pcm, rate)["text"]
+        b = stt.transcribe_bytes(pcm, rate)["text"]
+        assert a.split(",")[0] == b.split(",")[0], (a, b)
+        timings = {}
+        for name, fn in (("file", lambda: _legacy_whisper_file(stt.whisper_model, pcm, rate)),
+                         ("pcm",  lambda: stt.transcribe_bytes(pcm, rate))):
+            samples = []
+            for _ in range(utterances):
+                t0 = time.perf_counter()
+                fn()
+                samples.append((time.perf_counter() - t0) * 1000)
+            timings[name] = statistics.median(samples)
+        rows[rate] = timings
+        print(f"  {rate:>10} {timings['file']:>12.3f} {timings['pcm']:>8.3f} "
+              f"{timings['file'] / timings['pcm']:>8.1f}x")
+    print("\n  (the real file path also spawns ffmpeg per utterance — not counted here)")
+    return rows
+
+
+# ── Whisper: dynamic batching of concurrent utterances ───────────────────────
+
+def _stub_whisper(base_ms: float, per_item_ms: float, load_ms: float = 0, first_call_ms: float = 0):
+    """
+    (stub whisper module, stub model) for SpeechToText._decode_batch.  decode()
+    records the mel batch shape and sleeps base_ms + per_item_ms × batch —
+    an encoder pass costs mostly the same whether it carries 1 or 8 clips.
+    load_model() takes `load_ms`; the first decode() another `first_call_ms`
+    (lazy initialisation a warm-up absorbs).
+    """
+    import types, numpy as np, torch
+    from speech_to_text import WHISPER_SAMPLES
+
+    model = types.SimpleNamespace(dims=types.SimpleNamespace(n_mels=80), device=torch.device("cpu"), shapes=[])
+
+    def decode(m, mel, options):
+        cold = not m.shapes
+        m.shapes.append(tuple(mel.shape))
+        time.sleep((base_ms + per_item_ms * mel.shape[0] + (first_call_ms if cold else 0)) / 1000)
+        return [types.SimpleNamespace(text=" stub transcript ")] * mel.shape[0]
+
+    def load_model(name):
+        time.sleep(load_ms / 1000)
+        model.shapes.clear()
+        return model
+
+    lib = types.SimpleNamespace(
+        pad_or_trim=lambda a: np.pad(a, (0, max(0, WHISPER_SAMPLES - len(a))))[:WHISPER_SAMPLES],
+        log_mel_spectrogram=lambda a, n_mels=80: torch.zeros(n_mels, 3000),
+        DecodingOptions=lambda **kw: types.SimpleNamespace(**kw),
+        decode=decode,
+        load_model=load_model,
+    )
+    return lib, model
+
+
+def bench_whisper_batch(utterances: int = 64, clients: int = 16, seconds: float = 3.0,
+                        base_ms: float = 150, per_item_ms: float = 20):
+    """
+    `utterances` 3 s clips from `clients` concurrent callers through
+    transcribe_audio_bytes_async, at max batch 1 (one decode per utterance,
+    as before) up to 16.  Stub model; see _stub_whisper for the cost model.
+    """
+    from collections import Counter
+    import numpy as np
+    import speech_to_text
+
+    lib, model = _stub_whisper(base_ms, per_item_ms)
+    speech_to_text.whisper_lib = lib
+    stt = speech_to_text.SpeechToText(engine="google")
+    stt.engine, stt.whisper_model = "whisper", model
+    speech_to_text._registry[("whisper", speech_to_text.WHISPER_MODEL)] = stt
+    pcm = (np.sin(np.arange(int(seconds * 16000)) / 16000 * 2 * np.pi * 200) * 6000).astype("<i2").tobytes()
+
+    async def run() -> list[float]:
+        sem, lat = asyncio.Semaphore(clients), []
+        async def one():
+            async with sem:
+                t0 = time.perf_counter()
+                r  = await speech_to_text.transcribe_audio_bytes_async(pcm, 16000, "whisper")
+                assert r["text"] == "stub transcript", r
+                lat.append((time.perf_counter() - t0) * 1000)
+        await asyncio.gather(*(one() for _ in range(utterances)))
+        return lat
+
+    print(f"\n{'='*72}")
+    print(f"  WHISPER BATCHING — {utterances} × {seconds:.0f} s utterances, {clients} concurrent callers")
+    print(f"  stub decode: {base_ms:.0f} ms + {per_item_ms:.0f} ms per clip in the batch")
+    print(f"{'='*72}")
+    print(f"  {'max batch':>9} {'utt/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'mean batch':>11}  batch shapes")
+    print("  " + "─" * 68)
+    rows, base = {}, None
+    for max_batch in (1, 4, 8, 16):
+        stt.enable_batching(max_batch, max_wait_ms=10)
+        model.shapes.clear()
+        t0   = time.perf_counter()
+        lat  = asyncio.run(run())
+        rate = utterances / (time.perf_counter() - t0)
+        base = base or rate
+        st   = stt.batcher.stats()
+        shapes = Counter(model.shapes)
+        rows[max_batch] = {"utt_per_s": rate, "p50_ms": _percentile(lat, 50), "p99_ms": _percentile(lat, 99),
+                           **st}
+        print(f"  {max_batch:>9} {rate:>8.1f} {rows[max_batch]['p50_ms']:>9.0f} {rows[max_batch]['p99_ms']:>9.0f} "
+              f"{st['mean_batch']:>11.2f}  "
+              + ", ".join(f"{n}×{list(s)}" for s, n in sorted(shapes.items(), reverse=True)[:3]))
+    stt.batcher.close()
+    print(f"\n  Throughput at max batch 8: {rows[8]['utt_per_s'] / base:.1f}x the unbatched rate "
+          f"(batcher: mean wait {rows[8]['mean_wait_ms']} ms, mean run {rows[8]['mean_run_ms']} ms)")
+    return rows
+
+
+# ── STT worker processes: scaling, shared-memory handoff, restarts ──────────
+
+class CpuBoundSTT:
+    """
+    Engine for stt_pool workers: `work` iterations of pure-Python arithmetic
+    per utterance (holds the GIL, like Whisper's Python-side decode loop).
+    A payload starting with b"CRASH!" kills the process.
+    """
+
+    def __init__(self, work: int = 400_000):
+        self.work = work
+
+    def transcribe_bytes(self, audio_bytes, sample_rate: int = 16000, channels: int = 1) -> dict:
+        if bytes(audio_bytes[:6]) == b"CRASH!":
+            os._exit(1)
+        acc = 0
+        for i in range(self.work):
+            acc = (acc * 31 + i) & 0xFFFF
+        return {"text": f"{len(audio_bytes)} bytes", "engine": "cpu-stub", "error": None}
+
+
+def _pickle_echo(conn):
+    """Baseline worker: audio arrives pickled through the pipe."""
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            return
+        conn.send(len(msg))
+
+
+def bench_stt_pool(utterances: int = 64, seconds: float = 4.0):
+    """
+    1. Throughput of CPU-bound STT: in-process "stt" threads vs 1 / 2 / 4
+       worker processes.
+    2. Per-job handoff cost: shared memory vs audio pickled through a pipe.
+    3. A worker crash mid-load: restarts, retries, failed jobs.
+    """
+    import multiprocessing as mp
+    import numpy as np
+    import stt_pool
+    from concurrent.futures import ThreadPoolExecutor
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    pcm   = (np.sin(np.arange(int(seconds * 16000)) / 16000 * 2 * np.pi * 200) * 6000).astype("<i2").tobytes()
+    stt_pool.HEALTH_S = 0.2
+    factory = "benchmark:CpuBoundSTT"
+
+    print(f"\n{'='*64}")
+    print(f"  STT PROCESS POOL — {utterances} CPU-bound utterances, {cores} core(s) available")
+    print(f"{'='*64}")
+    print(f"  {'mode':<26} {'utt/s':>8} {'speed-up':>9}")
+    print("  " + "─" * 46)
+    engine, rows = CpuBoundSTT(), {}
+    with ThreadPoolExecutor(4) as ex:
+        t0 = time.perf_counter()
+        list(ex.map(lambda _: engine.transcribe_bytes(pcm), range(utterances)))
+        base = utterances / (time.perf_counter() - t0)
+    rows["threads"] = base
+    print(f"  {'in-process, 4 threads':<26} {base:>8.1f} {1.0:>8.1f}x")
+    for size in (1, 2, 4):
+        pool = stt_pool.STTProcessPool(size, factory=factory)
+        pool.wait_ready()
+        t0 = time.perf_counter()
+        futures = [pool.submit(pcm) for _ in range(utterances)]
+        assert all(f.result()["text"] == f"{len(pcm)} bytes" for f in futures)
+        rate = utterances / (time.perf_counter() - t0)
+        per  = [w["completed"] for w in pool.stats()["workers"]]
+        pool.shutdown()
+        rows[f"processes-{size}"] = rate
+        print(f"  {f'{size} worker process(es)':<26} {rate:>8.1f} {rate / base:>8.1f}x   jobs/worker {per}")
+    if cores < 4:
+        print(f"  (only {cores} core(s) here — scaling past that needs more cores)")
+
+    # ── Handoff cost ─────────────────────────────────────────────────────────
+    print(f"\n  {'audio':>8} {'pickled pipe ms':>16} {'shared memory ms':>17}")
+    ctx = mp.get_context(stt_pool.START_METHOD)
+    for secs in (4, 30, 120):
+        clip = pcm * int(secs / seconds)
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(target=_pickle_echo, args=(child,), daemon=True)
+        proc.start()
+        t0 = time.perf_counter()
+        for _ in range(50):
+            parent.send(clip); parent.recv()
+        piped = (time.perf_counter() - t0) * 1000 / 50
+        parent.send(None); proc.join()
+        pool = stt_pool.STTProcessPool(1, factory=factory, kwargs={"work": 0})
+        pool.wait_ready()
+        pool.transcribe(clip)
+        t0 = time.perf_counter()
+        for _ in range(50):
+            pool.transcribe(clip)
+        shm = (time.perf_counter() - t0) * 1000 / 50
+        pool.shutdown()
+        rows[f"handoff-{secs}s"] = {"pipe_ms": piped, "shm_ms": shm}
+        print(f"  {f'{secs} s':>8} {piped:>16.3f} {shm:>17.3f}")
+
+    # ── Crash and restart ────────────────────────────────────────────────────
+    pool = stt_pool.STTProcessPool(2, factory=factory, kwargs={"work": 200_000})
+    pool.wait_ready()
+    futures = [pool.submit(pcm) for _ in range(6)] + [pool.submit(b"CRASH!" + pcm)] + \
+              [pool.submit(pcm) for _ in range(6)]
+    results = [f.result(timeout=60) for f in futures]
+    pool.wait_ready()
+    ok     = sum(1 for r in results if not r.get("error"))
+    failed = [r["error"] for r in results if r.get("error")]
+    st = pool.stats()
+    after = pool.transcribe(pcm)
+    pool.shutdown()
+    print(f"\n  crash test: {ok}/{len(results)} jobs succeeded, failed: {failed}")
+    print(f"  restarts {st['restarts']}, retries {st['retries']}, "
+          f"pool answers after restart: {not after.get('error')}")
+    return rows
+
+
+# ── STT preloading: cold first request vs lifespan preload + warm-up ─────────
+
+def bench_ready(load_ms: float = 1500, first_call_ms: float = 400, requests: int = 5):
+    """
+    /translate-audio latency for the first few requests with a stub Whisper
+    that takes `load_ms` to load and `first_call_ms` extra on its first
+    decode: lazily loaded on the first request (no lifespan) vs preloaded
+    and warmed by the app's lifespan, with /health and /ready polled while
+    it starts.
+    """
+    import base64, httpx
+    import numpy as np
+    from starlette.testclient import TestClient
+    import app as app_module
+    import http_pool, speech_to_text
+
+    lib, _ = _stub_whisper(base_ms=60, per_item_ms=10, load_ms=load_ms, first_call_ms=first_call_ms)
+    speech_to_text.whisper_lib, speech_to_text.WHISPER_AVAILABLE = lib, True
+    speech_to_text.STT_ENGINE, speech_to_text.PRELOAD = "whisper", ["whisper"]
+    app_module.synthesize = lambda text, language="telugu", endpoint="default": {"audio_b64": "",
+                                                                                 "mime_type": "audio/mpeg"}
+    pcm  = (np.sin(np.arange(32000) / 16000 * 2 * np.pi * 200) * 6000).astype("<i2").tobytes()
+    body = {"audio_b64": base64.b64encode(pcm).decode(), "tgt_lang": "french"}
+
+    def reset():
+        speech_to_text._registry.clear()
+        speech_to_text._preload.clear()
+        _memory_only_cache()
+
+    async def cold() -> list[float]:
+        out = []
+        transport = httpx.ASGITransport(app=app_module.app)      # no lifespan → nothing preloaded
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for _ in range(requests):
+                t0 = time.perf_counter()
+                (await client.post("/translate-audio", json=body)).raise_for_status()
+                out.append((time.perf_counter() - t0) * 1000)
+        await http_pool.aclose()
+        return out
+
+    with StubGoogleServer(latency=lambda: 0.01) as server:
+        http_pool.GOOGLE_TRANSLATE_URL = server.url
+        reset()
+        lazy = asyncio.run(cold())
+
+        reset()
+        t0, first_ready, polls = time.perf_counter(), None, []
+        with TestClient(app_module.app) as client:
+            while first_ready is None and time.perf_counter() - t0 < 30:
+                h, r = client.get("/health").status_code, client.get("/ready").status_code
+                polls.append((h, r))
+                if r == 200:
+                    first_ready = (time.perf_counter() - t0) * 1000
+                else:
+                    time.sleep(0.05)
+            warm = []
+            for _ in range(requests):
+                t1 = time.perf_counter()
+                client.post("/translate-audio", json=body).raise_for_status()
+                warm.append((time.perf_counter() - t1) * 1000)
+            stats = client.get("/metrics").json()["stt"]
+
+    print(f"\n{'='*64}")
+    print(f"  STT PRELOAD — stub Whisper: load {load_ms:.0f} ms, first decode +{first_call_ms:.0f} ms")
+    print(f"{'='*64}")
+    print(f"  {'request':>8} {'lazy load ms':>13} {'preloaded ms':>13}")
+    print("  " + "─" * 36)
+    for i, (a, b) in enumerate(zip(lazy, warm), 1):
+        print(f"  {i:>8} {a:>13.1f} {b:>13.1f}")
+    starting = sum(1 for h, r in polls if h == 200 and r == 503)
+    print(f"\n  while loading: /health 200 and /ready 503 on {starting} of {len(polls)} polls; "
+          f"/ready 200 after {first_ready:.0f} ms")
+    rec = stats["preload"].get("whisper", {})
+    print(f"  recorded: load {rec.get('load_ms')} ms, warm-up {rec.get('warmup_ms')} ms")
+    return {"lazy_ms": lazy, "preloaded_ms": warm, "ready_after_ms": first_ready}
+
+
+# ── Streaming audio: VAD segmentation and /ws/audio ──────────────────────────
+
+def _synthetic_speech_pcm(rate: int = 16000, seed: int = 3) -> tuple[bytes, list[tuple[float, float]]]:
+    """
+    8.5 s of int16 PCM over a faint noise floor: three "utterances" (voiced
+    harmonics with a syllable-rate envelope; the second has a 0.3 s gap that
+    must not split it), a 0.1 s click and a 0.5 s burst of hiss that must
+    not count as speech.  Returns (pcm, [(start_s, end_s) of utterances]).
+    """
+    import numpy as np
+    rng   = np.random.default_rng(seed)
+    total = 8.5
+    x     = rng.normal(0, 60, int(total * rate))
+
+    def voiced(start, end, f0):
+        t   = np.arange(int((end - start) * rate)) / rate
+        sig = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in (1, 2, 3, 4))
+        env = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+        x[int(start * rate):int(start * rate) + len(t)] += 2500 * env * sig
+
+    truth = [(0.5, 1.7), (2.7, 4.2), (5.2, 5.8)]
+    voiced(0.5, 1.7, 140)
+    voiced(2.7, 3.3, 180); voiced(3.6, 4.2, 170)
+    voiced(5.2, 5.8, 220)
+    x[int(6.6 * rate):int(6.7 * rate)] += 3000 * np.sign(rng.normal(size=int(0.1 * rate)))   # click
+    x[int(7.0 * rate):int(7.5 * rate)] += rng.normal(0, 400, int(0.5 * rate))                # hiss
+    return np.clip(x, -32768, 32767).astype("<i2").tobytes(), truth
+
+
+def bench_vad(rate: int = 16000, stt_ms_per_s: float = 150):
+    """
+    1. VAD on synthetic PCM fed in odd-sized chunks: utterances found vs the
+       ground truth, and cost per second of audio (NumPy vs pure Python).
+    2. /ws/audio end to end at real-time pace (stub STT taking
+       `stt_ms_per_s` per second of audio, stub TTS): when each translation
+       arrives, vs uploading the whole clip to /translate-audio.
+    """
+    import vad as vad_module
+    from starlette.testclient import TestClient
+    import app as app_module
+
+    pcm, truth = _synthetic_speech_pcm(rate)
+    seconds    = len(pcm) / 2 / rate
+    rng        = random.Random(1)
+
+    def segment(numpy: bool) -> tuple[list[dict], float]:
+        vad_module.NUMPY_AVAILABLE = numpy
+        det, events, pos = vad_module.VoiceActivityDetector(rate), [], 0
+        t0 = time.perf_counter()
+        while pos < len(pcm):
+            step = rng.randint(137, 4001)
+            events += det.push(pcm[pos:pos + step])
+            pos += step
+        events += det.flush()
+        return [e for e in events if e["type"] == "segment"], time.perf_counter() - t0
+
+    print(f"\n{'='*60}")
+    print(f"  VAD — {seconds:.1f} s synthetic stream, {len(truth)} utterances + click + hiss")
+    print(f"{'='*60}")
+    segs, _ = segment(True)
+    print(f"  {'truth':>14} {'found':>16}")
+    for i in range(max(len(truth), len(segs))):
+        t = f"{truth[i][0]:.2f}–{truth[i][1]:.2f}" if i < len(truth) else "—"
+        f = f"{segs[i]['start_s']:.2f}–{segs[i]['end_s']:.2f}" if i < len(segs) else "—"
+        print(f"  {t:>14} {f:>16}")
+    ok = len(segs) == len(truth) and all(abs(s["start_s"] - (a - vad_module.PREROLL_S)) < 0.1
+                                         and abs(s["end_s"] - (b + vad_module.TAIL_S)) < 0.1
+                                         for s, (a, b) in zip(segs, truth))
+    print(f"  [{'✓' if ok else '!'}] {len(segs)} segment(s) for {len(truth)} utterance(s)")
+    for numpy in (True, False):
+        runs = [segment(numpy)[1] for _ in range(5)]
+        best = min(runs)
+        print(f"  {'numpy' if numpy else 'pure python':<12} {best / seconds * 1000:>8.3f} ms per audio second "
+              f"({seconds / best:,.0f}x real time)")
+    vad_module.NUMPY_AVAILABLE = True
+
+    # ── End to end over /ws/audio ────────────────────────────────────────────
+    async def stub_stt(audio_bytes, sample_rate=16000, engine=None, model=None):
+        await asyncio.sleep(len(audio_bytes) / 2 / sample_rate * stt_ms_per_s / 1000)
+        return {"text": "good morning", "engine": "stub", "latency_ms": 0, "error": None}
+
+    def stub_tts(text, language="telugu", endpoint="default"):
+        return {"audio_b64": "", "mime_type": "audio/mpeg", "latency_ms": 0, "engine": "stub", "error": None}
+
+    app_module.transcribe_audio_bytes_async = stub_stt
+    app_module.synthesize                   = stub_tts
+    chunk = int(rate * 0.02) * 2
+    arrivals, received = {}, []
+    with TestClient(app_module.app) as client, client.websocket_connect("/ws/audio") as ws:
+        ws.send_text(json.dumps({"tgt_lang": "telugu", "sample_rate": rate}))
+
+        def reader():
+            while True:
+                msg = ws.receive_json()
+                received.append(msg)
+                if msg.get("event") == "translation":
+                    arrivals[msg["index"]] = time.perf_counter() - t0
+                if msg.get("event") == "done":
+                    return
+
+        t0 = time.perf_counter()
+        th = threading.Thread(target=reader, daemon=True)
+        th.start()
+        for i, pos in enumerate(range(0, len(pcm), chunk)):
+            ws.send_bytes(pcm[pos:pos + chunk])
+            time.sleep(max(0.0, t0 + (i + 1) * 0.02 - time.perf_counter()))
+        ws.send_text(json.dumps({"event": "end"}))
+        th.join(timeout=30)
+
+    upload = seconds + seconds * stt_ms_per_s / 1000
+    print(f"\n  /ws/audio at real-time pace (stub STT {stt_ms_per_s:.0f} ms per audio second):")
+    print(f"  {'utterance':>10} {'speech ends s':>14} {'translation s':>14} {'after speech':>13}")
+    for idx, (a, b) in enumerate(truth, 1):
+        got = arrivals.get(idx)
+        print(f"  {idx:>10} {b:>14.2f} {got if got is not None else float('nan'):>14.2f} "
+              f"{(got - b) * 1000 if got is not None else float('nan'):>10.0f} ms")
+    events = [m.get("event") for m in received]
+    print(f"  events: {', '.join(f'{e}×{events.count(e)}' for e in dict.fromkeys(events))}")
+    print(f"\n  Whole-clip upload to /translate-audio: first (only) result at ≥ {upload:.2f} s "
+          f"vs first /ws/audio translation at {arrivals.get(1, float('nan')):.2f} s")
+    return {"segments": len(segs), "arrivals": arrivals}
+
+
+# ── Audio front-end: downmix, polyphase resample, trim on long clips ─────────
+
+def _long_clip(minutes: float, rate: int = 44100, channels: int = 2, lead_s: float = 10,
+               tail_s: float = 15, seed: int = 5) -> bytes:
+    """
+    Interleaved int16 PCM: lead_s of room noise, then speech-like bursts
+    (voiced harmonics, 1.5–4 s, short pauses) until tail_s before the end,
+    then room noise again.  A faint 10 kHz whine runs throughout — above the
+    16 kHz Nyquist, so a proper resampler must remove it.
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    n   = int(minutes * 60 * rate)
+    t   = np.arange(n) / rate
+    x   = rng.normal(0, 40, n) + 150 * np.sin(2 * np.pi * 10000 * t)
+    pos, end = lead_s, minutes * 60 - tail_s
+    while pos < end:
+        dur = min(rng.uniform(1.5, 4.0), end - pos)
+        i, j = int(pos * rate), int((pos + dur) * rate)
+        tt   = t[:j - i]
+        f0   = rng.uniform(110, 240)
+        x[i:j] += 3000 * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * tt)) * \
+                  sum(np.sin(2 * np.pi * f0 * k * tt) / k for k in (1, 2, 3, 4))
+        pos += dur + rng.uniform(0.2, 0.8)
+    x = np.clip(x, -32768, 32767)
+    if channels > 1:
+        x = np.repeat(x[:, None], channels, axis=1) * np.linspace(1.0, 0.7, channels)   # panned copies
+    return x.astype("<i2").tobytes()
+
+
+def bench_frontend(minutes: tuple = (1, 3, 5), rate: int = 44100, channels: int = 2, repeats: int = 3):
+    """
+    Front-end cost per stage on multi-minute clips, the silence it trims and
+    how polyphase resampling compares with the old linear interpolation.
+    """
+    import numpy as np
+    import audio_frontend as af
+
+    def legacy(pcm):
+        """Previous path: first channel only, np.interp resampling, no trim."""
+        x   = np.frombuffer(pcm, "<i2")[::channels].astype(np.float32) / 32768
+        n   = int(round(len(x) * af.TARGET_RATE / rate))
+        pos = np.arange(n, dtype=np.float64) * (rate / af.TARGET_RATE)
+        return np.interp(pos, np.arange(len(x)), x).astype(np.float32)
+
+    def best(fn):
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            out = fn()
+            times.append((time.perf_counter() - t0) * 1000)
+        return min(times), out
+
+    print(f"\n{'='*72}")
+    print(f"  AUDIO FRONT-END — {rate} Hz, {channels} ch, 10 s lead / 15 s tail silence")
+    print(f"{'='*72}")
+    print(f"  {'clip':>6} {'decode':>8} {'resample':>9} {'trim':>7} {'norm':>7} {'total':>8} "
+          f"{'ms/min':>7} {'× RT':>7} {'cut':>7} {'interp':>8}")
+    print("  " + "─" * 80)
+    rows = {}
+    for m in minutes:
+        pcm = _long_clip(m, rate, channels)
+        t_dec,  x   = best(lambda: af.to_float(pcm, channels))
+        t_res,  y   = best(lambda: af.resample(x, rate))
+        t_trim, b   = best(lambda: af.speech_bounds(y))
+        t_norm, _   = best(lambda: af.normalize(y[b[0]:b[1]]))
+        t_all, (out, rep) = best(lambda: af.preprocess(pcm, rate, channels))
+        t_old,  _   = best(lambda: legacy(pcm))
+        cut = rep["trimmed_lead"] + rep["trimmed_tail"]
+        rows[m] = {"total_ms": round(t_all, 1), "ms_per_min": round(t_all / m, 1),
+                   "legacy_ms": round(t_old, 1), **rep}
+        print(f"  {m:>4} m {t_dec:>8.1f} {t_res:>9.1f} {t_trim:>7.1f} {t_norm:>7.1f} {t_all:>8.1f} "
+              f"{t_all / m:>7.1f} {m * 60000 / t_all:>6.0f}x {cut / af.TARGET_RATE:>6.1f}s {t_old:>8.1f}")
+
+    rep = rows[minutes[-1]]
+    kept = rep["output_samples"]
+    print(f"\n  {minutes[-1]} min clip: trimmed {rep['trimmed_lead']} lead + {rep['trimmed_tail']} tail samples "
+          f"({rep['trimmed_ms'] / 1000:.1f} s of {(kept + rep['trimmed_lead'] + rep['trimmed_tail']) / af.TARGET_RATE:.0f} s, "
+          f"expected ≈ 24.8 s) — {2 * (rep['trimmed_lead'] + rep['trimmed_tail']) / 1e6:.2f} MB less 16 kHz PCM "
+          f"to upload / encode; gain ×{rep['gain']}")
+
+    # Out-of-band rejection: a 10 kHz tone has no place in 16 kHz audio (Nyquist 8 kHz)
+    t    = np.arange(rate * 2) / rate
+    tone = (0.5 * np.sin(2 * np.pi * 10000 * t)).astype(np.float32)
+    pcm  = (tone * 32767).astype("<i2")
+    pcm  = np.repeat(pcm[:, None], channels, axis=1).tobytes()
+    def rms_db(a):
+        a = a[1000:-1000]
+        return 20 * np.log10(np.sqrt(np.mean(a * a)) / np.sqrt(np.mean(tone * tone)))
+    alias_interp = rms_db(legacy(pcm))
+    alias_poly   = rms_db(af.resample(af.to_float(pcm, channels), rate))
+    print(f"  10 kHz tone after resampling to 16 kHz (aliases to 6 kHz): "
+          f"interp {alias_interp:+.1f} dB, polyphase {alias_poly:+.1f} dB")
+    return {"clips": rows, "alias_db": {"interp": round(alias_interp, 1), "polyphase": round(alias_poly, 1)}}
+
+
+# ── Compressed uploads: bytes on the wire and latency per format ──────────────
+
+def _encode_clip(pcm: bytes, rate: int, fmt: str, bitrate: int = 24000) -> bytes | None:
+    """
+    16-bit mono PCM → `fmt` ("wav", or Opus in "ogg" / "webm", like a
+    browser's MediaRecorder).  Opus needs PyAV or ffmpeg; None without them.
+    """
+    import io, wave, shutil, subprocess
+    import audio_decode
+    if fmt == "pcm":
+        return pcm
+    if fmt == "wav":
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(1); w.setsampwidth(2); w.setframerate(rate)
+            w.writeframes(pcm)
+        return buf.getvalue()
+    if audio_decode.AV_AVAILABLE:
+        import av, numpy as np
+        buf = io.BytesIO()
+        with av.open(buf, mode="w", format=fmt) as container:
+            stream = container.add_stream("libopus", rate=48000)
+            stream.bit_rate = bitrate
+            frame = av.AudioFrame.from_ndarray(np.frombuffer(pcm, "<i2").reshape(1, -1), format="s16",
+                                               layout="mono")
+            frame.sample_rate = rate
+            for packet in stream.encode(frame):
+                container.mux(packet)
+            for packet in stream.encode(None):
+                container.mux(packet)
+        return buf.getvalue()
+    if shutil.which(audio_decode.FFMPEG_BIN):
+        return subprocess.run(
+            [audio_decode.FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-f", "s16le", "-ar", str(rate),
+             "-ac", "1", "-i", "pipe:0", "-c:a", "libopus", "-b:a", str(bitrate), "-f", fmt, "pipe:1"],
+            input=pcm, capture_output=True, check=True).stdout
+    return None
+
+
+def bench_formats(uplink_mbps: float = 2.0, repeats: int = 5, rate: int = 48000):
+    """
+    /translate-audio with the same utterance uploaded as raw PCM, WAV and
+    Opus (OGG / WebM): request bytes, upload time on a `uplink_mbps`
+    mobile link, server-side decode, and the sum.  STT / translation are
+    stubbed so the numbers are the ingest path alone.
+    """
+    import base64
+    from starlette.testclient import TestClient
+    import app as app_module
+    import audio_decode
+
+    pcm, _  = _synthetic_speech_pcm(rate)
+    seconds = len(pcm) / 2 / rate
+    seen    = {}
+
+    async def stub_stt(audio_bytes, sample_rate=16000, engine=None, model=None, channels=1):
+        seen["seconds"] = len(audio_bytes) / 2 / channels / sample_rate
+        return {"text": "good morning", "engine": "stub", "latency_ms": 0, "error": None}
+
+    async def stub_translate(text, src_lang, tgt_lang, tts=True, endpoint="default"):
+        return {"translated": "bonjour", "confidence": 1.0}, {"audio_b64": "", "mime_type": "audio/mpeg"}
+
+    app_module.transcribe_audio_bytes_async = stub_stt
+    app_module.translate_and_speak          = stub_translate
+
+    print(f"\n{'='*78}")
+    print(f"  UPLOAD FORMATS — {seconds:.1f} s utterance at {rate} Hz, {uplink_mbps:g} Mbit/s uplink")
+    print(f"  decoders available: {', '.join(audio_decode.available_decoders()) or 'none (wav / pcm only)'}")
+    print(f"{'='*78}")
+    print(f"  {'format':<10} {'audio KB':>9} {'request KB':>11} {'upload ms':>10} {'server ms':>10} "
+          f"{'decode ms':>10} {'total ms':>9} {'decoded s':>10}")
+    print("  " + "─" * 84)
+    rows = {}
+    with TestClient(app_module.app) as client:
+        for fmt in ("pcm", "wav", "ogg", "webm"):
+            data = _encode_clip(pcm, rate, fmt)
+            if data is None:
+                nominal = seconds * 24000 / 8 / 1024
+                print(f"  {fmt + '/opus':<10} {nominal:>8.1f}*   — skipped: needs PyAV or ffmpeg to encode the sample")
+                continue
+            body = {"audio_b64": base64.b64encode(data).decode(), "sample_rate": rate, "tgt_lang": "french"}
+            wire = len(json.dumps(body))
+            times, info = [], None
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                r  = client.post("/translate-audio", json=body)
+                times.append((time.perf_counter() - t0) * 1000)
+                r.raise_for_status()
+                info = r.json()["decode"]
+            upload = wire * 8 / (uplink_mbps * 1e6) * 1000
+            server = statistics.median(times)
+            rows[fmt] = {"audio_bytes": len(data), "request_bytes": wire, "upload_ms": round(upload, 1),
+                         "server_ms": round(server, 2), "decode_ms": info["decode_ms"],
+                         "decoded_s": round(seen["seconds"], 2)}
+            label = fmt if fmt in ("pcm", "wav") else fmt + "/opus"
+            print(f"  {label:<10} {len(data) / 1024:>9.1f} {wire / 1024:>11.1f} {upload:>10.1f} {server:>10.2f} "
+                  f"{info['decode_ms']:>10.2f} {upload + server:>9.1f} {seen['seconds']:>10.2f}")
+    if "ogg" not in rows:
+        print("\n  * nominal Opus payload at 24 kbit/s, not measured")
+    if "pcm" in rows and "ogg" in rows:
+        print(f"\n  OGG/Opus request is {rows['pcm']['request_bytes'] / rows['ogg']['request_bytes']:.1f}x "
+              f"smaller than base64 PCM")
+    return rows
+
+
+# ── Upload bodies: base64 JSON vs raw octet-stream vs multipart ───────────────
+
+def _upload_body(mode: str, pcm: bytes, rate: int) -> tuple[str, bytes, dict]:
+    """(url, body, headers) for one /translate-audio upload, encoded up front."""
+    if mode == "json":
+        body = json.dumps({"audio_b64": __import__("base64").b64encode(pcm).decode(),
+                           "sample_rate": rate, "tgt_lang": "french"}).encode()
+        return "/translate-audio", body, {"content-type": "application/json"}
+    if mode == "raw":
+        return (f"/translate-audio?sample_rate={rate}&tgt_lang=french", pcm,
+                {"content-type": "application/octet-stream"})
+    boundary = "benchboundary7MA4YWxkTrZu0gW"
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"sample_rate\"\r\n\r\n{rate}\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"tgt_lang\"\r\n\r\nfrench\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"audio\"; filename=\"clip.pcm\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n").encode()
+    return ("/translate-audio", head + pcm + f"\r\n--{boundary}--\r\n".encode(),
+            {"content-type": f"multipart/form-data; boundary={boundary}"})
+
+
+def _proc_status_kb(field: str) -> int | None:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def _measure_upload(mode: str, seconds: float, rate: int, repeats: int = 5) -> dict:
+    """One upload mode in this (fresh) process: peak RSS growth while serving it, parse time."""
+    import gc, httpx
+    import numpy as np
+    import app as app_module
+
+    async def stub_stt(audio_bytes, sample_rate=16000, engine=None, model=None, channels=1):
+        return {"text": "good morning", "engine": "stub", "latency_ms": 0, "error": None}
+
+    async def stub_translate(text, src_lang, tgt_lang, tts=True, endpoint="default"):
+        return {"translated": "bonjour", "confidence": 1.0}, {"audio_b64": "", "mime_type": "audio/mpeg"}
+
+    app_module.transcribe_audio_bytes_async = stub_stt
+    app_module.translate_and_speak          = stub_translate
+    rng = np.random.default_rng(0)
+    pcm = rng.integers(-3000, 3000, int(seconds * rate), dtype="<i2").tobytes()
+    url, body, headers = _upload_body(mode, pcm, rate)
+    small = _upload_body(mode, pcm[:rate * 2], rate)
+    del rng
+
+    async def run():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            (await client.post(small[0], content=small[1], headers=small[2])).raise_for_status()
+            gc.collect()
+            try:
+                with open("/proc/self/clear_refs", "w") as f:      # reset VmHWM to the current RSS
+                    f.write("5")
+            except OSError:
+                pass
+            base = _proc_status_kb("VmRSS")
+            r = await client.post(url, content=body, headers=headers)
+            r.raise_for_status()
+            peak = _proc_status_kb("VmHWM")
+            parse = [r.json()["ingest"]["parse_ms"]]
+            for _ in range(repeats - 1):
+                parse.append((await client.post(url, content=body, headers=headers)).json()["ingest"]["parse_ms"])
+            return (peak - base) * 1024 if base is not None and peak is not None else None, parse
+
+    growth, parse = asyncio.run(run())
+    return {"audio_bytes": len(pcm), "request_bytes": len(body), "peak_rss_growth": growth,
+            "parse_ms": statistics.median(parse)}
+
+
+def bench_upload(seconds: float = 60, rate: int = 48000):
+    """
+    Peak memory and parse time for a `seconds`-long clip uploaded as base64
+    JSON, raw octet-stream and multipart — each mode in a fresh process,
+    peak RSS taken from /proc (VmHWM, reset just before the request).
+    """
+    import subprocess
+    print(f"\n{'='*72}")
+    print(f"  AUDIO UPLOAD — {seconds:.0f} s of 16-bit PCM at {rate} Hz, stubbed STT / translation")
+    print(f"{'='*72}")
+    print(f"  {'mode':<10} {'audio MB':>9} {'request MB':>11} {'peak RSS +MB':>13} {'× audio':>8} {'parse ms':>9}")
+    print("  " + "─" * 66)
+    rows = {}
+    for mode in ("json", "raw", "multipart"):
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "upload", "--measure", mode,
+                               "--seconds", str(seconds), "--rate", str(rate)], capture_output=True, text=True)
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            print(f"  {mode:<10} [!] {(proc.stderr.strip().splitlines() or ['no output'])[-1]}")
+            continue
+        r = rows[mode] = json.loads(lines[-1])
+        growth = r["peak_rss_growth"]
+        print(f"  {mode:<10} {r['audio_bytes'] / 2**20:>9.2f} {r['request_bytes'] / 2**20:>11.2f} "
+              f"{growth / 2**20 if growth is not None else float('nan'):>13.2f} "
+              f"{growth / r['audio_bytes'] if growth is not None else float('nan'):>7.1f}x {r['parse_ms']:>9.2f}")
+    if "json" in rows and "raw" in rows and rows["raw"]["peak_rss_growth"]:
+        print(f"\n  raw body: {rows['json']['peak_rss_growth'] / rows['raw']['peak_rss_growth']:.1f}x less peak "
+              f"memory, {rows['json']['parse_ms'] / rows['raw']['parse_ms']:.0f}x faster to parse than base64 JSON")
+    return rows
+
+
+def bench_tts_cache(requests: int = 600, tts_ms: float = 30, workers: int = 8):
+    """
+    Zipf-distributed PHRASE_TABLE replies through synthesize() with a stub
+    gTTS (sleeps `tts_ms`, ~32 kbit/s MP3-sized clips): latency without the
+    cache vs with it, per-endpoint hit ratio and bytes saved, a second
+    "worker" sharing the disk tier, and LRU eviction under a small disk limit.
+    """
+    import shutil, tempfile, collections
+    from concurrent.futures import ThreadPoolExecutor
+    import text_to_speech, tts_cache
+    from translator import PHRASE_TABLE
+
+    def fake_gtts(text, lang_code):
+        time.sleep(tts_ms / 1000)
+        size = max(2000, len(text.encode()) * 270)            # ~15 chars per second of speech
+        return (f"{lang_code}:{text}|".encode() * (size // max(1, len(text)) + 1))[:size]
+
+    text_to_speech._gtts_bytes, text_to_speech.GTTS_AVAILABLE = fake_gtts, True
+    clips     = [(text, lang) for row in PHRASE_TABLE.values() for lang, text in row.items()]
+    rng       = random.Random(0)
+    rng.shuffle(clips)
+    weights   = [1 / (rank + 1) ** 1.1 for rank in range(len(clips))]
+    endpoints = ["/translate", "/translate/fanout", "/translate-audio", "/ws/translate"]
+    workload  = [(clip, rng.choice(endpoints)) for clip in rng.choices(clips, weights, k=requests)]
+
+    def run(cache):
+        tts_cache._cache = cache
+        def one(item):
+            (text, lang), endpoint = item
+            t0 = time.perf_counter()
+            text_to_speech.synthesize(text, lang, endpoint)
+            return (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(workers) as ex:
+            latencies = list(ex.map(one, workload))
+        return latencies, time.perf_counter() - t0
+
+    def dir_bytes(path):
+        return sum(e.stat().st_size for sub in os.scandir(path) if sub.is_dir() for e in os.scandir(sub.path))
+
+    tmp = tempfile.mkdtemp(prefix="tts-cache-bench-")
+    print(f"\n{'='*72}")
+    print(f"  TTS CACHE — {requests} requests over {len(clips)} phrase clips (Zipf s=1.1), "
+          f"stub gTTS {tts_ms:.0f} ms, {workers} threads")
+    print(f"{'='*72}")
+    try:
+        base, base_wall = run(tts_cache.TTSCache(path=None, memory_bytes=0))
+        cache = tts_cache.TTSCache(path=tmp)
+        lat, wall = run(cache)
+        print(f"  {'':<14} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'wall s':>7}")
+        print("  " + "─" * 50)
+        for name, values, w in (("no cache", base, base_wall), ("cache", lat, wall)):
+            print(f"  {name:<14} {_percentile(values, 50):>8.2f} {_percentile(values, 95):>8.2f} "
+                  f"{statistics.mean(values):>8.2f} {w:>7.2f}")
+
+        stats = cache.stats()
+        print(f"\n  {'endpoint':<18} {'requests':>8} {'memory':>7} {'disk':>5} {'miss':>5} {'hit %':>6} {'KB saved':>9}")
+        print("  " + "─" * 62)
+        for name, s in sorted(stats["endpoints"].items()):
+            n = s["memory_hits"] + s["disk_hits"] + s["misses"]
+            print(f"  {name:<18} {n:>8} {s['memory_hits']:>7} {s['disk_hits']:>5} {s['misses']:>5} "
+                  f"{s['hit_ratio'] * 100:>6.1f} {s['bytes_saved'] / 1024:>9.1f}")
+        print(f"  {'total':<18} {requests:>8} {stats['memory_hits']:>7} {stats['disk_hits']:>5} "
+              f"{stats['misses']:>5} {stats['hit_ratio'] * 100:>6.1f} {stats['bytes_saved'] / 1024:>9.1f}")
+
+        # A second worker (or a restart) starts with an empty hot tier but the same directory
+        other = tts_cache.TTSCache(path=tmp)
+        lat2, _ = run(other)
+        s2 = other.stats()
+        print(f"\n  second worker, same dir: hit {s2['hit_ratio'] * 100:.1f} %  "
+              f"({s2['disk_hits']} disk, {s2['memory_hits']} memory, {s2['misses']} synthesized), "
+              f"p50 {_percentile(lat2, 50):.2f} ms")
+
+        # Touch the ten most requested clips, then shrink the disk tier to a quarter: they must survive
+        def key(clip):
+            text, lang = clip
+            return tts_cache.cache_key(text, text_to_speech.GTTS_LANG_MAP.get(lang, "fr"), "gTTS",
+                                       text_to_speech.GTTS_PARAMS)
+        small  = tts_cache.TTSCache(path=tmp, memory_bytes=0)
+        hot    = [clip for clip, _ in collections.Counter(c for c, _ in workload).most_common(10)]
+        time.sleep(0.05)
+        for clip in hot:
+            small.get(key(clip))
+        before = dir_bytes(tmp)
+        small.disk_bytes = before // 4
+        small._evict()
+        after  = dir_bytes(tmp)
+        kept   = sum(small.get(key(clip)) is not None for clip in hot)
+        print(f"  disk limit {before // 4 / 1024:.0f} KB: {before / 1024:.0f} KB → {after / 1024:.0f} KB, "
+              f"{small.counters['disk_evictions']} files evicted, {kept}/{len(hot)} most requested clips kept")
+        return {"baseline": base, "cached": lat, "stats": stats, "second_worker": s2,
+                "disk_before": before, "disk_after": after, "recent_kept": kept}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serving pipeline benchmarks")
+    sub    = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("load", help="/translate throughput vs concurrency")
+    p.add_argument("--latency-ms", type=float, default=50)
+    p.add_argument("--requests",   type=int,   default=200)
+
+    p = sub.add_parser("pool", help="pooled keep-alive client vs new connection per call")
+    p.add_argument("--handshake-ms", type=float, default=30)
+    p.add_argument("--requests",     type=int,   default=200)
+
+    p = sub.add_parser("fuzzy", help="linear fuzzy scan vs PhraseIndex at 100 / 10k / 100k phrases")
+    p.add_argument("--queries", type=int, default=500)
+
+    sub.add_parser("store", help="mmap'd phrase store vs in-memory reverse dict")
+
+    p = sub.add_parser("hedge", help="p50/p99 with and without hedged provider requests")
+    p.add_argument("--requests", type=int,   default=2000)
+    p.add_argument("--tail",     type=float, default=0.03)
+
+    p = sub.add_parser("batch", help="N single /translate calls vs one /translate/batch")
+    p.add_argument("--items",      type=int,   default=500)
+    p.add_argument("--latency-ms", type=float, default=20)
+
+    p = sub.add_parser("fanout", help="all target languages: sequential /translate vs streamed fan-out")
+    p.add_argument("--utterances", type=int,   default=20)
+    p.add_argument("--latency-ms", type=float, default=40)
+
+    p = sub.add_parser("segment", help="long paragraph: one provider request vs parallel sentence segments")
+    p.add_argument("--chars", type=int, default=2000)
+
+    sub.add_parser("langid", help="offline langid vs langdetect: accuracy and µs/call")
+
+    sub.add_parser("auto", help="src_lang=auto: local detection pass vs provider-side detection")
+
+    p = sub.add_parser("marian", help="MarianMT engine throughput at batch sizes 1–32 (tiny random model)")
+    p.add_argument("--sentences", type=int, default=128)
+
+    p = sub.add_parser("export", help="fp32 vs int8 / ONNX variants: load time, RSS, latency, BLEU")
+    p.add_argument("--sentences", type=int, default=50)
+
+    p = sub.add_parser("whisper-pcm", help="Whisper input: temp WAV file vs in-memory PCM (stub model)")
+    p.add_argument("--utterances", type=int, default=200)
+
+    sub.add_parser("vad", help="VAD on synthetic PCM + /ws/audio streaming vs whole-clip upload")
+
+    p = sub.add_parser("whisper-batch", help="concurrent Whisper utterances: max batch 1 vs 4 / 8 / 16 (stub model)")
+    p.add_argument("--utterances", type=int, default=64)
+
+    p = sub.add_parser("stt-pool", help="STT worker processes: scaling, shared-memory handoff, crash restart")
+    p.add_argument("--utterances", type=int, default=64)
+
+    sub.add_parser("ready", help="first /translate-audio requests: lazy model load vs lifespan preload + warm-up")
+
+    p = sub.add_parser("frontend", help="audio front-end on multi-minute 44.1 kHz stereo clips: stage cost, trimmed silence")
+    p.add_argument("--minutes", type=float, nargs="+", default=[1, 3, 5])
+
+    p = sub.add_parser("formats", help="/translate-audio with PCM / WAV / Opus uploads: bytes on the wire, latency")
+    p.add_argument("--uplink-mbps", type=float, default=2.0)
+
+    p = sub.add_parser("upload", help="/translate-audio body: base64 JSON vs raw vs multipart — peak RSS, parse time")
+    p.add_argument("--seconds", type=float, default=60)
+    p.add_argument("--rate",    type=int,   default=48000)
+    p.add_argument("--measure", default=None, help=argparse.SUPPRESS)
+
+    p = sub.add_parser("tts-cache", help="Zipf phrase workload through synthesize(): TTS cache hit ratio, latency, eviction")
+    p.add_argument("--requests", type=int,   default=600)
+    p.add_argument("--tts-ms",   type=float, default=30)
+
+    args = parser.parse_args()
+    if args.bench == "load":
+        bench_load(args.latency_ms, args.requests)
+    elif args.bench == "pool":
+        bench_pool(args.handshake_ms, args.requests)
+    elif args.bench == "fuzzy":
+        bench_fuzzy(args.queries)
+    elif args.bench == "store":
+        bench_store()
+    elif args.bench == "hedge":
+        bench_hedge(args.requests, tail=args.tail)
+    elif args.bench == "batch":
+        bench_batch(args.items, latency_ms=args.latency_ms)
+    elif args.bench == "fanout":
+        bench_fanout(args.utterances, args.latency_ms)
+    elif args.bench == "segment":
+        bench_segment(args.chars)
+    elif args.bench == "langid":
+        bench_langid()
+    elif args.bench == "auto":
+        bench_auto()
+    elif args.bench == "marian":
+        bench_marian(args.sentences)
+    elif args.bench == "export":
+        bench_export(args.sentences)
+    elif args.bench == "whisper-pcm":
+        bench_whisper_pcm(args.utterances)
+    elif args.bench == "vad":
+        bench_vad()
+    elif args.bench == "whisper-batch":
+        bench_whisper_batch(args.utterances)
+    elif args.bench == "stt-pool":
+        bench_stt_pool(args.utterances)
+    elif args.bench == "ready":
+        bench_ready()
+    elif args.bench == "frontend":
+        bench_frontend(tuple(args.minutes))
+    elif args.bench == "formats":
+        bench_formats(args.uplink_mbps)
+    elif args.bench == "upload" and args.measure:
+        print(json.dumps(_measure_upload(args.measure, args.seconds, args.rate)))
+    elif args.bench == "upload":
+        bench_upload(args.seconds, args.rate)
+    elif args.bench == "tts-cache":
+        bench_tts_cache(args.requests, args.tts_ms)
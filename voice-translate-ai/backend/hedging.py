@@ -0,0 +1,200 @@
+"""
+=============================================================
+  HEDGED REQUESTS — Real-Time Voice Translator
+  Cuts tail latency on provider calls: if the first attempt
+  has not answered within a percentile of recent latencies,
+  a second identical request is sent and whichever answers
+  first wins.
+=============================================================
+
+A shared budget keeps the extra load bounded: every primary request
+earns `budget` hedge tokens (0.05 → at most ~5% extra requests), each
+hedge spends one, and the bucket is capped so an idle period cannot
+bank a burst.
+
+Settings (environment):
+  HEDGING_ENABLED        1 to hedge provider calls          (default 0)
+  HEDGE_PERCENTILE       latency percentile for the delay   (default 95)
+  HEDGE_BUDGET           extra-request ratio                (default 0.05)
+  HEDGE_MIN_DELAY_MS     never hedge sooner than this       (default 10)
+"""
+
+import os, time, asyncio, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+HEDGING_ENABLED = os.environ.get("HEDGING_ENABLED", "0").lower() in ("1", "true", "yes")
+PERCENTILE      = float(os.environ.get("HEDGE_PERCENTILE", 95))
+BUDGET          = float(os.environ.get("HEDGE_BUDGET", 0.05))
+MIN_DELAY_MS    = float(os.environ.get("HEDGE_MIN_DELAY_MS", 10))
+
+
+class HedgePolicy:
+    """
+    Latency window + hedge budget for one provider.
+
+    No hedging happens until `min_samples` latencies have been seen, so the
+    delay always reflects the provider's real distribution.  Every attempt
+    is recorded, including failures and hedged-away losers.
+    """
+
+    def __init__(self, name: str, enabled: bool = HEDGING_ENABLED, percentile: float = PERCENTILE,
+                 budget: float = BUDGET, min_delay_ms: float = MIN_DELAY_MS,
+                 window: int = 512, min_samples: int = 50, max_tokens: float = 5.0):
+        self.name         = name
+        self.enabled      = enabled
+        self.percentile   = percentile
+        self.budget       = budget
+        self.min_delay    = min_delay_ms / 1000
+        self.min_samples  = min_samples
+        self.max_tokens   = max_tokens
+        self._samples     = deque(maxlen=window)
+        self._sorted      = None
+        self._tokens      = 0.0
+        self._lock        = threading.Lock()
+        self.counters     = {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0}
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self._sorted = None
+
+    def delay(self):
+        """Seconds to wait before hedging, or None while there is too little data."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            if self._sorted is None:
+                self._sorted = sorted(self._samples)
+            idx = min(len(self._sorted) - 1, int(len(self._sorted) * self.percentile / 100))
+            return max(self.min_delay, self._sorted[idx])
+
+    def start_request(self):
+        with self._lock:
+            self.counters["requests"] += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.budget)
+
+    def acquire_hedge(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.counters["hedged"] += 1
+                return True
+            self.counters["budget_denied"] += 1
+            return False
+
+    def hedge_won(self):
+        with self._lock:
+            self.counters["hedge_wins"] += 1
+
+    def stats(self) -> dict:
+        delay = self.delay()
+        with self._lock:
+            c = dict(self.counters)
+        c["enabled"]     = self.enabled
+        c["delay_ms"]    = round(delay * 1000, 2) if delay is not None else None
+        c["extra_load"]  = round(c["hedged"] / c["requests"], 4) if c["requests"] else 0.0
+        return c
+
+
+# ── Async hedging (httpx provider calls) ─────────────────────────────────────
+async def hedged_async(policy: HedgePolicy, coro_fn, *args, **kwargs):
+    """Await coro_fn(*args); hedge with a second attempt if it is slow."""
+    if not policy.enabled:
+        return await coro_fn(*args, **kwargs)
+    policy.start_request()
+    delay = policy.delay()
+
+    async def attempt():
+        # Every attempt counts — failed, or cancelled as the slow loser (its time
+        # so far is a lower bound) — or the window would only see the winners
+        t = time.perf_counter()
+        try:
+            return await coro_fn(*args, **kwargs)
+        finally:
+            policy.record(time.perf_counter() - t)
+
+    primary, hedge = asyncio.ensure_future(attempt()), None
+    try:
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not policy.acquire_hedge():
+            return await primary
+
+        hedge   = asyncio.ensure_future(attempt())
+        pending = {primary, hedge}
+        error   = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        policy.hedge_won()
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        # The loser, or every attempt if the caller itself was cancelled
+        for task in (primary, hedge):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+# ── Sync hedging (deep-translator / gTTS run in threads) ─────────────────────
+_hedge_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("HEDGE_WORKERS", 32)),
+                                 thread_name_prefix="hedge")
+
+
+def hedged(policy: HedgePolicy, fn, *args, **kwargs):
+    """Call fn(*args); hedge with a second attempt on a worker thread if it is slow."""
+    if not policy.enabled:
+        return fn(*args, **kwargs)
+    policy.start_request()
+    delay = policy.delay()
+
+    def attempt():
+        t = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            policy.record(time.perf_counter() - t)
+
+    if delay is None:
+        return attempt()
+    primary = _hedge_pool.submit(attempt)
+    done, _ = wait([primary], timeout=delay)
+    if done or not policy.acquire_hedge():
+        return primary.result()
+
+    hedge   = _hedge_pool.submit(attempt)
+    pending = {primary, hedge}
+    error   = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None:
+                if fut is hedge:
+                    policy.hedge_won()
+                return fut.result()    # the loser finishes in the background and is discarded
+            error = error or fut.exception()
+    raise error
+
+
+# ── Registry ─────────────────────────────────────────────────────────────────
+_policies: dict[str, HedgePolicy] = {}
+_registry_lock = threading.Lock()
+
+
+def get_policy(name: str) -> HedgePolicy:
+    with _registry_lock:
+        policy = _policies.get(name)
+        if policy is None:
+            policy = _policies[name] = HedgePolicy(name)
+        return policy
+
+
+def stats() -> dict:
+    with _registry_lock:
+        policies = dict(_policies)
+    return {name: p.stats() for name, p in sorted(policies.items())}
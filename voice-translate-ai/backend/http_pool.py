@@ -0,0 +1,148 @@
+"""
+=============================================================
+  HTTP CONNECTION POOL — Real-Time Voice Translator
+  Shared keep-alive httpx clients for provider calls, so a
+  translation reuses an open TCP/TLS connection instead of
+  paying the handshake on every request.
+=============================================================
+
+Settings (environment):
+  GOOGLE_TRANSLATE_URL   endpoint (point at a local stub for benchmarks)
+  HTTP_MAX_CONNECTIONS   per-host connection limit         (default 32)
+  HTTP_MAX_KEEPALIVE     idle keep-alive connections kept  (default 16)
+  HTTP_TIMEOUT           total request timeout, seconds    (default 8)
+  HTTP_CONNECT_TIMEOUT   connect timeout, seconds          (default 3)
+"""
+
+import os, asyncio, threading
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+GOOGLE_TRANSLATE_URL = os.environ.get(
+    "GOOGLE_TRANSLATE_URL", "https://translate.googleapis.com/translate_a/single"
+)
+MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 32))
+MAX_KEEPALIVE   = int(os.environ.get("HTTP_MAX_KEEPALIVE", 16))
+TIMEOUT         = float(os.environ.get("HTTP_TIMEOUT", 8))
+CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3))
+
+
+class ProviderError(Exception):
+    """Raised when a provider answers with an error or an unparseable body."""
+
+
+# ── Client registry (one pooled client per host, per event loop) ─────────────
+# Clients are bound to the loop that created them (a new asyncio.run() or
+# TestClient gets a loop of its own), so each loop has its own set plus a
+# parked "closer" task.  When the loop shuts down, asyncio.run() cancels
+# leftover tasks and the closer's finally block closes that loop's clients
+# while the loop can still run their socket teardown.
+_clients: dict[asyncio.AbstractEventLoop, dict[str, "httpx.AsyncClient"]] = {}
+_closers: dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+_registry_lock = threading.Lock()
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_client(url: str) -> "httpx.AsyncClient":
+    """Return the shared AsyncClient for the host of `url`, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    key  = _host_key(url)
+    with _registry_lock:
+        clients = _clients.get(loop)
+        if clients is None:
+            for stale in [l for l in _clients if l.is_closed()]:
+                _clients.pop(stale)        # closed without cancelling its closer: nothing can run aclose() now
+                _closers.pop(stale, None)
+            clients = _clients[loop] = {}
+            _closers[loop] = loop.create_task(_close_with_loop(loop), name="http-pool-closer")
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = httpx.AsyncClient(
+                limits  = httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                       max_keepalive_connections=MAX_KEEPALIVE),
+                timeout = httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT),
+            )
+    return client
+
+
+async def _close_with_loop(loop):
+    try:
+        await loop.create_future()                   # parked until cancelled at loop shutdown
+    finally:
+        await _close_loop(loop)
+
+
+async def _close_loop(loop):
+    with _registry_lock:
+        clients = _clients.pop(loop, {})
+        _closers.pop(loop, None)
+    for client in clients.values():
+        await client.aclose()
+
+
+async def aclose():
+    """Close the running loop's pooled clients (called from the app lifespan on shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _registry_lock:
+        closer = _closers.get(loop)
+    await _close_loop(loop)
+    if closer is not None:
+        closer.cancel()
+
+
+def pool_stats() -> dict:
+    return {
+        "hosts":           sorted({host for clients in list(_clients.values()) for host in clients}),
+        "max_connections": MAX_CONNECTIONS,
+        "max_keepalive":   MAX_KEEPALIVE,
+        "timeout_s":       TIMEOUT,
+    }
+
+
+# ── Google Translate (gtx endpoint) ──────────────────────────────────────────
+def parse_google_response(data) -> tuple[str, str | None]:
+    """
+    Parse the gtx JSON body:
+      [[["translated", "original", ...], ...], null, "detected_src", ...]
+    Returns (translated_text, detected_source_code).
+    """
+    try:
+        segments = data[0] or []
+        text     = "".join(seg[0] for seg in segments if seg and seg[0])
+        detected = data[2] if len(data) > 2 and isinstance(data[2], str) else None
+    except (TypeError, IndexError, KeyError) as e:
+        raise ProviderError(f"Unexpected Google response: {e}")
+    if not text:
+        raise ProviderError("Empty translation")
+    return text, detected
+
+
+def probe_google(url: str | None = None):
+    """Blocking one-shot request used by the circuit-breaker prober (no pooling needed)."""
+    url    = url or GOOGLE_TRANSLATE_URL
+    params = {"client": "gtx", "sl": "en", "tl": "fr", "dt": "t", "q": "hello"}
+    resp   = httpx.get(url, params=params, timeout=httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT))
+    if resp.status_code != 200:
+        raise ProviderError(f"HTTP {resp.status_code}")
+    parse_google_response(resp.json())
+
+
+async def google_translate_async(text: str, src_code: str, tgt_code: str,
+                                 url: str | None = None) -> tuple[str, str | None]:
+    """Translate `text` over the pooled connection. Returns (translated, detected_src_code)."""
+    url    = url or GOOGLE_TRANSLATE_URL
+    client = get_client(url)
+    params = {"client": "gtx", "sl": src_code, "tl": tgt_code, "dt": "t", "q": text}
+    resp   = await client.get(url, params=params)
+    if resp.status_code != 200:
+        raise ProviderError(f"HTTP {resp.status_code}")
+    return parse_google_response(resp.json())
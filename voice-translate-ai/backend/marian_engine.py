@@ -0,0 +1,136 @@
+"""
+=============================================================
+  MARIANMT ENGINE — Real-Time Voice Translator
+  Local neural MT from the checkpoints training.py saves in
+  models/finetuned/<language>.  Each model is loaded once and
+  served through a MicroBatcher, so concurrent requests share
+  one generate() call on the CPU.
+=============================================================
+
+The fine-tuned models are English → <language> (opus-mt-en-*), so the
+engine only serves english sources.
+
+Each checkpoint can be served as fp32 or as one of the variants
+model_export.py writes next to it (int8, onnx, onnx-int8).  With the
+default MARIAN_VARIANT=auto the engine takes the fastest exported variant
+whose BLEU in export_report.json is within MARIAN_MAX_BLEU_DROP of fp32,
+and plain fp32 when nothing has been exported.
+
+Settings (environment):
+  MARIAN_MODEL_DIR       root of the per-language checkpoints
+                         (default models/finetuned)
+  MARIAN_THREADS         torch intra-op threads              (default 2)
+  MARIAN_MAX_BATCH       sentences per generate() call        (default 16)
+  MARIAN_MAX_WAIT_MS     wait for a batch to fill             (default 8)
+  MARIAN_NUM_BEAMS       beam width (1 = greedy)              (default 1)
+  MARIAN_MAX_LENGTH      max source / generated tokens        (default 128)
+  MARIAN_VARIANT         fp32 | int8 | onnx | onnx-int8 | auto (default auto)
+  MARIAN_MAX_BLEU_DROP   BLEU an auto-picked variant may lose (default 1.0)
+"""
+
+import os, time, threading
+
+try:
+    import torch
+    import model_export
+    MARIAN_AVAILABLE = True
+except ImportError:
+    MARIAN_AVAILABLE = False
+
+from batching import MicroBatcher
+
+MODEL_DIR     = os.environ.get("MARIAN_MODEL_DIR",
+                               os.path.join(os.path.dirname(__file__), "..", "models", "finetuned"))
+THREADS       = int(os.environ.get("MARIAN_THREADS", 2))
+MAX_BATCH     = int(os.environ.get("MARIAN_MAX_BATCH", 16))
+MAX_WAIT_MS   = float(os.environ.get("MARIAN_MAX_WAIT_MS", 8))
+NUM_BEAMS     = int(os.environ.get("MARIAN_NUM_BEAMS", 1))
+MAX_LENGTH    = int(os.environ.get("MARIAN_MAX_LENGTH", 128))
+VARIANT       = os.environ.get("MARIAN_VARIANT", "auto").lower().strip()
+MAX_BLEU_DROP = float(os.environ.get("MARIAN_MAX_BLEU_DROP", 1.0))
+
+
+class MarianTranslator:
+    """One loaded checkpoint plus the batcher that feeds it."""
+
+    def __init__(self, path: str, max_batch: int | None = None, max_wait_ms: float | None = None,
+                 num_beams: int | None = None, max_length: int | None = None,
+                 variant: str | None = None):
+        t0 = time.perf_counter()
+        variant = variant or VARIANT
+        if variant == "auto":
+            variant = model_export.best_variant(path, MAX_BLEU_DROP)
+        self.path       = path
+        self.variant    = variant
+        self.num_beams  = num_beams or NUM_BEAMS
+        self.max_length = max_length or MAX_LENGTH
+        self.model, self.tokenizer = model_export.load(path, variant, THREADS)
+        self.load_ms    = round((time.perf_counter() - t0) * 1000, 1)
+        self.batcher    = MicroBatcher(self.translate_batch, max_batch or MAX_BATCH,
+                                       MAX_WAIT_MS if max_wait_ms is None else max_wait_ms,
+                                       name=f"marian-{os.path.basename(os.path.normpath(path))}")
+
+    def translate_batch(self, texts: list[str]) -> list[str]:
+        enc = self.tokenizer(texts, return_tensors="pt", padding=True,
+                             truncation=True, max_length=self.max_length)
+        with torch.inference_mode():
+            out = self.model.generate(**enc, num_beams=self.num_beams, max_new_tokens=self.max_length)
+        return self.tokenizer.batch_decode(out, skip_special_tokens=True)
+
+    def translate(self, text: str) -> str:
+        return self.batcher.call(text)
+
+    async def translate_async(self, text: str) -> str:
+        return await self.batcher.submit_async(text)
+
+    def stats(self) -> dict:
+        return {"path": os.path.abspath(self.path), "variant": self.variant, "load_ms": self.load_ms,
+                **self.batcher.stats()}
+
+
+# ── Registry: one model per target language, loaded on first use ────────────
+_models: dict[str, MarianTranslator] = {}
+_lock = threading.Lock()
+_threads_set = False
+
+
+def model_path(language: str) -> str:
+    return os.path.join(MODEL_DIR, language)
+
+
+def available_languages() -> list[str]:
+    """Target languages with a saved checkpoint under MODEL_DIR."""
+    if not MARIAN_AVAILABLE or not os.path.isdir(MODEL_DIR):
+        return []
+    return sorted(d for d in os.listdir(MODEL_DIR)
+                  if os.path.exists(os.path.join(MODEL_DIR, d, "config.json")))
+
+
+def is_loaded(language: str) -> bool:
+    return language in _models
+
+
+def get_translator(language: str) -> MarianTranslator:
+    global _threads_set
+    model = _models.get(language)
+    if model is None:
+        with _lock:
+            model = _models.get(language)
+            if model is None:
+                if not _threads_set:
+                    torch.set_num_threads(THREADS)
+                    _threads_set = True
+                print(f"[~] Loading MarianMT model for {language}...")
+                model = _models[language] = MarianTranslator(model_path(language))
+                print(f"[✓] MarianMT {language} ready ({model.variant}, {model.load_ms} ms).")
+    return model
+
+
+def stats() -> dict:
+    return {
+        "available": MARIAN_AVAILABLE,
+        "threads":   THREADS,
+        "variant":   VARIANT,
+        "languages": available_languages(),
+        "loaded":    {lang: m.stats() for lang, m in sorted(_models.items())},
+    }
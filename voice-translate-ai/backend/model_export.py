@@ -0,0 +1,330 @@
+"""
+=============================================================
+  MODEL EXPORT — Real-Time Voice Translator
+  Deployment variants of the fine-tuned MarianMT checkpoints
+  (int8 PyTorch, ONNX, int8 ONNX), a loader marian_engine
+  uses to serve them, and a report comparing each variant
+  against the fp32 checkpoint.
+=============================================================
+
+Variants, written next to the checkpoint in models/finetuned/<language>/:
+
+  fp32        the save_pretrained() checkpoint itself
+  int8        torch dynamic quantization of every nn.Linear (qint8
+              weights, fp32 activations) → int8/model.pt + config.json
+  onnx        optimum export (encoder / decoder / decoder-with-past graphs)
+              run by onnxruntime → onnx/
+  onnx-int8   the onnx graphs with onnxruntime dynamic int8 weight
+              quantization → onnx-int8/
+
+All variants reuse the checkpoint's tokenizer.  report() measures every
+variant in its own subprocess (so load time and resident memory are not
+skewed by models loaded earlier): load ms, RSS added by the load, mean
+ms/sentence at batch size 1 and corpus BLEU (evaluate.corpus_bleu) on the
+validation split training.py held out for that language (same seed and
+ratio, so none of the sentences were trained on).  The report is saved as
+export_report.json in the checkpoint directory; marian_engine reads it when
+MARIAN_VARIANT=auto to pick the fastest variant within the BLEU budget.
+
+Usage:
+  python model_export.py --language french [--variants int8 onnx onnx-int8] [--sentences 100]
+
+Settings (environment):
+  EXPORT_VARIANTS   variants training.py exports   (default int8,onnx,onnx-int8; empty: none)
+"""
+
+import os, sys, json, time, shutil, subprocess
+sys.path.insert(0, os.path.dirname(__file__))
+
+try:
+    import torch
+    from transformers import MarianConfig, MarianMTModel, MarianTokenizer
+    from transformers.modeling_utils import no_init_weights
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+try:
+    import onnxruntime
+    from onnxruntime.quantization import quantize_dynamic as ort_quantize_dynamic, QuantType
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+from evaluate import corpus_bleu, tokenize
+
+VARIANTS         = ["fp32", "int8", "onnx", "onnx-int8"]
+DEFAULT_EXPORTS  = [v.strip() for v in os.environ.get("EXPORT_VARIANTS", "int8,onnx,onnx-int8").split(",") if v.strip()]
+REPORT_FILE      = "export_report.json"
+INT8_WEIGHTS     = "model.pt"
+DATASET_PATH     = os.path.join(os.path.dirname(__file__), "..", "dataset", "translations.jsonl")
+_ONNX_META_FILES = ("config.json", "generation_config.json")
+
+
+def variant_path(path: str, variant: str) -> str:
+    return path if variant == "fp32" else os.path.join(path, variant)
+
+
+def exported_variants(path: str) -> list[str]:
+    """Variants present on disk for the checkpoint at `path` (fp32 always first)."""
+    found = ["fp32"] if os.path.exists(os.path.join(path, "config.json")) else []
+    if os.path.exists(os.path.join(path, "int8", INT8_WEIGHTS)):
+        found.append("int8")
+    for v in ("onnx", "onnx-int8"):
+        if os.path.exists(os.path.join(path, v, "encoder_model.onnx")):
+            found.append(v)
+    return found
+
+
+# ── Export ────────────────────────────────────────────────────────────────────
+def _quantize_torch(model):
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_int8(path: str) -> str:
+    out = variant_path(path, "int8")
+    os.makedirs(out, exist_ok=True)
+    model = _quantize_torch(MarianMTModel.from_pretrained(path).eval())
+    model.config.save_pretrained(out)
+    torch.save(model.state_dict(), os.path.join(out, INT8_WEIGHTS))
+    return out
+
+
+def export_onnx(path: str) -> str:
+    out = variant_path(path, "onnx")
+    ORTModelForSeq2SeqLM.from_pretrained(path, export=True).save_pretrained(out)
+    return out
+
+
+def export_onnx_int8(path: str) -> str:
+    src, out = variant_path(path, "onnx"), variant_path(path, "onnx-int8")
+    if not os.path.exists(os.path.join(src, "encoder_model.onnx")):
+        export_onnx(path)
+    os.makedirs(out, exist_ok=True)
+    for name in os.listdir(src):
+        if name.endswith(".onnx"):
+            ort_quantize_dynamic(os.path.join(src, name), os.path.join(out, name), weight_type=QuantType.QInt8)
+        elif name in _ONNX_META_FILES:
+            shutil.copy(os.path.join(src, name), out)
+    return out
+
+
+_EXPORTERS = {"int8": export_int8, "onnx": export_onnx, "onnx-int8": export_onnx_int8}
+
+
+def export(path: str, variants: list[str] | None = None) -> dict:
+    """Write the requested variants for the checkpoint at `path`; {variant: dir or error}."""
+    results = {}
+    for variant in variants or DEFAULT_EXPORTS:
+        if variant not in _EXPORTERS:
+            results[variant] = {"error": f"unknown variant (choose from {', '.join(_EXPORTERS)})"}
+            continue
+        needs = TORCH_AVAILABLE if variant == "int8" else ONNX_AVAILABLE
+        if not needs:
+            print(f"[!] Skipping {variant} export — {'torch' if variant == 'int8' else 'optimum/onnxruntime'} not installed.")
+            results[variant] = {"error": "dependencies not installed"}
+            continue
+        t0 = time.perf_counter()
+        try:
+            out = _EXPORTERS[variant](path)
+        except Exception as e:
+            print(f"[!] {variant} export failed: {e}")
+            results[variant] = {"error": str(e)}
+            continue
+        results[variant] = {"path": out, "export_s": round(time.perf_counter() - t0, 2),
+                            "disk_mb": round(_disk_bytes(out, variant) / 2**20, 2)}
+        print(f"[✓] {variant} → {out} ({results[variant]['disk_mb']} MB)")
+    return results
+
+
+def _disk_bytes(out: str, variant: str) -> int:
+    if variant == "fp32":
+        names = [n for n in os.listdir(out) if n.endswith((".safetensors", ".bin"))]
+    else:
+        names = [n for n in os.listdir(out) if n.endswith((".onnx", ".pt", ".onnx_data"))]
+    return sum(os.path.getsize(os.path.join(out, n)) for n in names)
+
+
+# ── Loader ────────────────────────────────────────────────────────────────────
+def load(path: str, variant: str = "fp32", threads: int | None = None):
+    """
+    (model, tokenizer) for one variant of the checkpoint at `path`.  Every
+    model answers model.generate(**tokenizer(..., return_tensors="pt")).
+    """
+    tokenizer = MarianTokenizer.from_pretrained(path)
+    if variant == "fp32":
+        return MarianMTModel.from_pretrained(path).eval(), tokenizer
+    src = variant_path(path, variant)
+    if variant == "int8":
+        config = MarianConfig.from_pretrained(src)
+        with no_init_weights():
+            model = _quantize_torch(MarianMTModel(config).eval())
+        model.load_state_dict(torch.load(os.path.join(src, INT8_WEIGHTS), weights_only=False))
+        return model.eval(), tokenizer
+    if variant in ("onnx", "onnx-int8"):
+        if not ONNX_AVAILABLE:
+            raise RuntimeError(f"{variant} variant needs optimum[onnxruntime]")
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        return ORTModelForSeq2SeqLM.from_pretrained(src, session_options=options), tokenizer
+    raise ValueError(f"unknown variant {variant!r} (choose from {', '.join(VARIANTS)})")
+
+
+def read_report(path: str) -> dict | None:
+    try:
+        with open(os.path.join(path, REPORT_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def best_variant(path: str, max_bleu_drop: float = 1.0) -> str:
+    """
+    Fastest exported variant whose BLEU is within `max_bleu_drop` of fp32,
+    according to the saved report; fp32 if there is no report.
+    """
+    report = read_report(path)
+    if not report or "fp32" not in report.get("variants", {}):
+        return "fp32"
+    rows     = report["variants"]
+    floor    = rows["fp32"]["bleu"] - max_bleu_drop
+    on_disk  = set(exported_variants(path))
+    eligible = [v for v, r in rows.items() if v in on_disk and "error" not in r and r["bleu"] >= floor]
+    return min(eligible, key=lambda v: rows[v]["ms_per_sentence"], default="fp32")
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def heldout_set(language: str, n: int = 100) -> list[dict]:
+    """First `n` records of the validation split training.py held out for `language`."""
+    from training import CONFIG, filter_by_language, split_dataset
+    with open(DATASET_PATH, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    _, held_out = split_dataset(filter_by_language(records, language), CONFIG["train_ratio"])
+    return held_out[:n]
+
+
+def measure(path: str, variant: str, language: str, sentences: int = 100,
+            threads: int = 1, max_length: int = 128) -> dict:
+    """Load one variant and score it.  Meant to run in a fresh process (see report())."""
+    torch.set_num_threads(threads)
+    records = heldout_set(language, sentences)
+    rss0 = _rss_bytes()
+    t0   = time.perf_counter()
+    model, tokenizer = load(path, variant, threads)
+    load_ms = (time.perf_counter() - t0) * 1000
+    rss_mb  = (_rss_bytes() - rss0) / 2**20
+
+    def run(text):
+        enc = tokenizer([text], return_tensors="pt", truncation=True, max_length=max_length)
+        with torch.inference_mode():
+            out = model.generate(**enc, num_beams=1, max_new_tokens=max_length)
+        return tokenizer.batch_decode(out, skip_special_tokens=True)[0]
+
+    run("warm up")
+    hyps, t0 = [], time.perf_counter()
+    for rec in records:
+        hyps.append(run(rec["input"]))
+    ms = (time.perf_counter() - t0) * 1000 / max(len(records), 1)
+    bleu = corpus_bleu([tokenize(r["output"]) for r in records], [tokenize(h) for h in hyps])
+    return {
+        "load_ms":         round(load_ms, 1),
+        "rss_mb":          round(rss_mb, 1),
+        "ms_per_sentence": round(ms, 2),
+        "bleu":            bleu["BLEU"],
+        "disk_mb":         round(_disk_bytes(variant_path(path, variant), variant) / 2**20, 2),
+        "sentences":       len(records),
+        "eval_split":      "validation (held out from training)",
+    }
+
+
+def report(path: str, language: str, sentences: int = 100, threads: int = 1) -> dict:
+    """Measure every exported variant against fp32 and save export_report.json."""
+    rows = {}
+    for variant in exported_variants(path):
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", variant,
+                               "--path", path, "--language", language,
+                               "--sentences", str(sentences), "--threads", str(threads)],
+                              capture_output=True, text=True)
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            err = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+            print(f"[!] {variant}: {err}")
+            rows[variant] = {"error": err}
+            continue
+        rows[variant] = json.loads(lines[-1])
+
+    base = rows.get("fp32", {})
+    if "error" not in base and base:
+        for r in rows.values():
+            if "error" not in r:
+                r["speedup"]    = round(base["ms_per_sentence"] / max(r["ms_per_sentence"], 1e-9), 2)
+                r["bleu_delta"] = round(r["bleu"] - base["bleu"], 2)
+
+    result = {"language": language, "path": os.path.abspath(path), "threads": threads,
+              "timestamp": time.time(), "variants": rows}
+    with open(os.path.join(path, REPORT_FILE), "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print_report(result)
+    return result
+
+
+def print_report(result: dict):
+    print(f"\n{'='*78}")
+    print(f"  EXPORT REPORT — {result['language'].upper()}  ({result['threads']} thread(s))")
+    print(f"{'='*78}")
+    print(f"  {'variant':<10} {'disk MB':>8} {'load ms':>9} {'RSS MB':>8} {'ms/sent':>9} "
+          f"{'speed-up':>9} {'BLEU':>7} {'ΔBLEU':>7}")
+    print("  " + "─" * 74)
+    for variant, r in result["variants"].items():
+        if "error" in r:
+            print(f"  {variant:<10} error: {r['error']}")
+            continue
+        print(f"  {variant:<10} {r['disk_mb']:>8.2f} {r['load_ms']:>9.1f} {r['rss_mb']:>8.1f} "
+              f"{r['ms_per_sentence']:>9.2f} {r.get('speedup', 0):>8.2f}x {r['bleu']:>7.2f} "
+              f"{r.get('bleu_delta', 0):>+7.2f}")
+    scored = next((r for r in result["variants"].values() if "error" not in r), None)
+    if scored:
+        print(f"\n  BLEU on {scored['sentences']} sentences of training.py's held-out validation split")
+    print(f"\n  [✓] Report saved → {os.path.join(result['path'], REPORT_FILE)}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export and compare deployment variants of a fine-tuned model")
+    parser.add_argument("--language",  default="french",
+                        choices=["hindi", "german", "french", "spanish"])
+    parser.add_argument("--path",      default=None,
+                        help="checkpoint directory (default models/finetuned/<language>)")
+    parser.add_argument("--variants",  nargs="+", default=DEFAULT_EXPORTS, choices=list(_EXPORTERS))
+    parser.add_argument("--sentences", type=int, default=100, help="held-out sentences scored per variant")
+    parser.add_argument("--threads",   type=int, default=1)
+    parser.add_argument("--no-export", action="store_true", help="only re-measure existing variants")
+    parser.add_argument("--measure",   default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(os.path.dirname(__file__), "..", "models", "finetuned", args.language)
+    if args.measure:
+        import warnings
+        warnings.filterwarnings("ignore")
+        print(json.dumps(measure(path, args.measure, args.language, args.sentences, args.threads)))
+        sys.exit(0)
+    if not TORCH_AVAILABLE:
+        sys.exit("[!] torch + transformers are required.")
+    if not os.path.exists(os.path.join(path, "config.json")):
+        sys.exit(f"[!] No checkpoint at {path} — run training.py --real first.")
+    if not args.no_export:
+        export(path, args.variants)
+    report(path, args.language, args.sentences, args.threads)
@@ -0,0 +1,127 @@
+"""
+=============================================================
+  PHRASE INDEX — Real-Time Voice Translator
+  Substring index for the fuzzy phrase-dictionary lookup.
+  Returns exactly what the old linear scan over _REVERSE
+  returned, without touching every key on each miss.
+=============================================================
+
+The fuzzy match scores a key against the normalized input in two ways:
+
+  input in key   similarity = len(input) / len(key)
+  key in input   similarity = len(key)   / len(input)
+
+and keeps the best score ≥ threshold, earliest key winning ties.
+
+• "input in key" — a character-trigram inverted index.  Every key that
+  contains the input contains all of the input's trigrams, so only the
+  posting list of the rarest trigram needs verifying.  Inputs shorter
+  than a trigram use a by-length bucket instead.
+• "key in input" — a hit needs len(key) ≥ threshold · len(input), so only
+  the input's substrings whose length is both in that window and an
+  actual key length are hashed and looked up.
+
+Neither path depends on the number of phrases in the table.
+"""
+
+from array import array
+
+GRAM = 3
+
+
+class PhraseIndex:
+    def __init__(self, mapping: dict[str, str]):
+        """`mapping` is key → value in priority order (e.g. translator._REVERSE)."""
+        self._order:  dict[str, int] = {}
+        self._keys:   list[str] = []
+        self._values: list[str] = []
+        self._grams:  dict[str, array] = {}
+        self._by_len: dict[int, list[int]] = {}
+
+        for key, value in mapping.items():
+            if not key:
+                continue
+            idx = len(self._keys)
+            self._order[key] = idx
+            self._keys.append(key)
+            self._values.append(value)
+            self._by_len.setdefault(len(key), []).append(idx)
+            for gram in {key[i:i + GRAM] for i in range(len(key) - GRAM + 1)}:
+                posting = self._grams.get(gram)
+                if posting is None:
+                    posting = self._grams[gram] = array("I")
+                posting.append(idx)
+
+        self._lengths = sorted(self._by_len)
+
+    def __len__(self):
+        return len(self._keys)
+
+    # ── Candidate generation ─────────────────────────────────────────────────
+    def _containing(self, query: str, threshold: float):
+        """Ids of keys that may contain `query` (a superset, verified by the caller)."""
+        n = len(query)
+        if n < GRAM:
+            # Only keys short enough to still score ≥ threshold are worth checking
+            for length in self._lengths:
+                if length >= n and n / length >= threshold:
+                    yield from self._by_len[length]
+            return
+        postings = []
+        for i in range(len(query) - GRAM + 1):
+            posting = self._grams.get(query[i:i + GRAM])
+            if posting is None:
+                return
+            postings.append(posting)
+        yield from min(postings, key=len)
+
+    def best_match(self, query: str, threshold: float = 0.6):
+        """Value of the best fuzzy match for `query`, or None below `threshold`."""
+        if not query:
+            return None
+        n = len(query)
+        best_sim, best_idx = -1.0, None
+
+        # input in key
+        for idx in self._containing(query, threshold):
+            key = self._keys[idx]
+            if len(key) < n or query not in key:
+                continue
+            sim = n / len(key)
+            if sim < threshold:
+                continue
+            if sim > best_sim or (sim == best_sim and idx < best_idx):
+                best_sim, best_idx = sim, idx
+
+        # key in input
+        for length in self._lengths:
+            if length >= n:
+                break
+            sim = length / n
+            if sim < threshold or sim < best_sim:
+                continue
+            for start in range(n - length + 1):
+                idx = self._order.get(query[start:start + length])
+                if idx is None:
+                    continue
+                if sim > best_sim or (sim == best_sim and idx < best_idx):
+                    best_sim, best_idx = sim, idx
+
+        return self._values[best_idx] if best_idx is not None else None
+
+
+def linear_best_match(mapping: dict[str, str], query: str, threshold: float = 0.6):
+    """Reference implementation (the original O(n) scan), kept for benchmarks."""
+    matches = []
+    for key, value in mapping.items():
+        if not key:
+            continue
+        if query in key:
+            matches.append((len(query) / len(key), value))
+        elif key in query:
+            matches.append((len(key) / len(query), value))
+    if matches:
+        best = max(matches, key=lambda x: x[0])
+        if best[0] >= threshold:
+            return best[1]
+    return None
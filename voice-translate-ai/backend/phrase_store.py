@@ -0,0 +1,272 @@
+"""
+=============================================================
+  PHRASE STORE — Real-Time Voice Translator
+  Compiles PHRASE_TABLE + dataset/translations.jsonl into a
+  compact binary file that translator.py memory-maps, so every
+  uvicorn worker shares the same read-only pages and startup
+  does no parsing at all.
+=============================================================
+
+Build (also done automatically when the file is missing or stale):
+  python phrase_store.py
+
+File layout (little-endian, every section 4-byte aligned):
+
+  header    magic "VTPS", version, counts and section offsets
+  rows      n_rows × n_langs uint32   string id per language (NONE = missing)
+  origins   n_rows uint8              0 = PHRASE_TABLE, 1 = dataset corpus
+  offsets   (n_strings + 1) uint32    byte offsets into the string blob
+  slots     n_slots × (uint32 key string id, uint32 row)   open addressing
+  blob      UTF-8 string pool; every distinct string stored once
+
+String ids 0 … n_langs-1 are the language names (column order).  Keys are
+normalized text (translator._norm) of every phrase in every language, one
+slot per distinct key, hashed with crc32 and probed linearly.
+"""
+
+import os, sys, json, mmap, time, zlib, struct
+from array import array
+
+MAGIC   = b"VTPS"
+VERSION = 1
+NONE    = 0xFFFFFFFF
+HEADER  = struct.Struct("<4sHHIIIIIIII")   # magic ver n_langs n_rows n_strings n_slots + 5 offsets
+
+ORIGIN_TABLE  = 0
+ORIGIN_CORPUS = 1
+
+BACKEND_DIR  = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(BACKEND_DIR, "..", "models", "phrase_store.bin")
+DATASET_PATH = os.path.join(BACKEND_DIR, "..", "dataset", "translations.jsonl")
+
+
+def _align(n: int) -> int:
+    return (n + 3) & ~3
+
+
+# ── Build ─────────────────────────────────────────────────────────────────────
+def _corpus_rows(jsonl_path: str) -> list[dict]:
+    """Group dataset records by English input → {"english": ..., "<lang>": ...}."""
+    rows: dict[str, dict] = {}
+    if not os.path.exists(jsonl_path):
+        return []
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rec  = json.loads(line)
+            lang = rec.get("language_pair", "").split("→")[-1].strip().lower()
+            if not lang or not rec.get("input") or not rec.get("output"):
+                continue
+            row = rows.setdefault(rec["input"], {"english": rec["input"]})
+            row.setdefault(lang, rec["output"])
+    return list(rows.values())
+
+
+def build(phrase_table: dict, norm, path: str = DEFAULT_PATH,
+          jsonl_path: str = DATASET_PATH) -> dict:
+    """Compile the phrase table and dataset corpus into `path`. Returns stats()."""
+    langs  = sorted({lang for row in phrase_table.values() for lang in row})
+    corpus = _corpus_rows(jsonl_path)
+    for row in corpus:
+        langs.extend(l for l in row if l not in langs)
+
+    strings: dict[str, int] = {}
+    def intern(s: str) -> int:
+        sid = strings.get(s)
+        if sid is None:
+            sid = strings[s] = len(strings)
+        return sid
+
+    for lang in langs:
+        intern(lang)
+
+    rows    = array("I")
+    origins = bytearray()
+    keys: dict[int, int] = {}          # key string id → row
+
+    def add_row(row: dict, origin: int):
+        row_id = len(origins)
+        origins.append(origin)
+        for lang in langs:
+            text = row.get(lang)
+            rows.append(intern(text) if text else NONE)
+        for text in row.values():
+            key = norm(text)
+            if not key:
+                continue
+            kid = intern(key)
+            if origin == ORIGIN_TABLE or kid not in keys:
+                keys[kid] = row_id       # PHRASE_TABLE wins, later table rows override
+
+    for row in phrase_table.values():
+        add_row(row, ORIGIN_TABLE)
+    for row in corpus:
+        add_row(row, ORIGIN_CORPUS)
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = array("I", [0])
+    for b in encoded:
+        offsets.append(offsets[-1] + len(b))
+
+    n_slots = 1
+    while n_slots < len(keys) * 2:
+        n_slots <<= 1
+    slots = array("I", [NONE]) * (n_slots * 2)
+    for kid, row_id in keys.items():
+        i = zlib.crc32(encoded[kid]) & (n_slots - 1)
+        while slots[i * 2] != NONE:
+            i = (i + 1) & (n_slots - 1)
+        slots[i * 2], slots[i * 2 + 1] = kid, row_id
+
+    if sys.byteorder != "little":
+        for arr in (rows, offsets, slots):
+            arr.byteswap()
+
+    off_rows    = _align(HEADER.size)
+    off_origins = off_rows + len(rows) * 4
+    off_offsets = _align(off_origins + len(origins))
+    off_slots   = off_offsets + len(offsets) * 4
+    off_blob    = off_slots + len(slots) * 4
+
+    header = HEADER.pack(MAGIC, VERSION, len(langs), len(origins), len(encoded), n_slots,
+                         off_rows, off_origins, off_offsets, off_slots, off_blob)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(header.ljust(off_rows, b"\0"))
+        f.write(rows.tobytes())
+        f.write(bytes(origins).ljust(off_offsets - off_origins, b"\0"))
+        f.write(offsets.tobytes())
+        f.write(slots.tobytes())
+        f.write(b"".join(encoded))
+    os.replace(tmp, path)     # atomic: workers never map a half-written file
+    store = PhraseStore(path)
+    stats = store.stats()
+    store.close()
+    return stats
+
+
+# ── Memory-mapped reader ─────────────────────────────────────────────────────
+class PhraseStore:
+    def __init__(self, path: str = DEFAULT_PATH):
+        t0 = time.perf_counter()
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.n_langs, self.n_rows, self.n_strings, self.n_slots,
+         off_rows, off_origins, off_offsets, off_slots, self._off_blob) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version-{VERSION} phrase store")
+
+        view = memoryview(self._mm)
+        def u32(off: int, count: int):
+            part = view[off:off + count * 4]
+            if sys.byteorder == "little":
+                return part.cast("I")            # zero-copy view onto the mapped pages
+            arr = array("I", part)
+            arr.byteswap()
+            return arr
+
+        self._rows    = u32(off_rows, self.n_rows * self.n_langs)
+        self._origins = view[off_origins:off_origins + self.n_rows]
+        self._offsets = u32(off_offsets, self.n_strings + 1)
+        self._slots   = u32(off_slots, self.n_slots * 2)
+        self._blob    = view[self._off_blob:]
+        self.languages = [self._string(i) for i in range(self.n_langs)]
+        self._col      = {lang: i for i, lang in enumerate(self.languages)}
+        self.load_ms   = round((time.perf_counter() - t0) * 1000, 3)
+
+    def _string_bytes(self, sid: int):
+        return self._blob[self._offsets[sid]:self._offsets[sid + 1]]
+
+    def _string(self, sid: int) -> str:
+        return bytes(self._string_bytes(sid)).decode("utf-8")
+
+    def find_row(self, key: str):
+        """Row id for a normalized key, or None."""
+        data = key.encode("utf-8")
+        mask = self.n_slots - 1
+        i    = zlib.crc32(data) & mask
+        while True:
+            kid = self._slots[i * 2]
+            if kid == NONE:
+                return None
+            if self._string_bytes(kid) == data:
+                return self._slots[i * 2 + 1]
+            i = (i + 1) & mask
+
+    def row(self, row_id: int) -> dict:
+        base = row_id * self.n_langs
+        return {lang: self._string(self._rows[base + c])
+                for c, lang in enumerate(self.languages)
+                if self._rows[base + c] != NONE}
+
+    def get(self, key: str, lang: str):
+        """(translation, origin) of the phrase whose normalized text is `key`, or None."""
+        col = self._col.get(lang)
+        if col is None:
+            return None
+        row_id = self.find_row(key)
+        if row_id is None:
+            return None
+        sid = self._rows[row_id * self.n_langs + col]
+        if sid == NONE:
+            return None
+        return self._string(sid), self._origins[row_id]
+
+    def lookup(self, key: str):
+        """(row, origin) of the phrase whose normalized text is `key` — every language at once — or None."""
+        row_id = self.find_row(key)
+        if row_id is None:
+            return None
+        return self.row(row_id), self._origins[row_id]
+
+    def stats(self) -> dict:
+        return {
+            "path":       os.path.abspath(self.path),
+            "file_bytes": len(self._mm),
+            "blob_bytes": len(self._mm) - self._off_blob,
+            "languages":  self.n_langs,
+            "phrases":    self.n_rows,
+            "strings":    self.n_strings,
+            "keys":       sum(1 for i in range(0, self.n_slots * 2, 2) if self._slots[i] != NONE),
+            "slots":      self.n_slots,
+            "load_ms":    self.load_ms,
+        }
+
+    def close(self):
+        for name in ("_rows", "_origins", "_offsets", "_slots", "_blob"):
+            obj = getattr(self, name, None)
+            if isinstance(obj, memoryview):
+                obj.release()
+        self._mm.close()
+
+
+def is_stale(path: str = DEFAULT_PATH, sources: tuple = ()) -> bool:
+    if not os.path.exists(path):
+        return True
+    built = os.path.getmtime(path)
+    return any(os.path.exists(src) and os.path.getmtime(src) > built
+               for src in (DATASET_PATH, *sources))
+
+
+def load_or_build(phrase_table: dict, norm, path: str = DEFAULT_PATH, sources: tuple = ()):
+    """Map the store at `path`, rebuilding it first if missing or older than its sources."""
+    try:
+        if is_stale(path, sources):
+            stats = build(phrase_table, norm, path)
+            print(f"[✓] Phrase store built: {stats['phrases']} phrases, {stats['file_bytes']} bytes")
+        return PhraseStore(path)
+    except (OSError, ValueError) as e:
+        print(f"[!] Phrase store unavailable: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, BACKEND_DIR)
+    from translator import PHRASE_TABLE, _norm
+    stats = build(PHRASE_TABLE, _norm)
+    print(json.dumps(stats, indent=2))
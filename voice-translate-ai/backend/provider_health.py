@@ -0,0 +1,196 @@
+"""
+=============================================================
+  PROVIDER HEALTH — Real-Time Voice Translator
+  Circuit breakers for the external providers (Google
+  Translate, gTTS).  While a provider is down, calls fail
+  immediately and callers drop straight to their offline
+  fallbacks instead of waiting out a timeout per request.
+=============================================================
+
+States:
+  closed     normal operation; consecutive failures are counted
+  open       calls are rejected (BreakerOpen) without touching the
+             network; a background thread probes the provider
+  half-open  after `reset_timeout`, a limited number of real calls
+             are let through; one success closes, one failure re-opens.
+             A trial that is cancelled before it finishes hands its slot
+             back (release()), and the probe thread keeps running until
+             the breaker is closed again
+
+Settings (environment, shared by every breaker):
+  BREAKER_FAILURE_THRESHOLD   consecutive failures before opening  (default 3)
+  BREAKER_RESET_TIMEOUT       seconds open before half-open trials (default 30)
+  BREAKER_HALF_OPEN_CALLS     concurrent trial calls when half-open (default 1)
+  BREAKER_PROBE_INTERVAL      seconds between background probes    (default 10)
+"""
+
+import os, time, threading
+
+CLOSED    = "closed"
+OPEN      = "open"
+HALF_OPEN = "half-open"
+
+FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 3))
+RESET_TIMEOUT     = float(os.environ.get("BREAKER_RESET_TIMEOUT", 30))
+HALF_OPEN_CALLS   = int(os.environ.get("BREAKER_HALF_OPEN_CALLS", 1))
+PROBE_INTERVAL    = float(os.environ.get("BREAKER_PROBE_INTERVAL", 10))
+
+
+class BreakerOpen(Exception):
+    """Raised instead of calling a provider whose breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT, half_open_calls: int = HALF_OPEN_CALLS,
+                 probe=None, probe_interval: float = PROBE_INTERVAL):
+        self.name              = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout     = reset_timeout
+        self.half_open_calls   = half_open_calls
+        self.probe             = probe
+        self.probe_interval    = probe_interval
+
+        self._lock      = threading.Lock()
+        self.state      = CLOSED
+        self.failures   = 0            # consecutive
+        self.opened_at  = 0.0
+        self._trials    = 0            # in-flight half-open calls
+        self._prober    = None
+        self.counters   = {"successes": 0, "failures": 0, "rejected": 0,
+                           "opened": 0, "probes": 0, "probe_failures": 0}
+        self.last_error = None
+
+    # ── Gate ──────────────────────────────────────────────────────────────────
+    def allow(self) -> bool:
+        """True if a call may go to the provider now."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state, self._trials = HALF_OPEN, 0
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self.counters["rejected"] += 1
+            return False
+
+    def check(self):
+        """Raise BreakerOpen unless a call may go through."""
+        if not self.allow():
+            raise BreakerOpen(f"{self.name} circuit is {self.state}")
+
+    def record_success(self):
+        with self._lock:
+            self.counters["successes"] += 1
+            self.failures = 0
+            self.state    = CLOSED
+            self._trials  = 0
+
+    def release(self):
+        """A call let through by allow() ended without an outcome (cancelled)."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def record_failure(self, error: Exception | str | None = None):
+        with self._lock:
+            self.counters["failures"] += 1
+            self.failures  += 1
+            self.last_error = str(error) if error else None
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        # caller holds self._lock
+        if self.state != OPEN:
+            self.counters["opened"] += 1
+            print(f"[!] Circuit '{self.name}' opened after {self.failures} failure(s): {self.last_error}")
+        self.state, self.opened_at, self._trials = OPEN, time.monotonic(), 0
+        if self.probe and (self._prober is None or not self._prober.is_alive()):
+            self._prober = threading.Thread(target=self._probe_loop, daemon=True,
+                                            name=f"{self.name}-probe")
+            self._prober.start()
+
+    # ── Background probing until closed ──────────────────────────────────────
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.probe_interval)
+            with self._lock:
+                if self.state == CLOSED:
+                    return
+                self.counters["probes"] += 1
+            try:
+                self.probe()
+            except Exception as e:
+                with self._lock:
+                    self.counters["probe_failures"] += 1
+                    self.last_error = str(e)
+                continue
+            print(f"[✓] Circuit '{self.name}' closed — probe succeeded")
+            self.record_success()
+            return
+
+    # ── Wrappers ──────────────────────────────────────────────────────────────
+    def call(self, fn, *args, **kwargs):
+        self.check()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    async def call_async(self, coro_fn, *args, **kwargs):
+        self.check()
+        try:
+            result = await coro_fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        except BaseException:                 # CancelledError: no verdict on the provider
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snap = {
+                "state":                self.state,
+                "consecutive_failures": self.failures,
+                "last_error":           self.last_error,
+                **self.counters,
+            }
+            if self.state == OPEN:
+                snap["retry_in_s"] = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+            return snap
+
+
+# ── Registry shared by translator.py and text_to_speech.py ──────────────────
+_breakers: dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str, probe=None) -> CircuitBreaker:
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, probe=probe)
+        elif probe and breaker.probe is None:
+            breaker.probe = probe
+        return breaker
+
+
+def snapshot() -> dict:
+    with _registry_lock:
+        breakers = dict(_breakers)
+    return {name: b.snapshot() for name, b in sorted(breakers.items())}
+
+
+def any_open() -> bool:
+    return any(s["state"] != CLOSED for s in snapshot().values())
@@ -0,0 +1,136 @@
+"""
+=============================================================
+  SENTENCE SEGMENTER — Real-Time Voice Translator
+  Script-aware sentence splitting, so long inputs can be
+  translated segment by segment (in parallel, each with its
+  own cache entry) instead of as one oversized request.
+=============================================================
+
+Boundaries:
+  Devanagari   । and ॥ end a sentence, with or without a following space
+  Latin        . ! ? … (plus closing quotes/brackets) followed by whitespace;
+               abbreviations (Dr., e.g.), initials (J. R.) and a lower-case
+               continuation ("approx. ten") do not end a sentence
+  Dravidian    Telugu, Tamil and Malayalam use Latin punctuation; a stop
+               directly followed by an Indic letter also counts
+  any script   a line break
+
+Sentences longer than `max_chars` are cut at the last clause break
+(, ; : —) or space that fits, so no segment exceeds the provider limit.
+
+split() returns (segment, separator) pairs; joining segment + separator
+over all pairs gives the input back exactly, so translated segments can be
+reassembled with the original spacing and line breaks.
+
+Settings (environment):
+  SEGMENT_MAX_CHARS   hard cap on one segment   (default 500)
+"""
+
+import os, re
+
+MAX_CHARS = int(os.environ.get("SEGMENT_MAX_CHARS", 500))
+
+_CLOSERS = re.escape("\"'”’)]»")
+_INDIC   = "ऀ-ൿ"          # Devanagari … Malayalam
+
+_BOUNDARY = re.compile(
+    rf"(?P<danda>[।॥]+[{_CLOSERS}]*)(?P<danda_sep>\s*)"
+    rf"|(?P<stop>[.!?…]+[{_CLOSERS}]*)(?P<stop_sep>\s+|(?=[{_INDIC}]))"
+    rf"|(?P<newline>[ \t]*\n\s*)"
+)
+_LAST_WORD = re.compile(r"(\w+)$")
+
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "eg", "ie",
+    "no", "approx", "dept", "govt", "inc", "ltd", "co", "fig", "vol", "p", "pp",
+})
+
+
+def _is_abbreviation(text: str, start: int, end: int) -> bool:
+    """True if the stop at text[start:end] belongs to an abbreviation or initial."""
+    if text[start] != ".":
+        return False
+    word = _LAST_WORD.search(text, 0, start)
+    if word:
+        w = word.group(1)
+        if w.lower() in ABBREVIATIONS or (len(w) == 1 and w.isascii() and w.isupper()):
+            return True
+        # "e.g." / "i.e." — a dotted abbreviation
+        if start >= 2 and text[start - 2] == "." and len(w) == 1:
+            return True
+    nxt = text[end:end + 1]
+    return nxt.isascii() and nxt.islower()
+
+
+def _sentences(text: str) -> list[tuple[str, str]]:
+    pairs, pos = [], 0
+    for m in _BOUNDARY.finditer(text):
+        if m.group("stop") and _is_abbreviation(text, m.start(), m.end()):
+            continue
+        if m.group("newline") is not None:
+            seg_end = m.start()
+        else:
+            seg_end = m.end("danda") if m.group("danda") else m.end("stop")
+        if seg_end > pos:
+            pairs.append((text[pos:seg_end], text[seg_end:m.end()]))
+        elif pairs:
+            pairs[-1] = (pairs[-1][0], pairs[-1][1] + text[pos:m.end()])
+        pos = m.end()
+    if pos < len(text):
+        pairs.append((text[pos:], ""))
+    elif not pairs and text:
+        pairs.append((text, ""))
+    return pairs
+
+
+_CLAUSE = re.compile(r"[,;:—]\s+|\s+")
+
+
+def _cut(sentence: str, sep: str, max_chars: int) -> list[tuple[str, str]]:
+    """Split one over-long sentence at clause breaks, then spaces, then hard."""
+    pairs = []
+    while len(sentence) > max_chars:
+        cut = None
+        for m in _CLAUSE.finditer(sentence, 0, max_chars + 1):
+            if m.start() > 0:
+                cut = m
+        if cut is None:
+            pairs.append((sentence[:max_chars], ""))
+            sentence = sentence[max_chars:]
+            continue
+        # Keep the clause punctuation with the left part, the whitespace as separator
+        keep = cut.start() + (1 if not sentence[cut.start()].isspace() else 0)
+        ws_end = cut.end()
+        pairs.append((sentence[:keep], sentence[keep:ws_end]))
+        sentence = sentence[ws_end:]
+    pairs.append((sentence, sep))
+    return pairs
+
+
+def split(text: str, max_chars: int = MAX_CHARS) -> list[tuple[str, str]]:
+    """Split `text` into (segment, separator) pairs; see the module docstring."""
+    pairs = []
+    for sentence, sep in _sentences(text):
+        if len(sentence) > max_chars:
+            pairs.extend(_cut(sentence, sep, max_chars))
+        else:
+            pairs.append((sentence, sep))
+    return pairs
+
+
+def join(pairs: list[tuple[str, str]]) -> str:
+    return "".join(seg + sep for seg, sep in pairs)
+
+
+if __name__ == "__main__":
+    samples = [
+        "Dr. Rao arrived at 9.30 a.m. today. He spoke for an hour! Did everyone follow? Yes.",
+        "मैं घर जा रहा हूँ। तुम कहाँ हो? कल मिलते हैं।",
+        "నేను ఇంటికి వెళ్తున్నాను. మీరు ఎక్కడ ఉన్నారు?రేపు కలుద్దాం.",
+        "வணக்கம். நீங்கள் எப்படி இருக்கிறீர்கள்?\nநான் நலம்.",
+        "ഞാൻ വീട്ടിലേക്ക് പോകുന്നു. നിങ്ങൾ എവിടെയാണ്?",
+    ]
+    for text in samples:
+        pairs = split(text)
+        assert join(pairs) == text
+        print(f"[✓] {len(pairs)} segment(s): {[seg for seg, _ in pairs]}")
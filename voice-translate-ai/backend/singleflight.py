@@ -0,0 +1,43 @@
+"""
+=============================================================
+  SINGLE-FLIGHT — Real-Time Voice Translator
+  Coalesces identical in-flight requests: while one caller is
+  computing a result for a key, every other caller with the
+  same key awaits that result instead of starting its own.
+=============================================================
+
+Nothing is cached once the leader finishes — that is the translation /
+TTS caches' job.  Results are shared objects; treat them as read-only.
+"""
+
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: dict = {}
+        self.leaders   = 0
+        self.coalesced = 0
+
+    async def do(self, key, coro_fn, *args, **kwargs):
+        """Return coro_fn(*args)'s result, sharing it with concurrent callers of `key`."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # The work runs as its own task so a cancelled caller (e.g. a dropped
+            # WebSocket) never cancels it for everyone else waiting on the key.
+            task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+            self._inflight[key] = task
+            self.leaders += 1
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        total = self.leaders + self.coalesced
+        return {
+            "leaders":         self.leaders,
+            "coalesced":       self.coalesced,
+            "in_flight":       len(self._inflight),
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0,
+        }
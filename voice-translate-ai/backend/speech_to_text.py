@@ -4,9 +4,36 @@
   Uses SpeechRecognition with Google Web Speech API (free tier)
   as primary engine; whisper as optional offline engine.
 =============================================================
+
+Every engine gets its audio through the front-end in audio_frontend.py:
+16-bit PCM is viewed with np.frombuffer, downmixed, resampled (polyphase) to
+16 kHz, peak-normalized and trimmed of leading/trailing silence.  Whisper
+takes the float32 array directly — no temp WAV file and no ffmpeg decode per
+utterance; Google / Sphinx get it back as 16 kHz int16, so less audio is
+uploaded.  Results carry the front-end report under "frontend" (samples in /
+out, samples trimmed at each end); a clip that is silence throughout never
+reaches the engine.
+
+Concurrent Whisper utterances are batched: a MicroBatcher collects them for
+up to WHISPER_MAX_WAIT_MS, pads each to Whisper's 30 s window, stacks the
+log-mel spectrograms and runs one whisper.decode() over the whole batch
+(one encoder pass).  Utterances longer than 30 s still go through
+transcribe(), which slides the window.  transcribe_audio_bytes_async()
+submits straight from the event loop, so the batch size is not capped by
+the STT thread pool.
+
+Settings (environment):
+  STT_ENGINE            google | whisper | sphinx      (default google)
+  STT_PRELOAD           engines loaded + warmed at startup, comma-separated
+                        "engine[:model]"; "none" to skip (default STT_ENGINE)
+  WHISPER_MODEL         model size                     (default base)
+  WHISPER_MAX_BATCH     utterances per decode (1 = off) (default 8)
+  WHISPER_MAX_WAIT_MS   wait for a batch to fill       (default 10)
 """
 
-import os, time, tempfile
+import os, time, threading
+
+from batching import MicroBatcher
 
 # ── SpeechRecognition ─────────────────────────────────────────────────────────
 try:
@@ -15,13 +42,31 @@ try:
 except ImportError:
     SR_AVAILABLE = False
 
+try:
+    import numpy as np
+    import audio_frontend
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # ── Optional: OpenAI Whisper (local, fully offline) ──────────────────────────
 try:
+    import torch
     import whisper as whisper_lib
     WHISPER_AVAILABLE = True
 except ImportError:
     WHISPER_AVAILABLE = False
 
+STT_ENGINE          = os.environ.get("STT_ENGINE", "google").lower().strip()
+WHISPER_MODEL       = os.environ.get("WHISPER_MODEL", "base")
+WHISPER_MAX_BATCH   = int(os.environ.get("WHISPER_MAX_BATCH", 8))
+WHISPER_MAX_WAIT_MS = float(os.environ.get("WHISPER_MAX_WAIT_MS", 10))
+PRELOAD             = [spec.strip().lower() for spec in os.environ.get("STT_PRELOAD", STT_ENGINE).split(",")
+                       if spec.strip() and spec.strip().lower() != "none"]
+
+WHISPER_RATE    = 16000          # whisper.audio.SAMPLE_RATE
+WHISPER_SAMPLES = 30 * 16000     # whisper.audio.N_SAMPLES — one encoder window
+
 
 class SpeechToText:
     """
@@ -33,15 +78,20 @@ class SpeechToText:
       3. 'sphinx'  — PocketSphinx (local, lower accuracy)
     """
 
-    def __init__(self, engine: str = "google", whisper_model: str = "base"):
+    def __init__(self, engine: str = "google", whisper_model: str = WHISPER_MODEL):
         self.engine        = engine
         self.recognizer    = sr.Recognizer() if SR_AVAILABLE else None
         self.whisper_model = None
+        self.batcher       = None
+        self.load_ms       = None
+        self.warmup_ms     = None
 
         if engine == "whisper" and WHISPER_AVAILABLE:
             print(f"[~] Loading Whisper model '{whisper_model}'...")
             self.whisper_model = whisper_lib.load_model(whisper_model)
             print("[✓] Whisper ready.")
+            if WHISPER_MAX_BATCH > 1:
+                self.enable_batching(WHISPER_MAX_BATCH, WHISPER_MAX_WAIT_MS)
 
         # Adjust for ambient noise sensitivity
         if self.recognizer:
@@ -73,30 +123,104 @@ class SpeechToText:
             except sr.WaitTimeoutError:
                 return {"error": "No speech detected within timeout", "text": ""}
 
-        return self._transcribe(audio)
+        return self.transcribe_bytes(audio.get_raw_data(convert_width=2), audio.sample_rate)
 
     # ── Transcribe from audio bytes (for WebSocket/API use) ──────────────────
-    def transcribe_bytes(self, audio_bytes: bytes, sample_rate: int = 16000) -> dict:
-        """Transcribe raw PCM audio bytes."""
+    def transcribe_bytes(self, audio_bytes: bytes, sample_rate: int = 16000, channels: int = 1) -> dict:
+        """Transcribe raw 16-bit PCM audio bytes (interleaved if channels > 1)."""
+        if not NUMPY_AVAILABLE:
+            if not SR_AVAILABLE:
+                return {"error": "speech_recognition not installed", "text": ""}
+            return self._transcribe(sr.AudioData(audio_bytes, sample_rate, 2))
+        audio, report = audio_frontend.preprocess(audio_bytes, sample_rate, channels)
+        result = self._recognize(audio) if len(audio) else self._no_speech()
+        result["frontend"] = report
+        return result
+
+    async def transcribe_bytes_async(self, audio_bytes: bytes, sample_rate: int = 16000,
+                                     channels: int = 1) -> dict:
+        """Batched Whisper from the event loop, for clips of at most 30 s."""
+        from workers import run_stage
+        t0 = time.perf_counter()
+        try:
+            audio, report = await run_stage("stt", audio_frontend.preprocess, audio_bytes, sample_rate, channels)
+            if not len(audio):
+                result = self._no_speech()
+            else:
+                result = self._whisper_result(await self.batcher.submit_async(audio), t0)
+        except Exception as e:
+            return {"error": str(e), "text": "", "engine": self.engine}
+        result["frontend"] = report
+        return result
+
+    def warm_up(self) -> float | None:
+        """
+        One dummy inference on 1 s of silence so the first real request does
+        not pay for lazy initialisation.  Network engines are skipped — there
+        is nothing local to warm.  Returns (and records) the time taken.
+        """
+        if self.engine == "google" or (self.engine == "whisper" and not self.whisper_model):
+            return None
+        t0 = time.perf_counter()
+        if NUMPY_AVAILABLE:
+            # Straight to the engine — the front-end would trim the silence away
+            self._recognize(np.zeros(WHISPER_RATE, dtype=np.float32))
+        else:
+            self._transcribe(sr.AudioData(bytes(2 * WHISPER_RATE), WHISPER_RATE, 2))
+        self.warmup_ms = round((time.perf_counter() - t0) * 1000, 1)
+        return self.warmup_ms
+
+    # ── Whisper: batched decoding ─────────────────────────────────────────────
+    def enable_batching(self, max_batch: int = WHISPER_MAX_BATCH, max_wait_ms: float = WHISPER_MAX_WAIT_MS):
+        if self.batcher:
+            self.batcher.close()
+        self.batcher = MicroBatcher(self._decode_batch, max_batch, max_wait_ms, name="whisper")
+
+    def _decode_batch(self, audios: list) -> list[str]:
+        """One padded encoder pass + greedy decode for up to max_batch ≤30 s clips."""
+        model = self.whisper_model
+        mel   = torch.stack([whisper_lib.log_mel_spectrogram(whisper_lib.pad_or_trim(a), model.dims.n_mels)
+                             for a in audios]).to(model.device)
+        options = whisper_lib.DecodingOptions(language="en", without_timestamps=True,
+                                              fp16=model.device.type == "cuda")
+        return [r.text.strip() for r in whisper_lib.decode(model, mel, options)]
+
+    def _whisper_result(self, text: str, t0: float) -> dict:
+        return {
+            "text":       text,
+            "engine":     self.engine,
+            "latency_ms": round((time.perf_counter() - t0) * 1000, 2),
+            "error":      None,
+        }
+
+    # ── Core transcription ────────────────────────────────────────────────────
+    def _recognize(self, audio: "np.ndarray") -> dict:
+        """Run the engine on front-end output: mono float32 at 16 kHz."""
+        if self.engine == "whisper" and self.whisper_model:
+            return self._transcribe_pcm(audio)
         if not SR_AVAILABLE:
             return {"error": "speech_recognition not installed", "text": ""}
-        audio = sr.AudioData(audio_bytes, sample_rate, 2)
-        return self._transcribe(audio)
+        return self._transcribe(sr.AudioData(audio_frontend.to_pcm16(audio), WHISPER_RATE, 2))
+
+    def _no_speech(self) -> dict:
+        return {"error": "No speech detected", "text": "", "engine": self.engine}
+
+    def _transcribe_pcm(self, audio: "np.ndarray") -> dict:
+        """Whisper on a float32 array — no temp file, no ffmpeg."""
+        t0 = time.perf_counter()
+        try:
+            if self.batcher and len(audio) <= WHISPER_SAMPLES:
+                text = self.batcher.call(audio)
+            else:
+                text = self.whisper_model.transcribe(audio, language="en")["text"].strip()
+            return self._whisper_result(text, t0)
+        except Exception as e:
+            return {"error": str(e), "text": "", "engine": self.engine}
 
-    # ── Core transcription ────────────────────────────────────────────────────
     def _transcribe(self, audio) -> dict:
         t0 = time.perf_counter()
         try:
-            if self.engine == "whisper" and self.whisper_model:
-                # Save audio to temp file and run Whisper
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                    tmp.write(audio.get_wav_data())
-                    tmp_path = tmp.name
-                result = self.whisper_model.transcribe(tmp_path, language="en")
-                os.unlink(tmp_path)
-                text = result["text"].strip()
-
-            elif self.engine == "google":
+            if self.engine == "google":
                 text = self.recognizer.recognize_google(audio, language="en-US")
 
             elif self.engine == "sphinx":
@@ -121,17 +245,117 @@ class SpeechToText:
             return {"error": str(e), "text": "", "engine": self.engine}
 
 
-# ── Singleton instance ────────────────────────────────────────────────────────
-_stt_instance: SpeechToText | None = None
+# ── Engine registry: one instance per (engine, model size) ──────────────────
+ENGINES = ("google", "whisper", "sphinx")
+
+_registry: dict[tuple[str, str], SpeechToText] = {}
+_registry_lock = threading.Lock()
+_preload: dict[str, dict] = {}          # "engine[:model]" → load / warm-up record
+
+
+def _key(engine: str | None, model: str | None = None) -> tuple[str, str]:
+    engine = (engine or STT_ENGINE).lower().strip()
+    if engine not in ENGINES:
+        raise ValueError(f"unknown STT engine {engine!r} (choose from {', '.join(ENGINES)})")
+    return engine, (model or WHISPER_MODEL) if engine == "whisper" else ""
+
+
+def get_stt(engine: str | None = None, model: str | None = None) -> SpeechToText:
+    """The instance for (engine, model size), built on first use and reused after."""
+    key = _key(engine, model)
+    stt = _registry.get(key)
+    if stt is None:
+        with _registry_lock:
+            stt = _registry.get(key)
+            if stt is None:
+                t0  = time.perf_counter()
+                stt = SpeechToText(engine=key[0], whisper_model=key[1] or WHISPER_MODEL)
+                stt.load_ms = round((time.perf_counter() - t0) * 1000, 1)
+                _registry[key] = stt
+    return stt
 
 
-def get_stt(engine: str = "google") -> SpeechToText:
-    global _stt_instance
-    if _stt_instance is None:
-        _stt_instance = SpeechToText(engine=engine)
-    return _stt_instance
+def preload(specs: list[str] | None = None) -> dict:
+    """
+    Load and warm every engine in `specs` ("engine" or "engine:model",
+    default STT_PRELOAD) — run from the app's lifespan so no request pays
+    for a model load.  Returns {spec: {load_ms, warmup_ms, ready, error}}.
+    """
+    import stt_pool
+    for spec in specs if specs is not None else PRELOAD:
+        engine, _, model = spec.partition(":")
+        _preload[spec] = record = {"ready": False, "load_ms": None, "warmup_ms": None, "error": None}
+        try:
+            key = _key(engine, model or None)
+            if stt_pool.PROCESSES and key == _key(None):
+                # The default engine is served by the worker processes; each warms itself
+                pool = stt_pool.get_pool(kwargs={"engine": key[0], "whisper_model": key[1] or WHISPER_MODEL})
+                if not pool.wait_ready(timeout=600):
+                    raise RuntimeError(pool.failed or "STT worker processes did not become ready")
+                workers = pool.stats()["workers"]
+                record["load_ms"]   = max(w["load_ms"] for w in workers)
+                record["warmup_ms"] = max(w["warmup_ms"] for w in workers)
+                record["ready"]     = True
+                print(f"[✓] STT {spec} ready in {len(workers)} worker processes "
+                      f"(load {record['load_ms']} ms, warm-up {record['warmup_ms']} ms).")
+                continue
+            stt = get_stt(*key)
+            record["load_ms"]   = stt.load_ms
+            record["warmup_ms"] = stt.warm_up()
+            record["ready"]     = True
+            print(f"[✓] STT {spec} ready (load {stt.load_ms} ms, warm-up {record['warmup_ms']} ms).")
+        except Exception as e:
+            record["error"] = str(e)
+            print(f"[!] STT {spec} failed to preload: {e}")
+    return dict(_preload)
+
+
+def is_ready() -> bool:
+    """Every preloaded engine (and the worker pool, if enabled) can serve without a cold start."""
+    import stt_pool
+    if any(spec not in _preload or not _preload[spec]["ready"] for spec in PRELOAD):
+        return False
+    pool = stt_pool._pool
+    return not stt_pool.PROCESSES or (pool is not None and pool.is_ready())
 
 
-def transcribe_audio_bytes(audio_bytes: bytes, sample_rate: int = 16000) -> dict:
+def transcribe_audio_bytes(audio_bytes: bytes, sample_rate: int = 16000, engine: str | None = None,
+                           model: str | None = None, channels: int = 1) -> dict:
     """Convenience wrapper used by the FastAPI backend."""
-    return get_stt().transcribe_bytes(audio_bytes, sample_rate)
+    return get_stt(engine, model).transcribe_bytes(audio_bytes, sample_rate, channels)
+
+
+async def transcribe_audio_bytes_async(audio_bytes: bytes, sample_rate: int = 16000, engine: str | None = None,
+                                       model: str | None = None, channels: int = 1) -> dict:
+    """
+    transcribe_audio_bytes() for async callers.  With STT_PROCESSES > 0 the
+    default engine runs in the worker-process pool (stt_pool.py); otherwise
+    batched Whisper is awaited directly and every other engine runs on the
+    "stt" thread pool.
+    """
+    from workers import run_stage
+    import stt_pool
+    key = _key(engine, model)
+    if stt_pool.PROCESSES and key == _key(None):
+        pool = stt_pool.get_pool(kwargs={"engine": key[0], "whisper_model": key[1] or WHISPER_MODEL})
+        return await pool.transcribe_async(audio_bytes, sample_rate, channels)
+    stt = _registry.get(key) or await run_stage("stt", get_stt, *key)
+    seconds = len(audio_bytes) / (2 * channels) / sample_rate
+    if stt.batcher is not None and NUMPY_AVAILABLE and seconds <= WHISPER_SAMPLES / WHISPER_RATE:
+        return await stt.transcribe_bytes_async(audio_bytes, sample_rate, channels)
+    return await run_stage("stt", stt.transcribe_bytes, audio_bytes, sample_rate, channels)
+
+
+def stt_stats() -> dict:
+    import stt_pool
+    return {
+        "default":   ":".join(filter(None, _key(None))),
+        "ready":     is_ready(),
+        "preload":   dict(_preload),
+        "engines":   {":".join(filter(None, key)): {
+                          "load_ms":   stt.load_ms,
+                          "warmup_ms": stt.warmup_ms,
+                          "batcher":   stt.batcher.stats() if stt.batcher else None,
+                      } for key, stt in sorted(_registry.items())},
+        "processes": stt_pool.stats(),
+    }
@@ -0,0 +1,459 @@
+"""
+=============================================================
+  STT PROCESS POOL — Real-Time Voice Translator
+  Speech recognition in worker processes, so CPU-bound
+  Whisper inference runs on every core instead of queueing
+  behind one GIL in the uvicorn process.
+=============================================================
+
+Each worker process builds its engine once (SpeechToText by default), runs
+its warm_up() if it has one, reports ready and serves jobs from a duplex
+pipe.  Audio never goes through the pipe: the
+parent copies the PCM into a multiprocessing.shared_memory segment (reused
+from a free list), and only (job id, segment name, length, sample rate,
+channels) is sent.  The worker reads the samples straight out of the segment.
+
+Dispatch goes to the ready worker with the fewest jobs in flight.  Inside
+a worker, jobs run on a small thread pool, so the Whisper MicroBatcher
+(speech_to_text.py) can still group the jobs one process receives.
+
+A monitor thread pings every worker each STT_POOL_HEALTH_S (the worker's
+receive loop answers even while jobs run) and restarts workers that died,
+stopped answering for STT_POOL_PING_TIMEOUT_S or hold a job longer than
+STT_POOL_JOB_TIMEOUT_S.  Their in-flight jobs are retried once on another
+worker and fail with an error result after that.
+
+A worker whose engine fails to load is restarted with exponential backoff
+(2, 4, 8 … × STT_POOL_HEALTH_S, at most STT_POOL_RESTART_MAX_S).  After
+STT_POOL_START_FAILURES failed starts in a row its slot stays down and the
+pool is marked failed (stats()["failed"]), which keeps /ready at 503.
+
+Settings (environment):
+  STT_PROCESSES            worker processes, 0 = in-process STT   (default 0)
+  STT_POOL_THREADS         jobs one worker runs at a time        (default WHISPER_MAX_BATCH)
+  STT_POOL_JOB_TIMEOUT_S   restart a worker stuck on one job      (default 60)
+  STT_POOL_HEALTH_S        monitor / ping interval                (default 1)
+  STT_POOL_PING_TIMEOUT_S  restart a worker that stops answering  (default 10)
+  STT_POOL_START           multiprocessing start method           (default spawn)
+  STT_POOL_START_FAILURES  failed starts in a row before giving up (default 5)
+  STT_POOL_RESTART_MAX_S   longest backoff between failed starts  (default 60)
+"""
+
+import os, time, asyncio, itertools, threading, importlib, multiprocessing as mp
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import shared_memory, resource_tracker
+
+PROCESSES      = int(os.environ.get("STT_PROCESSES", 0))
+THREADS        = int(os.environ.get("STT_POOL_THREADS", os.environ.get("WHISPER_MAX_BATCH", 8)))
+JOB_TIMEOUT_S  = float(os.environ.get("STT_POOL_JOB_TIMEOUT_S", 60))
+HEALTH_S       = float(os.environ.get("STT_POOL_HEALTH_S", 1))
+PING_TIMEOUT_S = float(os.environ.get("STT_POOL_PING_TIMEOUT_S", 10))
+START_METHOD   = os.environ.get("STT_POOL_START", "spawn")
+START_FAILURES = int(os.environ.get("STT_POOL_START_FAILURES", 5))
+RESTART_MAX_S  = float(os.environ.get("STT_POOL_RESTART_MAX_S", 60))
+
+DEFAULT_FACTORY = "speech_to_text:SpeechToText"
+MAX_RETRIES     = 1
+
+
+# ── Worker process ────────────────────────────────────────────────────────────
+def _load_factory(spec: str):
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open the parent's segment without making this process its owner."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)          # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _worker_main(conn, factory: str, kwargs: dict, threads: int):
+    t0 = time.perf_counter()
+    try:
+        engine  = _load_factory(factory)(**kwargs)
+        load_ms = round((time.perf_counter() - t0) * 1000, 1)
+        t0 = time.perf_counter()
+        if hasattr(engine, "warm_up"):
+            engine.warm_up()
+        warmup_ms = round((time.perf_counter() - t0) * 1000, 1)
+    except Exception as e:
+        conn.send(("failed", repr(e)))
+        return
+    conn.send(("ready", load_ms, warmup_ms))
+    send_lock = threading.Lock()
+    attached: dict[str, shared_memory.SharedMemory] = {}
+
+    def run(job_id, shm_name, nbytes, sample_rate, channels):
+        try:
+            shm = attached.get(shm_name)
+            if shm is None:
+                shm = attached[shm_name] = _attach(shm_name)
+            view = shm.buf[:nbytes]
+            try:
+                result = engine.transcribe_bytes(view, sample_rate, channels)
+            finally:
+                try:
+                    view.release()
+                except BufferError:       # the engine kept a reference; GC releases it
+                    pass
+        except Exception as e:
+            result = {"error": str(e), "text": ""}
+        with send_lock:
+            conn.send(("result", job_id, result))
+
+    with ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="stt-job") as pool:
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                break
+            if msg[0] == "job":
+                pool.submit(run, *msg[1:])
+            elif msg[0] == "ping":
+                with send_lock:
+                    conn.send(("pong", msg[1]))
+            elif msg[0] == "stop":
+                break
+    for shm in attached.values():
+        shm.close()
+
+
+# ── Parent side ───────────────────────────────────────────────────────────────
+class _Segment:
+    """A reusable shared-memory buffer owned by the parent."""
+
+    def __init__(self, size: int):
+        self.shm  = shared_memory.SharedMemory(create=True, size=size)
+        self.size = self.shm.size
+
+
+class _Job:
+    __slots__ = ("id", "segment", "nbytes", "sample_rate", "channels", "future", "attempts", "started")
+
+    def __init__(self, job_id, segment, nbytes, sample_rate, channels):
+        self.id          = job_id
+        self.segment     = segment
+        self.nbytes      = nbytes
+        self.sample_rate = sample_rate
+        self.channels    = channels
+        self.future      = Future()
+        self.attempts    = 0
+        self.started     = 0.0
+
+
+class _Worker:
+    def __init__(self, pool: "STTProcessPool", slot: int):
+        self.pool      = pool
+        self.slot      = slot
+        self.ready     = False
+        self.load_ms   = None
+        self.warmup_ms = None
+        self.start_error = None        # set when the engine failed to load
+        self.restart_at  = None        # backoff deadline after a failed start
+        self.inflight: dict[int, _Job] = {}
+        self.completed = 0
+        self.alive     = True
+        self.last_seen = time.perf_counter()
+        self.lock      = threading.Lock()
+        self.conn, child = pool._ctx.Pipe()
+        self.process   = pool._ctx.Process(target=_worker_main, name=f"stt-worker-{slot}", daemon=True,
+                                           args=(child, pool.factory, pool.kwargs, pool.threads))
+        self.process.start()
+        child.close()
+        self.reader    = threading.Thread(target=self._read, daemon=True, name=f"stt-reader-{slot}")
+        self.reader.start()
+
+    def send_job(self, job: _Job):
+        job.started   = time.perf_counter()
+        job.attempts += 1
+        with self.lock:
+            self.inflight[job.id] = job
+            try:
+                self.conn.send(("job", job.id, job.segment.shm.name, job.nbytes, job.sample_rate,
+                                job.channels))
+            except (OSError, ValueError):
+                del self.inflight[job.id]
+                self.alive = False
+                raise
+
+    def _read(self):
+        while True:
+            try:
+                msg = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            self.last_seen = time.perf_counter()
+            if msg[0] == "ready":
+                self.load_ms, self.warmup_ms, self.ready = msg[1], msg[2], True
+                self.pool._start_failures[self.slot] = 0
+            elif msg[0] == "failed":
+                print(f"[!] STT worker {self.slot} failed to start: {msg[1]}")
+                self.start_error = msg[1]
+                break
+            elif msg[0] == "result":
+                with self.lock:
+                    job = self.inflight.pop(msg[1], None)
+                    self.completed += job is not None
+                if job:
+                    self.pool._finish(job, msg[2])
+        self.alive = False
+
+    def stop(self, timeout: float = 2.0):
+        try:
+            self.conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class STTProcessPool:
+    def __init__(self, size: int = PROCESSES or (os.cpu_count() or 1), factory: str = DEFAULT_FACTORY,
+                 kwargs: dict | None = None, threads: int = THREADS):
+        self.size     = max(1, size)
+        self.factory  = factory
+        self.kwargs   = kwargs or {}
+        self.threads  = threads
+        self._ctx     = mp.get_context(START_METHOD)
+        self._lock    = threading.Lock()
+        self._ids     = itertools.count(1)
+        self._free: list[_Segment] = []
+        self._segments: list[_Segment] = []
+        self._closed  = False
+        self._start_failures: dict[int, int] = {}     # slot → failed starts in a row
+        self.failed: str | None = None                # set once a slot is given up on
+        self.counters = {"jobs": 0, "errors": 0, "retries": 0, "restarts": 0, "bytes": 0}
+        self.workers  = [_Worker(self, i) for i in range(self.size)]
+        self._monitor = threading.Thread(target=self._watch, daemon=True, name="stt-pool-monitor")
+        self._monitor.start()
+
+    # ── Shared memory ─────────────────────────────────────────────────────────
+    def _segment(self, nbytes: int) -> _Segment:
+        with self._lock:
+            fits = [s for s in self._free if s.size >= nbytes]
+            if fits:
+                seg = min(fits, key=lambda s: s.size)
+                self._free.remove(seg)
+                return seg
+        seg = _Segment(max(nbytes, 1 << 16))
+        with self._lock:
+            self._segments.append(seg)
+        return seg
+
+    def _release(self, seg: _Segment):
+        with self._lock:
+            self._free.append(seg)
+
+    # ── Dispatch ──────────────────────────────────────────────────────────────
+    def _pick(self, exclude: "_Worker | None" = None) -> _Worker:
+        candidates = [w for w in self.workers if w.alive and w is not exclude] or \
+                     [w for w in self.workers if w.alive]
+        if not candidates:
+            raise RuntimeError("no live STT workers")
+        ready = [w for w in candidates if w.ready] or candidates
+        return min(ready, key=lambda w: len(w.inflight))
+
+    def submit(self, audio_bytes, sample_rate: int = 16000, channels: int = 1) -> Future:
+        if self._closed:
+            raise RuntimeError("STT pool is closed")
+        n   = len(audio_bytes)
+        seg = self._segment(n)
+        seg.shm.buf[:n] = audio_bytes
+        job = _Job(next(self._ids), seg, n, sample_rate, channels)
+        with self._lock:
+            self.counters["jobs"]  += 1
+            self.counters["bytes"] += n
+        error = "no live STT workers"
+        for _ in range(self.size):
+            try:
+                self._pick().send_job(job)
+                return job.future
+            except (OSError, ValueError):
+                continue                  # worker died under us; the monitor restarts it
+            except RuntimeError as e:     # none alive: fail this job, hand its segment back
+                error = self.failed or str(e)
+                break
+        self._finish(job, {"error": error, "text": ""})
+        return job.future
+
+    def transcribe(self, audio_bytes, sample_rate: int = 16000, channels: int = 1) -> dict:
+        return self.submit(audio_bytes, sample_rate, channels).result()
+
+    async def transcribe_async(self, audio_bytes, sample_rate: int = 16000, channels: int = 1) -> dict:
+        return await asyncio.wrap_future(self.submit(audio_bytes, sample_rate, channels))
+
+    def _finish(self, job: _Job, result: dict):
+        self._release(job.segment)
+        if result.get("error"):
+            with self._lock:
+                self.counters["errors"] += 1
+        if not job.future.done():
+            job.future.set_result(result)
+
+    # ── Health ────────────────────────────────────────────────────────────────
+    def _watch(self):
+        while not self._closed:
+            time.sleep(HEALTH_S)
+            now = time.perf_counter()
+            for i, w in enumerate(list(self.workers)):
+                if self._closed:
+                    return
+                stuck  = any(now - j.started > JOB_TIMEOUT_S for j in list(w.inflight.values()))
+                silent = w.ready and now - w.last_seen > PING_TIMEOUT_S
+                if w.alive and w.process.is_alive() and not stuck and not silent:
+                    try:
+                        with w.lock:
+                            w.conn.send(("ping", now))
+                    except (OSError, ValueError):
+                        pass
+                    continue
+                if w.start_error is not None and not self._backoff(w, now):
+                    continue
+                reason = ("failed to start" if w.start_error is not None else "stuck on a job" if stuck
+                          else "not answering pings" if silent else f"exit code {w.process.exitcode}")
+                print(f"[!] STT worker {w.slot} (pid {w.process.pid}) {reason} — restarting.")
+                self._restart(i, w)
+
+    def _backoff(self, w: _Worker, now: float) -> bool:
+        """True once a worker that failed to start may be started again."""
+        if w.restart_at is None:
+            failures = self._start_failures[w.slot] = self._start_failures.get(w.slot, 0) + 1
+            if failures >= START_FAILURES:
+                w.restart_at = float("inf")
+                self.failed  = f"STT worker {w.slot} failed to start {failures} times: {w.start_error}"
+                print(f"[!] {self.failed} — giving up on it.")
+                self._retry_later(self._retire(w))
+                return False
+            w.restart_at = now + min(RESTART_MAX_S, HEALTH_S * 2 ** failures)
+        return now >= w.restart_at
+
+    def _retire(self, dead: _Worker) -> list[_Job]:
+        """Stop a dead worker; returns the jobs it still held."""
+        dead.alive = False
+        if dead.process.is_alive():
+            dead.process.kill()
+        dead.process.join()
+        with dead.lock:
+            orphans, dead.inflight = list(dead.inflight.values()), {}
+        try:
+            dead.conn.close()
+        except OSError:
+            pass
+        return orphans
+
+    def _restart(self, i: int, dead: _Worker):
+        orphans = self._retire(dead)
+        self.workers[i] = _Worker(self, dead.slot)
+        with self._lock:
+            self.counters["restarts"] += 1
+        self._retry_later(orphans)
+
+    def _retry_later(self, orphans: list[_Job]):
+        if orphans:
+            threading.Thread(target=self._retry, args=(orphans,), daemon=True, name="stt-retry").start()
+
+    def _retry(self, orphans: list[_Job]):
+        """
+        Re-run a dead worker's jobs one at a time.  If one of them is what
+        crashed the worker, it takes down at most itself (plus whatever the
+        next worker was running, which gets its own retry) instead of every
+        job it was batched with.
+        """
+        for job in orphans:
+            if job.attempts > MAX_RETRIES:
+                self._finish(job, {"error": "STT worker crashed", "text": ""})
+                continue
+            with self._lock:
+                self.counters["retries"] += 1
+            try:
+                self._pick().send_job(job)
+            except Exception as e:
+                self._finish(job, {"error": f"STT worker crashed: {e}", "text": ""})
+                continue
+            try:
+                job.future.exception(timeout=JOB_TIMEOUT_S + 2 * PING_TIMEOUT_S)
+            except Exception:
+                pass
+
+    def health(self) -> dict:
+        """{slot: alive and ready} per worker; every slot is False once the pool has failed."""
+        return {w.slot: bool(not self.failed and w.alive and w.process.is_alive() and w.ready)
+                for w in self.workers}
+
+    def is_ready(self) -> bool:
+        return all(self.health().values())
+
+    def wait_ready(self, timeout: float = 60.0) -> bool:
+        """Block until every worker is ready; False on timeout or once the pool has failed."""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline and not self.failed:
+            if all(w.ready for w in self.workers):
+                return True
+            time.sleep(0.01)
+        return False
+
+    def shutdown(self):
+        self._closed = True
+        for w in self.workers:
+            w.stop()
+        with self._lock:
+            for seg in self._segments:
+                seg.shm.close()
+                seg.shm.unlink()
+            self._segments.clear()
+            self._free.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+        return {
+            "size":    self.size,
+            "factory": self.factory,
+            "segments": len(self._segments),
+            "failed":  self.failed,
+            **c,
+            "workers": [{
+                "slot":      w.slot,
+                "pid":       w.process.pid,
+                "alive":     w.alive and w.process.is_alive(),
+                "ready":     w.ready,
+                "load_ms":   w.load_ms,
+                "warmup_ms": w.warmup_ms,
+                "inflight":  len(w.inflight),
+                "completed": w.completed,
+                "start_failures": self._start_failures.get(w.slot, 0),
+            } for w in self.workers],
+        }
+
+
+# ── Module-level pool used by speech_to_text ─────────────────────────────────
+_pool: STTProcessPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(**kwargs) -> STTProcessPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = STTProcessPool(**kwargs)
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+def stats() -> dict | None:
+    return _pool.stats() if _pool else None
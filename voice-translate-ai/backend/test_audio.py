@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Pass/fail checks for the VAD and the audio front-end on synthetic PCM"""
+
+import numpy as np
+
+import audio_decode
+import audio_frontend
+from vad import VoiceActivityDetector
+
+RATE = 16000
+
+
+def tone(seconds, freq=200.0, amp=6000, rate=RATE):
+    t = np.arange(int(seconds * rate)) / rate
+    return (np.sin(2 * np.pi * freq * t) * amp).astype("<i2")
+
+
+def quiet(seconds, amp=100, rate=RATE, seed=0):
+    return np.random.default_rng(seed).integers(-amp, amp, int(seconds * rate)).astype("<i2")
+
+
+def segments(vad, pcm: bytes, chunk: int | None = None):
+    events = []
+    for pos in range(0, len(pcm), chunk or len(pcm)):
+        events += vad.push(pcm[pos:pos + (chunk or len(pcm))])
+    events += vad.flush()
+    return [e for e in events if e["type"] == "segment"]
+
+
+# ── VAD ───────────────────────────────────────────────────────────────────────
+def test_vad_one_utterance():
+    pcm  = np.concatenate([quiet(1.0), tone(1.0), quiet(1.5)]).tobytes()
+    segs = segments(VoiceActivityDetector(RATE), pcm)
+    assert len(segs) == 1
+    assert 0.7 <= segs[0]["start_s"] <= 1.0
+    assert 1.0 <= segs[0]["speech_s"] <= 1.1
+    assert not segs[0]["forced"]
+
+
+def test_vad_splits_at_pauses():
+    pcm  = np.concatenate([quiet(0.5), tone(0.6), quiet(1.2), tone(0.6), quiet(1.2)]).tobytes()
+    segs = segments(VoiceActivityDetector(RATE), pcm)
+    assert len(segs) == 2
+    assert segs[0]["end_s"] < segs[1]["start_s"]
+
+
+def test_vad_drops_clicks_and_hiss():
+    # Above the energy threshold but broadband (ZCR ≈ 0.5) and under the 3× "loud" bar
+    hiss = np.random.default_rng(1).integers(-1000, 1000, 2 * RATE).astype("<i2")
+    pcm  = np.concatenate([quiet(0.5), tone(0.06), quiet(1.0), hiss, quiet(1.0)]).tobytes()
+    vad  = VoiceActivityDetector(RATE)
+    assert segments(vad, pcm) == []
+    assert vad.stats()["dropped"] <= 1
+
+
+def test_vad_chunking_does_not_matter():
+    pcm   = np.concatenate([quiet(0.5), tone(0.8), quiet(1.0), tone(0.5), quiet(1.0)]).tobytes()
+    whole = segments(VoiceActivityDetector(RATE), pcm)
+    odd   = segments(VoiceActivityDetector(RATE), pcm, chunk=333)       # splits samples and frames
+    assert [s["pcm"] for s in whole] == [s["pcm"] for s in odd]
+
+
+def test_vad_other_sample_rate():
+    rate = 44100
+    pcm  = np.concatenate([quiet(0.5, rate=rate), tone(0.8, rate=rate), quiet(1.2, rate=rate)]).tobytes()
+    segs = segments(VoiceActivityDetector(rate), pcm)
+    assert len(segs) == 1 and 0.75 <= segs[0]["speech_s"] <= 0.9
+
+
+# ── Front-end ─────────────────────────────────────────────────────────────────
+def test_resample_keeps_frequency_and_length():
+    src  = tone(1.0, freq=440, rate=44100).astype(np.float32) / 32768
+    out  = audio_frontend.resample(src, 44100, RATE)
+    assert abs(len(out) - RATE) <= 1
+    peak = np.argmax(np.abs(np.fft.rfft(out))) * RATE / len(out)
+    assert abs(peak - 440) <= 2
+
+
+def test_resample_removes_content_above_nyquist():
+    src = tone(1.0, freq=10000, rate=44100).astype(np.float32) / 32768      # above 8 kHz
+    out = audio_frontend.resample(src, 44100, RATE)
+    assert np.sqrt(np.mean(out[200:-200] ** 2)) < 0.01 * np.sqrt(np.mean(src ** 2))
+
+
+def test_preprocess_trims_silence_and_downmixes():
+    mono   = np.concatenate([np.zeros(RATE * 2, "<i2"), tone(1.0), np.zeros(RATE * 2, "<i2")])
+    stereo = np.repeat(mono, 2)                                           # L, R interleaved
+    audio, report = audio_frontend.preprocess(stereo.tobytes(), RATE, channels=2)
+    assert report["channels"] == 2
+    assert 1.0 <= len(audio) / RATE <= 1.3
+    assert report["trimmed_ms"] >= 3500
+    assert 0.85 <= np.max(np.abs(audio)) <= 0.95
+
+
+def test_sample_rate_bounds():
+    assert audio_decode.check_rate("44100") == 44100
+    for bad in (0, -16000, 10 ** 9, "abc", None, True, 8000.5):
+        try:
+            audio_decode.check_rate(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"check_rate accepted {bad!r}")
+    try:
+        audio_frontend._ratio(10 ** 9, RATE)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("_ratio accepted a ratio that rounds to zero")
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✅ {name}")
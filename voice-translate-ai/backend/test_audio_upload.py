@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Pass/fail checks for the /translate-audio upload size limits"""
+
+import json, base64, asyncio
+
+import audio_upload
+from audio_upload import AudioBuffer, UploadTooLarge
+
+LIMIT = 64 * 1024
+
+
+class Request:
+    """Just what audio_upload reads: headers and an async body stream."""
+
+    def __init__(self, body: bytes, headers: dict | None = None, chunk: int = 4096, chunked: bool = False):
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
+        if not chunked:
+            self.headers.setdefault("content-length", str(len(body)))
+        self.body, self.chunk, self.read = body, chunk, 0
+
+    async def stream(self):
+        for pos in range(0, len(self.body), self.chunk):
+            self.read += len(self.body[pos:pos + self.chunk])
+            yield self.body[pos:pos + self.chunk]
+
+
+def too_large(coro) -> bool:
+    try:
+        asyncio.run(coro)
+    except UploadTooLarge:
+        return True
+    return False
+
+
+def multipart(audio: bytes, fields: dict, boundary: str = "xyzBOUNDARY") -> tuple[bytes, dict]:
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode()
+             for k, v in fields.items()]
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="audio"; filename="a.wav"\r\n'
+                 f'Content-Type: audio/wav\r\n\r\n'.encode() + audio + b"\r\n")
+    body = b"".join(parts) + f"--{boundary}--\r\n".encode()
+    return body, {"content-type": f"multipart/form-data; boundary={boundary}"}
+
+
+# ── Buffer ────────────────────────────────────────────────────────────────────
+def test_buffer_grows_up_to_the_limit():
+    buf = AudioBuffer(0, max_bytes=LIMIT)
+    for _ in range(LIMIT // 1000):
+        buf.write(b"x" * 1000)
+    assert bytes(buf.view()) == b"x" * (LIMIT // 1000 * 1000)
+    try:
+        buf.write(b"x" * 1000)
+    except UploadTooLarge:
+        return
+    raise AssertionError("AudioBuffer wrote past max_bytes")
+
+
+# ── Raw bodies ────────────────────────────────────────────────────────────────
+def test_raw_at_the_limit_is_read_whole():
+    body = bytes(range(256)) * (LIMIT // 256)
+    assert bytes(asyncio.run(audio_upload.read_raw(Request(body), LIMIT))) == body
+
+
+def test_raw_content_length_over_limit_is_refused_unread():
+    request = Request(b"x" * (LIMIT + 1))
+    assert too_large(audio_upload.read_raw(request, LIMIT))
+    assert request.read == 0
+
+
+def test_raw_chunked_over_limit_stops_early():
+    request = Request(b"x" * (LIMIT * 4), chunked=True)
+    assert too_large(audio_upload.read_raw(request, LIMIT))
+    assert request.read <= LIMIT + request.chunk
+
+
+# ── base64 JSON bodies ────────────────────────────────────────────────────────
+def test_json_allows_base64_overhead():
+    audio = b"\x01\x02" * (LIMIT // 2)
+    body  = json.dumps({"audio_base64": base64.b64encode(audio).decode(), "src_lang": "en"}).encode()
+    data  = asyncio.run(audio_upload.read_json(Request(body, chunked=True), LIMIT))
+    assert base64.b64decode(json.loads(data)["audio_base64"]) == audio
+
+
+def test_json_over_limit_is_refused_chunked_or_not():
+    audio = b"\x01\x02" * LIMIT                                   # twice the limit
+    body  = json.dumps({"audio_base64": base64.b64encode(audio).decode()}).encode()
+    assert too_large(audio_upload.read_json(Request(body), LIMIT))
+    request = Request(body, chunked=True)
+    assert too_large(audio_upload.read_json(request, LIMIT))
+    assert request.read < len(body)
+
+
+# ── Multipart ─────────────────────────────────────────────────────────────────
+def test_multipart_audio_and_fields():
+    audio = b"RIFF" + b"\x00" * 1000
+    body, headers = multipart(audio, {"src_lang": "en", "tgt_lang": "french"})
+    data, fields, kind = asyncio.run(audio_upload.read_multipart(Request(body, headers, chunk=97), LIMIT))
+    assert bytes(data) == audio
+    assert fields == {"src_lang": "en", "tgt_lang": "french"}
+    assert kind == "audio/wav"
+
+
+def test_multipart_over_limit_is_refused_chunked_or_not():
+    body, headers = multipart(b"x" * (LIMIT + 1), {"tgt_lang": "french"})
+    assert too_large(audio_upload.read_multipart(Request(body, headers), LIMIT))
+    assert too_large(audio_upload.read_multipart(Request(body, headers, chunked=True), LIMIT))
+
+
+def test_multipart_long_field_is_rejected():
+    body, headers = multipart(b"x" * 10, {"tgt_lang": "f" * (audio_upload.MAX_FIELD_BYTES + 1)})
+    try:
+        asyncio.run(audio_upload.read_multipart(Request(body, headers), LIMIT))
+    except UploadTooLarge:
+        raise AssertionError("a long text field was reported as an oversized upload")
+    except ValueError:
+        return
+    raise AssertionError("an over-long form field was accepted")
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Pass/fail checks for translate_batch_async with a stub provider (no network)"""
+
+import asyncio
+from contextlib import contextmanager
+
+import translator
+import translation_cache
+from translation_cache import TranslationCache
+
+
+class StubProvider:
+    """Stands in for http_pool.google_translate_async; tags every line with the target code."""
+
+    def __init__(self, mangle: bool = False):
+        self.mangle = mangle          # drop a line from multi-line requests
+        self.calls  = []
+
+    async def __call__(self, text, src_code, tgt_code, url=None):
+        self.calls.append((src_code, tgt_code, text.count("\n") + 1))
+        lines = [f"<{tgt_code}>{line}" for line in text.split("\n")]
+        if self.mangle and len(lines) > 1:
+            lines = lines[:-1]
+        return "\n".join(lines), "en" if src_code == "auto" else src_code
+
+
+@contextmanager
+def stub_provider(mangle: bool = False):
+    provider = StubProvider(mangle)
+    saved    = translator.google_translate_async, translation_cache._cache
+    translator.google_translate_async = provider
+    translation_cache._cache          = TranslationCache(path=None)
+    try:
+        yield provider
+    finally:
+        translator.google_translate_async, translation_cache._cache = saved
+
+
+def run(items):
+    return asyncio.run(translator.translate_batch_async(items))
+
+
+def sentences(n: int, prefix: str = "the river") -> list[str]:
+    return [f"{prefix} crossing number {i} was closed this morning" for i in range(n)]
+
+
+def test_results_in_input_order_in_one_request():
+    if not translator.HTTPX_AVAILABLE:
+        print("   (skipped: httpx not installed)")
+        return
+    texts = sentences(12)
+    with stub_provider() as provider:
+        out = run([(t, "english", "french") for t in texts])
+    assert [r["original"] for r in out["results"]] == texts
+    assert [r["translated"] for r in out["results"]] == [f"<fr>{t}" for t in texts]
+    assert all(r["source"] == "google" and r["batch_size"] == 12 for r in out["results"])
+    assert provider.calls == [("en", "fr", 12)] and out["round_trips"] == 1
+
+
+def test_duplicates_and_dictionary_hits_stay_local():
+    if not translator.HTTPX_AVAILABLE:
+        print("   (skipped: httpx not installed)")
+        return
+    phrase = next(iter(translator.PHRASE_TABLE))
+    text   = "the river crossing was closed this morning"
+    items  = [(text, "english", "french"), (phrase, "english", "french"),
+              (text.upper() + "!", "english", "french"), (text, "english", "french")]
+    with stub_provider() as provider:
+        out = run(items)
+    assert out["unique"] == 2
+    assert sum(n for _, _, n in provider.calls) == 1                        # one distinct text went out
+    first, hit, shouted, again = out["results"]
+    assert hit["source"] == "dictionary"
+    assert first["translated"] == shouted["translated"] == again["translated"]
+    assert shouted["original"] == text.upper() + "!"                        # each keeps its own input
+
+
+def test_wrong_line_count_falls_back_to_one_request_per_item():
+    if not translator.HTTPX_AVAILABLE:
+        print("   (skipped: httpx not installed)")
+        return
+    texts = sentences(5)
+    with stub_provider(mangle=True) as provider:
+        out = run([(t, "english", "german") for t in texts])
+    assert [r["translated"] for r in out["results"]] == [f"<de>{t}" for t in texts]
+    assert sorted(n for _, _, n in provider.calls) == [1, 1, 1, 1, 1, 5]
+    assert out["round_trips"] == 6
+    assert all("batch_size" not in r for r in out["results"])
+
+
+def test_mixed_language_pairs_are_batched_per_pair():
+    if not translator.HTTPX_AVAILABLE:
+        print("   (skipped: httpx not installed)")
+        return
+    items = [(t, "english", "french") for t in sentences(3)] + \
+            [(t, "english", "spanish") for t in sentences(2, "the market")] + \
+            [(t, "auto", "german") for t in sentences(2, "the bridge")]
+    with stub_provider() as provider:
+        out = run(items[::2] + items[1::2])                                   # interleave the pairs
+    assert sorted(provider.calls) == [("auto", "de", 2), ("en", "es", 2), ("en", "fr", 3)]
+    for (text, _, tgt), r in zip(items[::2] + items[1::2], out["results"]):
+        code = translator.LANGUAGES[tgt]["google_code"]
+        assert r["original"] == text and r["translated"] == f"<{code}>{text}" and r["tgt_lang"] == tgt
+
+
+def test_long_indic_chunks_stay_under_the_url_limit():
+    if not translator.HTTPX_AVAILABLE:
+        print("   (skipped: httpx not installed)")
+        return
+    from urllib.parse import quote
+    texts = [f"यह नदी पार करने का रास्ता आज सुबह बंद था संख्या {i}" for i in range(120)]
+    with stub_provider() as provider:
+        out = run([(t, "hindi", "english") for t in texts])
+    assert len(provider.calls) > 1
+    assert all(r["source"] == "google" for r in out["results"])
+    for chunk in translator._batch_chunks([(t, translator._prepare(t, "hindi", "english", 0.0)[0])
+                                           for t in texts]):
+        assert len(quote("\n".join(t for t, _ in chunk), safe="")) <= translator.BATCH_SEGMENT_CHARS
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✅ {name}")
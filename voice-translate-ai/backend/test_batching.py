@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Pass/fail checks for MicroBatcher and batched Whisper decoding with a stub model"""
+
+import time, asyncio, threading
+from concurrent.futures import ThreadPoolExecutor
+
+from batching import MicroBatcher
+
+
+class StubModel:
+    """Records batch sizes; one call costs `base_ms` however many items it carries."""
+
+    def __init__(self, base_ms: float = 30, fail_on=None):
+        self.base_ms = base_ms
+        self.fail_on = fail_on
+        self.batches = []
+        self.lock    = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append(len(items))
+        time.sleep(self.base_ms / 1000)
+        if self.fail_on is not None and self.fail_on in items:
+            raise RuntimeError("model failed")
+        return [f"out-{item}" for item in items]
+
+
+def test_concurrent_calls_share_batches():
+    model   = StubModel()
+    batcher = MicroBatcher(model, max_batch=8, max_wait_ms=20, name="test")
+    with ThreadPoolExecutor(16) as pool:
+        results = list(pool.map(batcher.call, range(32)))
+    batcher.close()
+    assert results == [f"out-{i}" for i in range(32)]           # each caller gets its own item
+    assert max(model.batches) <= 8
+    assert len(model.batches) < 32
+    assert batcher.stats()["items"] == 32
+
+
+def test_single_caller_waits_at_most_max_wait():
+    batcher = MicroBatcher(StubModel(base_ms=0), max_batch=8, max_wait_ms=10, name="test")
+    t0 = time.perf_counter()
+    assert batcher.call("x") == "out-x"
+    assert time.perf_counter() - t0 < 0.5
+    batcher.close()
+
+
+def test_failed_batch_fails_every_caller():
+    model   = StubModel(fail_on=3)
+    batcher = MicroBatcher(model, max_batch=8, max_wait_ms=50, name="test")
+    futures = [batcher.submit(i) for i in range(4)]
+    errors  = 0
+    for fut in futures:
+        try:
+            fut.result(timeout=5)
+        except RuntimeError:
+            errors += 1
+    assert model.batches == [4] and errors == 4
+    assert batcher.call(5) == "out-5"                           # the worker survives
+    batcher.close()
+
+
+def test_wrong_result_count_is_an_error():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch=4, max_wait_ms=50, name="test")
+    futures = [batcher.submit(i) for i in range(2)]
+    for fut in futures:
+        try:
+            fut.result(timeout=5)
+        except RuntimeError:
+            continue
+        raise AssertionError("a short result list was accepted")
+    batcher.close()
+
+
+def test_submit_async_and_close():
+    batcher = MicroBatcher(StubModel(), max_batch=4, max_wait_ms=20, name="test")
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit_async(i) for i in range(6)))
+
+    assert asyncio.run(run()) == [f"out-{i}" for i in range(6)]
+    batcher.close()
+    try:
+        batcher.submit(1)
+    except RuntimeError:
+        return
+    raise AssertionError("submit() after close() was accepted")
+
+
+def test_whisper_utterances_decode_together():
+    try:
+        import numpy as np, torch                                  # noqa: F401
+    except ImportError:
+        print("   (skipped: numpy / torch not installed)")
+        return
+    import speech_to_text
+    from benchmark import _stub_whisper
+
+    lib, model = _stub_whisper(base_ms=30, per_item_ms=0)
+    saved = getattr(speech_to_text, "whisper_lib", None)
+    speech_to_text.whisper_lib = lib
+    try:
+        stt = speech_to_text.SpeechToText(engine="google")
+        stt.engine, stt.whisper_model = "whisper", model
+        stt.enable_batching(max_batch=4, max_wait_ms=20)
+        clip = np.sin(np.arange(16000) / 16000 * 2 * np.pi * 200).astype(np.float32) * 0.5
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(stt._transcribe_pcm, [clip] * 8))
+        stt.batcher.close()
+    finally:
+        speech_to_text.whisper_lib = saved
+    assert all(r["text"] == "stub transcript" and not r.get("error") for r in results), results
+    sizes = [shape[0] for shape in model.shapes]
+    assert sum(sizes) == 8 and max(sizes) <= 4 and len(sizes) < 8
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✅ {name}")
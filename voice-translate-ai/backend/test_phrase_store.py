@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Pass/fail checks for the memory-mapped phrase store: build → mmap → lookup round trip"""
+
+import os, time, zlib, tempfile
+
+import phrase_store
+from phrase_store import PhraseStore, ORIGIN_TABLE, ORIGIN_CORPUS
+from translator import PHRASE_TABLE, _norm
+
+
+def expected_keys(phrase_table: dict, corpus: list[dict]) -> dict:
+    """{normalized key: (row, origin)} with build()'s precedence: table rows win, later ones override."""
+    keys = {}
+    for rows, origin in ((phrase_table.values(), ORIGIN_TABLE), (corpus, ORIGIN_CORPUS)):
+        for row in rows:
+            for text in row.values():
+                key = _norm(text)
+                if key and (origin == ORIGIN_TABLE or key not in keys):
+                    keys[key] = ({lang: t for lang, t in row.items() if t}, origin)
+    return keys
+
+
+def test_every_table_and_corpus_phrase_round_trips():
+    corpus = phrase_store._corpus_rows(phrase_store.DATASET_PATH)
+    assert corpus, "dataset/translations.jsonl is missing"
+    with tempfile.TemporaryDirectory() as tmp:
+        path  = os.path.join(tmp, "phrases.bin")
+        stats = phrase_store.build(PHRASE_TABLE, _norm, path)
+        assert stats["phrases"] == len(PHRASE_TABLE) + len(corpus)
+        store = PhraseStore(path)
+        try:
+            keys = expected_keys(PHRASE_TABLE, corpus)
+            assert stats["keys"] == len(keys)
+            for key, (row, origin) in keys.items():
+                assert store.lookup(key) == (row, origin), key
+                for lang, text in row.items():
+                    assert store.get(key, lang) == (text, origin)
+            assert store.lookup(_norm("zzz no such phrase zzz")) is None
+            assert store.get(next(iter(keys)), "klingon") is None
+        finally:
+            store.close()
+
+
+def test_colliding_keys_are_probed():
+    table = {f"phrase {i}": {"english": f"phrase {i}", "french": f"phrase française {i}"} for i in range(200)}
+    with tempfile.TemporaryDirectory() as tmp:
+        path  = os.path.join(tmp, "phrases.bin")
+        phrase_store.build(table, _norm, path, jsonl_path=os.path.join(tmp, "none.jsonl"))
+        store = PhraseStore(path)
+        try:
+            mask    = store.n_slots - 1
+            buckets = [zlib.crc32(_norm(t).encode()) & mask for row in table.values() for t in row.values()]
+            assert len(set(buckets)) < len(buckets)                         # the test really has collisions
+            for row in table.values():
+                for text in row.values():
+                    assert store.lookup(_norm(text)) == (row, ORIGIN_TABLE)
+            for i in range(200, 400):                                        # misses that probe a full run
+                assert store.find_row(_norm(f"phrase {i}")) is None
+        finally:
+            store.close()
+
+
+def test_rebuilt_when_a_source_is_newer():
+    with tempfile.TemporaryDirectory() as tmp:
+        path   = os.path.join(tmp, "phrases.bin")
+        source = os.path.join(tmp, "table.py")
+        with open(source, "w") as f:
+            f.write("# phrase table\n")
+        table = {"hello": {"english": "hello", "french": "bonjour"}}
+        store = phrase_store.load_or_build(table, _norm, path, sources=(source,))
+        assert store.lookup("hello")[0]["french"] == "bonjour"
+        store.close()
+        assert not phrase_store.is_stale(path, (source,))
+
+        table["hello"]["french"] = "salut"
+        later = os.path.getmtime(path) + 5
+        os.utime(source, (later, later))
+        assert phrase_store.is_stale(path, (source,))
+        store = phrase_store.load_or_build(table, _norm, path, sources=(source,))
+        assert store.lookup("hello")[0]["french"] == "salut"
+        store.close()
+
+
+def test_not_a_store_is_refused():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "phrases.bin")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 64)
+        try:
+            PhraseStore(path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("a file without the VTPS header was mapped")
+        os.utime(path, (time.time() + 5, time.time() + 5))                  # fresh, so not rebuilt
+        assert phrase_store.load_or_build({}, _norm, path) is None
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Pass/fail checks for the circuit breaker state machine"""
+
+import time, asyncio
+
+from provider_health import CircuitBreaker, BreakerOpen, CLOSED, OPEN, HALF_OPEN
+
+
+def fail():
+    raise ConnectionError("provider down")
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        try:
+            breaker.call(fail)
+        except ConnectionError:
+            pass
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        try:
+            breaker.call(fail)
+        except ConnectionError:
+            pass
+    breaker.call(lambda: "ok")                                   # a success resets the count
+    assert breaker.state == CLOSED and breaker.failures == 0
+    trip(breaker)
+    assert breaker.state == OPEN and breaker.counters["opened"] == 1
+
+
+def test_open_rejects_without_calling():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+    trip(breaker)
+    calls = []
+    try:
+        breaker.call(calls.append, 1)
+    except BreakerOpen:
+        pass
+    else:
+        raise AssertionError("an open breaker let a call through")
+    assert calls == [] and breaker.counters["rejected"] == 1
+
+
+def test_half_open_trial_success_closes():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05, half_open_calls=1)
+    trip(breaker)
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()                                   # one trial at a time
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_half_open_trial_failure_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0.05)
+    trip(breaker)
+    time.sleep(0.06)
+    try:
+        breaker.call(fail)                                       # one failure is enough here
+    except ConnectionError:
+        pass
+    assert breaker.state == OPEN and not breaker.allow()
+
+
+def test_cancelled_trial_hands_its_slot_back():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05, half_open_calls=1)
+    trip(breaker)
+    time.sleep(0.06)
+
+    async def run():
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(breaker.call_async(slow))
+        await started.wait()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert breaker.state == HALF_OPEN and breaker._trials == 0
+    assert breaker.counters["failures"] == 1                     # cancellation is not a verdict
+    assert breaker.call(lambda: "ok") == "ok" and breaker.state == CLOSED
+
+
+def test_prober_closes_a_half_open_breaker():
+    healthy = []
+
+    def probe():
+        if not healthy:
+            raise ConnectionError("still down")
+
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01,
+                             probe=probe, probe_interval=0.05)
+    trip(breaker)
+    time.sleep(0.02)
+    assert breaker.allow() and breaker.state == HALF_OPEN       # trial taken, never finished
+    time.sleep(0.12)
+    assert breaker.state == HALF_OPEN and breaker.counters["probe_failures"] >= 1
+    healthy.append(True)
+    deadline = time.monotonic() + 2
+    while breaker.state != CLOSED and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert breaker.state == CLOSED
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✅ {name}")
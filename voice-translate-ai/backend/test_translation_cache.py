@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Pass/fail checks for the two-tier translation cache on a throwaway SQLite file"""
+
+import os, time, asyncio, tempfile
+
+import translation_cache
+from translation_cache import TranslationCache
+
+
+def db_path(tmp: str) -> str:
+    return os.path.join(tmp, "translations.sqlite")
+
+
+# ── Memory tier ───────────────────────────────────────────────────────────────
+def test_hit_and_miss():
+    cache = TranslationCache(path=None)
+    cache.put("how are you", "english", "french", "comment allez-vous", "google")
+    assert cache.get("how are you", "english", "french") == ("comment allez-vous", "google")
+    assert cache.get("how are you", "english", "german") is None              # key includes the pair
+    assert cache.get("how are you", "english", "french", engine="marian") is None
+    s = cache.stats()
+    assert s["memory_hits"] == 1 and s["misses"] == 2
+
+
+def test_entries_expire_after_ttl():
+    cache = TranslationCache(path=None, ttl=0.05)
+    cache.put("hello", "english", "french", "bonjour", "google")
+    assert cache.get("hello", "english", "french")
+    time.sleep(0.08)
+    assert cache.get("hello", "english", "french") is None
+    assert cache.stats()["expired"] == 1 and cache.stats()["memory_entries"] == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = TranslationCache(path=None, max_entries=3)
+    for word in ("one", "two", "three"):
+        cache.put(word, "english", "french", word.upper(), "google")
+    cache.get("one", "english", "french")                                     # now most recent
+    cache.put("four", "english", "french", "FOUR", "google")
+    assert cache.get("two", "english", "french") is None
+    assert all(cache.get(w, "english", "french") for w in ("one", "three", "four"))
+    assert cache.stats()["evictions"] == 1
+
+
+# ── SQLite tier ───────────────────────────────────────────────────────────────
+def test_rows_persist_across_instances():
+    with tempfile.TemporaryDirectory() as tmp:
+        first = TranslationCache(path=db_path(tmp))
+        for i in range(300):                                                   # more than one write batch
+            first.put(f"text {i}", "english", "french", f"texte {i}", "google")
+        assert first.flush(5)
+        second = TranslationCache(path=db_path(tmp))
+        assert second.get("text 7", "english", "french") == ("texte 7", "google")
+        assert second.get_many([f"text {i}" for i in range(300)], "english", "french").keys() \
+               == {f"text {i}" for i in range(300)}
+        s = second.stats()
+        assert s["disk_hits"] == 300 and s["memory_hits"] == 1                 # "text 7" was promoted
+
+
+def test_disk_rows_expire_and_disk_false_skips_sqlite():
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = TranslationCache(path=db_path(tmp))
+        writer.put("hello", "english", "french", "bonjour", "google")
+        assert writer.flush(5)
+        reader = TranslationCache(path=db_path(tmp))
+        assert reader.get("hello", "english", "french", disk=False) is None
+        assert reader.stats()["misses"] == 0                                    # memory-only: not a miss yet
+        assert asyncio.run(reader.get_async("hello", "english", "french")) == ("bonjour", "google")
+        stale = TranslationCache(path=db_path(tmp), ttl=0)
+        time.sleep(0.01)
+        assert stale.get("hello", "english", "french") is None
+        assert stale.stats()["expired"] == 1
+
+
+def test_clear_empties_both_tiers():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TranslationCache(path=db_path(tmp))
+        cache.put("hello", "english", "french", "bonjour", "google")
+        cache.clear()
+        assert cache.get("hello", "english", "french") is None
+        assert TranslationCache(path=db_path(tmp)).get("hello", "english", "french") is None
+
+
+# ── Through the translator ────────────────────────────────────────────────────
+def test_translator_marks_cached_results():
+    import translator
+    text  = "the courier left the parcel at the neighbour's door"
+    saved = translation_cache._cache
+    with tempfile.TemporaryDirectory() as tmp:
+        translation_cache._cache = TranslationCache(path=db_path(tmp))
+        try:
+            translation_cache._cache.put(translator._norm(text), "english", "french",
+                                         "le coursier a laissé le colis", "google")
+            for result in (translator.translate(text, "english", "french"),
+                           asyncio.run(translator.translate_async(text, "english", "french"))):
+                assert result["translated"] == "le coursier a laissé le colis"
+                assert result["source"] == "google-cached"
+                assert result["confidence"] == 0.97                            # the provider's, kept
+        finally:
+            translation_cache._cache.flush(5)
+            translation_cache._cache = saved
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✅ {name}")
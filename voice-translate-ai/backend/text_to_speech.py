@@ -4,6 +4,10 @@
   Uses gTTS (Google Text-to-Speech) for audio synthesis
   Encodes output as base64 for streaming to browser
 =============================================================
+
+gTTS clips are cached by content (tts_cache.py): a reply already spoken in
+the same language and voice comes back from memory or disk without a
+network round-trip.  Pass `endpoint` so hit ratios are reported per route.
 """
 
 import os, time, base64, tempfile, io
@@ -20,6 +24,29 @@ try:
 except ImportError:
     PYTTSX3_AVAILABLE = False
 
+from provider_health import get_breaker
+from hedging import get_policy, hedged
+from tts_cache import get_cache, cache_key
+
+
+GTTS_PARAMS = {"slow": False}      # voice parameters; part of the cache key
+
+
+def _gtts_bytes(text: str, lang_code: str) -> bytes:
+    buf = io.BytesIO()
+    gTTS(text=text, lang=lang_code, **GTTS_PARAMS).write_to_fp(buf)
+    return buf.getvalue()
+
+
+def _probe_gtts():
+    _gtts_bytes("ok", "en")
+
+
+# While gTTS is down, skip straight to pyttsx3 instead of waiting for a timeout
+_gtts_breaker = get_breaker("gtts", probe=_probe_gtts if GTTS_AVAILABLE else None)
+# Optional second request when gTTS is slower than its recent p95 (HEDGING_ENABLED)
+_gtts_hedge   = get_policy("gtts")
+
 
 # ── Language code mapping for gTTS ───────────────────────────────────────────
 GTTS_LANG_MAP = {
@@ -34,7 +61,7 @@ GTTS_LANG_MAP = {
 }
 
 
-def synthesize(text: str, language: str = "french") -> dict:
+def synthesize(text: str, language: str = "french", endpoint: str = "default") -> dict:
     """
     Convert `text` to speech for the given language.
 
@@ -42,27 +69,43 @@ def synthesize(text: str, language: str = "french") -> dict:
       audio_b64  : base64-encoded MP3 bytes (play directly in browser)
       latency_ms : float
       engine     : str
+      cache      : "memory" | "disk" | "miss"
     """
     t0 = time.perf_counter()
     lang_code = GTTS_LANG_MAP.get(language.lower(), "fr")
 
+    # ── Cached gTTS clip (served even while gTTS is down) ────────────────────
+    cache = get_cache()
+    key   = cache_key(text, lang_code, "gTTS", GTTS_PARAMS)
+    hit   = cache.get(key, endpoint)
+    if hit:
+        return {
+            "audio_b64":  hit["audio_b64"],
+            "mime_type":  hit["mime_type"],
+            "latency_ms": round((time.perf_counter() - t0) * 1000, 2),
+            "engine":     "gTTS",
+            "cache":      hit["tier"],
+            "error":      None,
+        }
+
     # ── gTTS (online) ─────────────────────────────────────────────────────────
-    if GTTS_AVAILABLE:
+    if GTTS_AVAILABLE and _gtts_breaker.allow():
         try:
-            tts = gTTS(text=text, lang=lang_code, slow=False)
-            buf = io.BytesIO()
-            tts.write_to_fp(buf)
-            buf.seek(0)
-            audio_bytes = buf.read()
+            audio_bytes = hedged(_gtts_hedge, _gtts_bytes, text, lang_code)
+            _gtts_breaker.record_success()
+            audio_b64   = base64.b64encode(audio_bytes).decode("utf-8")
+            cache.put(key, audio_bytes, "audio/mpeg", audio_b64)
             latency     = round((time.perf_counter() - t0) * 1000, 2)
             return {
-                "audio_b64":  base64.b64encode(audio_bytes).decode("utf-8"),
+                "audio_b64":  audio_b64,
                 "mime_type":  "audio/mpeg",
                 "latency_ms": latency,
                 "engine":     "gTTS",
+                "cache":      "miss",
                 "error":      None,
             }
         except Exception as e:
+            _gtts_breaker.record_failure(e)
             print(f"[!] gTTS failed: {e}")
 
     # ── pyttsx3 (offline fallback) ────────────────────────────────────────────
@@ -82,6 +125,7 @@ def synthesize(text: str, language: str = "french") -> dict:
                 "mime_type":  "audio/wav",
                 "latency_ms": latency,
                 "engine":     "pyttsx3",
+                "cache":      "miss",
                 "error":      None,
             }
         except Exception as e:
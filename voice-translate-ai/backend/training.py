@@ -61,6 +61,9 @@ CONFIG = {
     "output_dir":      os.path.join(os.path.dirname(__file__), "..", "models", "finetuned"),
     "log_dir":         os.path.join(os.path.dirname(__file__), "..", "models", "logs"),
     "seed":            42,
+    # Deployment variants written after training (see model_export.py);
+    # None: model_export.DEFAULT_EXPORTS, i.e. the EXPORT_VARIANTS setting
+    "export_variants": None,
 }
 
 # Helsinki-NLP model mapping (language → pretrained checkpoint)
@@ -124,8 +127,11 @@ def simple_bleu(reference: str, hypothesis: str) -> float:
 
 
 # ─── Real Fine-Tuning (HuggingFace path) ─────────────────────────────────────
-def real_finetune(language: str = "french"):
-    """Fine-tunes a MarianMT model when HuggingFace libraries are available."""
+def real_finetune(language: str = "french", export: bool = True):
+    """
+    Fine-tunes a MarianMT model when HuggingFace libraries are available,
+    then exports its deployment variants and the comparison report.
+    """
     print(f"\n{'='*60}")
     print(f"  REAL FINE-TUNING — {language.upper()}")
     print(f"{'='*60}")
@@ -191,6 +197,15 @@ def real_finetune(language: str = "french"):
     tokenizer.save_pretrained(out_dir)
     print(f"\n[✓] Model saved to {out_dir}")
     print(f"[✓] Training completed in {elapsed:.1f}s")
+
+    if export:
+        import model_export
+        variants = CONFIG["export_variants"]
+        variants = model_export.DEFAULT_EXPORTS if variants is None else variants
+        if variants:
+            print(f"\n[~] Exporting deployment variants: {', '.join(variants)}")
+            model_export.export(out_dir, variants)
+            model_export.report(out_dir, language)
     return out_dir
 
 
@@ -317,13 +332,15 @@ if __name__ == "__main__":
                         help="Run for all 4 languages")
     parser.add_argument("--real",      action="store_true",
                         help="Use real HuggingFace training (requires GPU + models)")
+    parser.add_argument("--no-export", action="store_true",
+                        help="Skip the int8 / ONNX export after real training")
     args = parser.parse_args()
 
     languages = ["hindi", "german", "french", "spanish"] if args.all else [args.language]
 
     for lang in languages:
         if args.real and HF_AVAILABLE:
-            real_finetune(lang)
+            real_finetune(lang, export=not args.no_export)
         else:
             if args.real and not HF_AVAILABLE:
                 print("[!] HuggingFace not available — falling back to simulation.")
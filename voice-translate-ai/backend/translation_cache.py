@@ -0,0 +1,247 @@
+"""
+=============================================================
+  TRANSLATION CACHE — Real-Time Voice Translator
+  Two tiers in front of the translation providers:
+    1. in-process LRU with TTL and a size bound
+    2. persistent SQLite store (WAL mode) shared by every
+       uvicorn worker and surviving restarts
+=============================================================
+
+Keys are (normalized text, src_lang, tgt_lang, engine); the normalized
+text comes from translator._norm so "How are you?" and "how are you"
+share an entry.
+
+Only the in-memory tier is consulted inline.  On the event loop the SQLite
+lookup runs on a worker thread (get_async / get_many_async), and put()
+never touches the file: rows go onto a queue that one background thread
+writes out in batched transactions, so a slow or locked disk (5 s busy
+timeout) cannot stall requests or WebSockets.  flush() waits for the queue.
+
+Settings (environment):
+  TRANSLATION_CACHE_PATH   SQLite file  (default models/cache/translations.sqlite,
+                           empty string disables the disk tier)
+  TRANSLATION_CACHE_SIZE   in-memory entries  (default 10000)
+  TRANSLATION_CACHE_TTL    seconds before an entry is stale  (default 7 days)
+"""
+
+import os, time, queue, asyncio, sqlite3, threading
+from collections import OrderedDict
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "cache", "translations.sqlite")
+WRITE_QUEUE  = 10000             # pending disk writes before new ones are dropped
+WRITE_BATCH  = 256               # rows per write-behind transaction
+PRUNE_EVERY  = 1000              # disk writes between deletes of expired rows
+
+
+class TranslationCache:
+    def __init__(self, path: str | None = DEFAULT_PATH, max_entries: int = 10000,
+                 ttl: float = 7 * 24 * 3600):
+        self.path        = path
+        self.max_entries = max_entries
+        self.ttl         = ttl
+        self._mem: OrderedDict[tuple, tuple[str, str, float]] = OrderedDict()
+        self._lock  = threading.Lock()
+        self._local = threading.local()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0,
+                         "expired": 0, "writes": 0, "writes_dropped": 0, "disk_errors": 0}
+        self._queue       = queue.Queue(WRITE_QUEUE)
+        self._writer      = None
+        self._disk_writes = 0          # since the last prune
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    # ── SQLite (one connection per thread) ───────────────────────────────────
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " text TEXT, src TEXT, tgt TEXT, engine TEXT,"
+                " translated TEXT, source TEXT, stored_at REAL,"
+                " PRIMARY KEY (text, src, tgt, engine))"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    # ── Public API ────────────────────────────────────────────────────────────
+    def get(self, text: str, src: str, tgt: str, engine: str = "google", disk: bool = True):
+        """
+        Return (translated, source) or None.  disk=False looks at the
+        in-memory tier only and does not count a miss (the caller will ask
+        the disk tier next, typically via get_async()).
+        """
+        return self.get_many([text], src, tgt, engine, disk).get(text)
+
+    def get_many(self, texts: list[str], src: str, tgt: str, engine: str = "google",
+                 disk: bool = True) -> dict:
+        """{text: (translated, source)} for the texts found; one SQLite pass for the rest."""
+        found, rest = self._get_memory(texts, src, tgt, engine)
+        if rest and disk:
+            found.update(self._get_disk(rest, src, tgt, engine))
+        return found
+
+    async def get_async(self, text: str, src: str, tgt: str, engine: str = "google"):
+        return (await self.get_many_async([text], src, tgt, engine)).get(text)
+
+    async def get_many_async(self, texts: list[str], src: str, tgt: str, engine: str = "google") -> dict:
+        """get_many() for the event loop: memory inline, SQLite on a worker thread."""
+        found, rest = self._get_memory(texts, src, tgt, engine)
+        if rest:
+            if self.path:
+                found.update(await asyncio.to_thread(self._get_disk, rest, src, tgt, engine))
+            else:
+                found.update(self._get_disk(rest, src, tgt, engine))
+        return found
+
+    def _get_memory(self, texts: list[str], src: str, tgt: str, engine: str) -> tuple[dict, list]:
+        found, rest, now = {}, [], time.time()
+        with self._lock:
+            for text in texts:
+                key   = (text, src, tgt, engine)
+                entry = self._mem.get(key)
+                if entry is not None and now - entry[2] <= self.ttl:
+                    self._mem.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    found[text] = entry[0], entry[1]
+                    continue
+                if entry is not None:
+                    del self._mem[key]
+                    self.counters["expired"] += 1
+                rest.append(text)
+        return found, rest
+
+    def _get_disk(self, texts: list[str], src: str, tgt: str, engine: str) -> dict:
+        found, now = {}, time.time()
+        for text in texts:
+            key = (text, src, tgt, engine)
+            row = None
+            if self.path:
+                try:
+                    row = self._db().execute(
+                        "SELECT translated, source, stored_at FROM translations"
+                        " WHERE text=? AND src=? AND tgt=? AND engine=?", key
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"[!] Translation cache read failed: {e}")
+                    self._count("disk_errors")
+            if row and now - row[2] <= self.ttl:
+                self._remember(key, (row[0], row[1], row[2]))
+                self._count("disk_hits")
+                found[text] = row[0], row[1]
+                continue
+            if row:
+                self._count("expired")
+            self._count("misses")
+        return found
+
+    def put(self, text: str, src: str, tgt: str, translated: str, source: str,
+            engine: str = "google"):
+        """Memory tier now; the SQLite row is written behind by a background thread."""
+        key   = (text, src, tgt, engine)
+        entry = (translated, source, time.time())
+        self._remember(key, entry)
+        self._count("writes")
+        if self.path:
+            self._start_writer()
+            try:
+                self._queue.put_nowait(key + entry)
+            except queue.Full:
+                self._count("writes_dropped")             # disk is far behind; the memory tier still has it
+
+    # ── Write-behind ──────────────────────────────────────────────────────────
+    def _start_writer(self):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, daemon=True,
+                                                    name="translation-cache-writer")
+                    self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < WRITE_BATCH:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            db = None
+            try:
+                db = self._db()
+                db.execute("BEGIN")
+                db.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                with self._lock:
+                    self._disk_writes += len(rows)
+                    prune = self._disk_writes >= PRUNE_EVERY
+                    if prune:
+                        self._disk_writes = 0
+                if prune:
+                    # Keep the shared file from growing without bound.
+                    db.execute("DELETE FROM translations WHERE stored_at < ?",
+                               (time.time() - self.ttl,))
+                db.execute("COMMIT")
+            except sqlite3.Error as e:
+                print(f"[!] Translation cache write failed: {e}")
+                self._count("disk_errors")
+                try:
+                    if db is not None and db.in_transaction:
+                        db.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until queued writes reach SQLite; False on timeout."""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def _remember(self, key: tuple, entry: tuple):
+        with self._lock:
+            self._mem[key] = entry
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+        if self.path:
+            self.flush()
+            self._db().execute("DELETE FROM translations")
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+            c["memory_entries"] = len(self._mem)
+        c["write_queue"] = self._queue.qsize()
+        hits  = c["memory_hits"] + c["disk_hits"]
+        total = hits + c["misses"]
+        c["hit_ratio"] = round(hits / total, 4) if total else 0.0
+        return c
+
+
+# ── Shared instance used by translator.py ────────────────────────────────────
+_cache: TranslationCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> TranslationCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranslationCache(
+                path        = os.environ.get("TRANSLATION_CACHE_PATH", DEFAULT_PATH) or None,
+                max_entries = int(os.environ.get("TRANSLATION_CACHE_SIZE", 10000)),
+                ttl         = float(os.environ.get("TRANSLATION_CACHE_TTL", 7 * 24 * 3600)),
+            )
+        return _cache
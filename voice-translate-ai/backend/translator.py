@@ -9,7 +9,9 @@
            German  | French | Spanish
 =============================================================
 """
-import time, re, json, os
+import time, re, json, os, asyncio, threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 
 # ── deep-translator (Google Translate wrapper — free, no API key needed) ───────
 try:
@@ -18,12 +20,29 @@ try:
 except ImportError:
     GOOGLE_AVAILABLE = False
 
-# Language detection (optional)
-try:
-    from langdetect import detect, detect_langs
-    LANG_DETECT_AVAILABLE = True
-except Exception:
-    LANG_DETECT_AVAILABLE = False
+# ── Pooled async HTTP client (used by translate_async) ────────────────────────
+from http_pool import HTTPX_AVAILABLE, google_translate_async, probe_google
+
+# ── Circuit breaker: fail fast to the dictionary while Google is down ─────────
+from provider_health import get_breaker, BreakerOpen
+
+# ── Hedged requests against slow provider responses (HEDGING_ENABLED) ────────
+from hedging import get_policy, hedged, hedged_async
+
+# ── Translation result cache (memory LRU + shared SQLite) ─────────────────────
+from translation_cache import get_cache
+
+# ── Substring index for fuzzy phrase matching ─────────────────────────────────
+from phrase_index import PhraseIndex
+
+# ── Compiled phrase store (PHRASE_TABLE + dataset corpus, memory-mapped) ──────
+import phrase_store
+
+# ── Sentence segmentation for long inputs ─────────────────────────────────────
+import segmenter
+
+# ── Offline language identification (script histogram + n-gram model) ───────
+import langid
 
 # Map two-letter language codes → internal language keys
 LANG_CODE_MAP = {
@@ -124,6 +143,8 @@ PHRASE_TABLE = {
 
 # ── Build reverse lookup: any language phrase → english key ───────────────────
 _REVERSE = {}
+_INDEX: PhraseIndex | None = None
+_STORE: "phrase_store.PhraseStore | None" = None
 
 def _norm(text):
     """Normalize text for matching - remove punctuation, lowercase, strip"""
@@ -139,161 +160,813 @@ def _fuzzy_match(norm_in, threshold=0.6):
     if norm_in in _REVERSE:
         return _REVERSE[norm_in]
 
-    # Try substring matching (both directions)
-    matches = []
-    for key, value in _REVERSE.items():
-        if not key:
-            continue
-        # Check if normalized input is in key or key is in normalized input
-        if norm_in in key:
-            similarity = len(norm_in) / len(key)
-            matches.append((similarity, value))
-        elif key in norm_in:
-            similarity = len(key) / len(norm_in)
-            matches.append((similarity, value))
-
-    if matches:
-        # Return the best match (highest similarity)
-        best_match = max(matches, key=lambda x: x[0])
-        if best_match[0] >= threshold:
-            return best_match[1]
-
-    return None
+    # Substring matching (both directions) through the index built with _REVERSE
+    if _INDEX is None:
+        return None
+    return _INDEX.best_match(norm_in, threshold)
 
 
 def detect_language(text: str):
     """Detect language code and map to internal language key.
 
-    Returns (lang_key, confidence) or (None, 0.0) if detection unavailable.
+    Returns (lang_key, confidence) or (None, 0.0) if the text has no letters.
     """
-    if not LANG_DETECT_AVAILABLE or not text or not text.strip():
-        return (None, 0.0)
-    try:
-        # detect_langs returns list like [LangProb(lang='en', prob=0.99), ...]
-        candidates = detect_langs(text)
-        if not candidates:
-            return (None, 0.0)
-        top = candidates[0]
-        code = str(top.lang)
-        conf = float(top.prob)
-        mapped = LANG_CODE_MAP.get(code)
-        return (mapped, conf) if mapped else (None, conf)
-    except Exception:
-        try:
-            code = detect(text)
-            mapped = LANG_CODE_MAP.get(code)
-            return (mapped, 0.5) if mapped else (None, 0.5)
-        except Exception:
-            return (None, 0.0)
+    return langid.detect(text)
 
 def _build_reverse():
-    global _REVERSE
+    global _REVERSE, _INDEX, _STORE
     if _REVERSE:
         return
+    # One entry per phrase per language: input is always looked up by _norm(),
+    # so the raw lower-cased spelling never matches anything _norm() doesn't.
+    reverse = {}
     for en_key, langs in PHRASE_TABLE.items():
         for lang, phrase in langs.items():
-            _REVERSE[_norm(phrase)] = en_key
-            _REVERSE[phrase.lower().strip()] = en_key
+            reverse[_norm(phrase)] = en_key
+    _STORE   = phrase_store.load_or_build(PHRASE_TABLE, _norm, sources=(__file__,))
+    _INDEX   = PhraseIndex(reverse)
+    _REVERSE = reverse
+
+
+def phrase_store_stats() -> dict:
+    _build_reverse()
+    return _STORE.stats() if _STORE is not None else {"loaded": False}
 
 # ── Core translate ─────────────────────────────────────────────────────────────
-def translate(text: str, src_lang: str = "english", tgt_lang: str = "telugu") -> dict:
-    t0 = time.perf_counter()
+AUTO = "auto"
+
+
+def _local_detect(text: str) -> str:
+    """Offline source detection for auto requests the provider won't see."""
+    det_key, det_conf = detect_language(text)
+    # fallback to english when detection finds no letters
+    return det_key or "english"
+
+
+def _analyze(text: str, src_lang: str) -> dict:
+    """
+    Per-utterance work shared by every target language: resolve the source
+    language, normalize once, and collect the phrase rows the normalized
+    text hits, in precedence order, as [(row, source), ...].
+
+    'auto' / 'detect' stay AUTO here: the provider detects the source as part
+    of the translation, so no local detection pass runs up front.
+    """
     _build_reverse()
-    # Validate and normalize language codes
     src_lang = src_lang.lower().strip()
-    tgt_lang = tgt_lang.lower().strip()
-
-    detected_src = None
-    # Allow 'auto' / 'detect' for automatic source-language detection
     if src_lang in ("auto", "detect"):
-        det_key, det_conf = detect_language(text)
-        if det_key:
-            detected_src = det_key
-            src_lang = det_key
-        else:
-            # fallback to english when detection unavailable
-            src_lang = "english"
+        src_lang = AUTO
+
+    shared = {"src_lang": src_lang, "detected_src": None, "norm": None, "hits": []}
+    if (src_lang not in LANGUAGES and src_lang != AUTO) or not text or not text.strip():
+        return shared
+
+    norm_in = shared["norm"] = _norm(text)
+    # Exact match against the compiled store (phrase table + dataset corpus)
+    row = None
+    if _STORE is not None:
+        hit = _STORE.lookup(norm_in)
+        if hit:
+            row, origin = hit
+            shared["hits"].append((row, "dictionary" if origin == phrase_store.ORIGIN_TABLE else "corpus"))
+    elif _REVERSE.get(norm_in) in PHRASE_TABLE:
+        row = PHRASE_TABLE[_REVERSE[norm_in]]
+        shared["hits"].append((row, "dictionary"))
+    # Fuzzy matching against the phrase table (only useful if the exact row has gaps)
+    if row is None or len(row) < len(TARGET_LANGUAGES):
+        en_key = _fuzzy_match(norm_in)
+        if en_key and en_key in PHRASE_TABLE:
+            shared["hits"].append((PHRASE_TABLE[en_key], "dictionary"))
+    return shared
+
+
+def _prepare(text: str, src_lang: str, tgt_lang: str, t0: float, shared: dict | None = None,
+             disk: bool = True):
+    """
+    Shared front half of translate() / translate_async(): resolve and validate
+    languages, then try the phrase dictionary and the translation cache.  Pass
+    `shared` (from _analyze()) to reuse one utterance's analysis across target
+    languages.  disk=False checks only the in-memory cache tier; async callers
+    use _prepare_async(), which asks SQLite off the event loop.
+
+    Returns (ctx, result).  `result` is a finished response when no provider
+    call is needed; otherwise `ctx` carries what the provider steps need.
+    """
+    if shared is None:
+        shared = _analyze(text, src_lang)
+    src_lang     = shared["src_lang"]
+    detected_src = shared["detected_src"]
+    tgt_lang     = tgt_lang.lower().strip()
+
+    # Auto source: dictionary answers are only valid for a known source, so a
+    # phrase hit (or empty text) is the one case that detects locally
+    if src_lang == AUTO and (not text or not text.strip()
+                             or any(row.get(tgt_lang) for row, _ in shared["hits"])):
+        src_lang = detected_src = _local_detect(text)
 
     # Check if languages are supported
-    if src_lang not in LANGUAGES:
-        return _make(text, f"❌ Source language '{src_lang}' not supported", "error", src_lang, tgt_lang, t0, detected_src)
+    if src_lang not in LANGUAGES and src_lang != AUTO:
+        return None, _make(text, f"❌ Source language '{src_lang}' not supported", "error", src_lang, tgt_lang, t0, detected_src)
     if tgt_lang not in LANGUAGES:
-        return _make(text, f"❌ Target language '{tgt_lang}' not supported", "error", src_lang, tgt_lang, t0, detected_src)
+        return None, _make(text, f"❌ Target language '{tgt_lang}' not supported", "error", src_lang, tgt_lang, t0, detected_src)
 
     # Same language = no translation needed
     if src_lang == tgt_lang:
-        return _make(text, text, "same-language", src_lang, tgt_lang, t0, detected_src)
+        return None, _make(text, text, "same-language", src_lang, tgt_lang, t0, detected_src)
 
     # Validate input text
     if not text or not text.strip():
-        return _make(text, "[No text provided]", "error", src_lang, tgt_lang, t0, detected_src)
+        return None, _make(text, "[No text provided]", "error", src_lang, tgt_lang, t0, detected_src)
+
+    ctx = {
+        "src_lang":     src_lang,
+        "tgt_lang":     tgt_lang,
+        "src_code":     AUTO if src_lang == AUTO else LANGUAGES[src_lang].get("google_code", "en"),
+        "tgt_code":     LANGUAGES[tgt_lang].get("google_code", "en"),
+        "detected_src": detected_src,
+        "round_trips":  0,
+        "provider_ms":  0.0,
+    }
+
+    # ── 1. Dictionary first (for common phrases — always accurate) ─────────────
+    for row, source in shared["hits"]:
+        translated = row.get(tgt_lang)
+        if translated:
+            return None, _make(text, translated, source, src_lang, tgt_lang, t0, detected_src)
+
+    # ── 1b. Cached provider result for a repeated utterance ───────────────────
+    norm_in = ctx["norm"] = shared["norm"]
+    for engine in (_engines_for(ctx) if norm_in else ()):
+        hit = get_cache().get(norm_in, src_lang, tgt_lang, engine.name, disk=disk)
+        if hit:
+            return None, _cached_result(text, hit, ctx, t0)
+
+    return ctx, None
+
+
+async def _prepare_async(text: str, src_lang: str, tgt_lang: str, t0: float,
+                         shared: dict | None = None):
+    """_prepare() without blocking the loop: the SQLite cache tier runs on a worker thread."""
+    ctx, result = _prepare(text, src_lang, tgt_lang, t0, shared, disk=False)
+    if ctx is not None and ctx["norm"]:
+        for engine in _engines_for(ctx):
+            hit = await get_cache().get_async(ctx["norm"], ctx["src_lang"], ctx["tgt_lang"], engine.name)
+            if hit:
+                return None, _cached_result(text, hit, ctx, t0)
+    return ctx, result
+
+
+def _cached_result(text: str, hit: tuple, ctx: dict, t0: float) -> dict:
+    translated, source = hit
+    src_lang, detected_src = ctx["src_lang"], ctx["detected_src"]
+    if src_lang == AUTO:
+        src_lang = detected_src = _local_detect(text)
+    return _make(text, translated, f"{source}-cached", src_lang, ctx["tgt_lang"], t0, detected_src)
+
+
+def _finish(text: str, translated, source: str, ctx: dict, t0: float) -> dict:
+    # ── 4. Graceful message if all methods fail ───────────────────────────────
+    if not translated:
+        translated = f"⚠️ Translation unavailable (no phrase for '{text}')"
+        source = "not-found"
+    elif (ctx["src_lang"] == AUTO and ctx["detected_src"] == ctx["tgt_lang"]
+          and source.removesuffix("-wordwise") in ENGINES):
+        # The provider found the text already in the target language: the same
+        # answer a known source gets from _prepare(), and nothing is cached
+        result = _make(text, text, "same-language", ctx["tgt_lang"], ctx["tgt_lang"], t0, ctx["detected_src"])
+        result["round_trips"] = ctx["round_trips"]
+        result["provider_ms"] = round(ctx["provider_ms"], 2)
+        return result
+    elif source in ENGINES and ctx["norm"]:
+        # Word-wise output is a degraded fallback; only whole-sentence results are cached
+        get_cache().put(ctx["norm"], ctx["src_lang"], ctx["tgt_lang"], translated, source, source)
+    src_lang = ctx["src_lang"]
+    if src_lang == AUTO:
+        # Provider-reported source; local detection only if it never answered
+        ctx["detected_src"] = ctx["detected_src"] or _local_detect(text)
+        src_lang = ctx["detected_src"]
+    result = _make(text, translated, source, src_lang, ctx["tgt_lang"], t0, ctx["detected_src"])
+    if ctx.get("transport") and source.removesuffix("-wordwise") == _GOOGLE.name:
+        result["model_used"] = f"{_GOOGLE.label} ({ctx['transport']})"
+    result["round_trips"] = ctx["round_trips"]
+    result["provider_ms"] = round(ctx["provider_ms"], 2)
+    return result
+
+
+# ── Provider calls (every round-trip is counted on the request context) ──────
+def _probe_google():
+    if HTTPX_AVAILABLE:
+        probe_google()
+    else:
+        GoogleTranslator(source="en", target="fr").translate("hello")
+
+
+_google_breaker = get_breaker("google_translate", probe=_probe_google)
+_google_hedge   = get_policy("google_translate")
+_ctx_lock = threading.Lock()   # the sync word-wise fan-out updates ctx from pool threads
+
+
+def _call_google(ctx: dict, text: str) -> str:
+    _google_breaker.check()
+    ctx["transport"] = "deep-translator"
+    t = time.perf_counter()
+    try:
+        translated = hedged(_google_hedge,
+                            lambda: GoogleTranslator(source=ctx["src_code"], target=ctx["tgt_code"]).translate(text))
+    except Exception as e:
+        _google_breaker.record_failure(e)
+        raise
+    except BaseException:
+        _google_breaker.release()
+        raise
+    finally:
+        with _ctx_lock:
+            ctx["round_trips"] += 1
+            ctx["provider_ms"] += (time.perf_counter() - t) * 1000
+    _google_breaker.record_success()
+    return translated
+
+
+async def _call_google_async(ctx: dict, text: str) -> str:
+    _google_breaker.check()
+    ctx["transport"] = "httpx keep-alive"
+    t = time.perf_counter()
+    ctx["round_trips"] += 1
+    try:
+        translated, detected = await hedged_async(_google_hedge, google_translate_async,
+                                                  text, ctx["src_code"], ctx["tgt_code"])
+    except Exception as e:
+        _google_breaker.record_failure(e)
+        raise
+    except BaseException:                     # cancelled (client gone): free the half-open trial
+        _google_breaker.release()
+        raise
+    finally:
+        ctx["provider_ms"] += (time.perf_counter() - t) * 1000
+    _google_breaker.record_success()
+    if ctx["src_code"] == AUTO and detected and not ctx["detected_src"]:
+        ctx["detected_src"] = LANG_CODE_MAP.get(detected.split("-")[0].lower())
+    return translated
+
+
+# ── MT engines (step 2 of the pipeline) ──────────────────────────────────────
+# Engines are tried in MT_ENGINES order (comma-separated names); the first one
+# that supports the language pair and returns text wins, and its name becomes
+# the result's `source` and its translation-cache engine.  Word-wise fallback
+# stays Google-only.
+class Engine:
+    """A machine-translation backend.  Subclass, then register_engine()."""
+    name       = ""
+    label      = ""       # model_used in responses
+    confidence = 0.9
+
+    def supports(self, ctx: dict) -> bool:
+        return True
+
+    def translate(self, ctx: dict, text: str) -> str:
+        raise NotImplementedError
+
+    async def translate_async(self, ctx: dict, text: str) -> str:
+        from workers import run_stage
+        return await run_stage("mt", self.translate, ctx, text)
+
+
+class GoogleEngine(Engine):
+    name       = "google"
+    label      = "Google Translate"      # _finish adds the transport actually used
+    confidence = 0.97
+
+    def translate(self, ctx: dict, text: str) -> str:
+        return _call_google(ctx, text)
+
+    async def translate_async(self, ctx: dict, text: str) -> str:
+        return await _call_google_async(ctx, text)
+
+
+class MarianEngine(Engine):
+    """
+    Fine-tuned English → X checkpoints (marian_engine.py), micro-batched on
+    the CPU.  torch/transformers are only imported once the engine is enabled.
+    """
+    name       = "marian"
+    label      = "MarianMT (fine-tuned, local)"
+    confidence = 0.93
+
+    def __init__(self):
+        self._languages = None
+
+    def supports(self, ctx: dict) -> bool:
+        import marian_engine
+        if self._languages is None:
+            self._languages = set(marian_engine.available_languages())
+        return ctx["src_lang"] == "english" and ctx["tgt_lang"] in self._languages
+
+    def translate(self, ctx: dict, text: str) -> str:
+        import marian_engine
+        t = time.perf_counter()
+        try:
+            return marian_engine.get_translator(ctx["tgt_lang"]).translate(text)
+        finally:
+            with _ctx_lock:
+                ctx["provider_ms"] += (time.perf_counter() - t) * 1000
+
+    async def translate_async(self, ctx: dict, text: str) -> str:
+        import marian_engine
+        t = time.perf_counter()
+        try:
+            if not marian_engine.is_loaded(ctx["tgt_lang"]):
+                from workers import run_stage
+                await run_stage("mt", marian_engine.get_translator, ctx["tgt_lang"])
+            return await marian_engine.get_translator(ctx["tgt_lang"]).translate_async(text)
+        finally:
+            ctx["provider_ms"] += (time.perf_counter() - t) * 1000
+
+
+ENGINES: dict[str, Engine] = {}
+MT_ENGINES = [n.strip() for n in os.environ.get("MT_ENGINES", "google").split(",") if n.strip()]
+
+
+def register_engine(engine: Engine):
+    ENGINES[engine.name] = engine
+
+
+register_engine(GoogleEngine())
+register_engine(MarianEngine())
+_GOOGLE = ENGINES["google"]
+
+
+def _engines_for(ctx: dict) -> list[Engine]:
+    return [ENGINES[n] for n in MT_ENGINES if n in ENGINES and ENGINES[n].supports(ctx)]
+
+
+def engine_stats() -> dict:
+    stats = {"order": MT_ENGINES, "registered": sorted(ENGINES)}
+    if "marian" in MT_ENGINES:
+        import marian_engine
+        stats["marian"] = marian_engine.stats()
+    return stats
+
+
+# ── Word-wise fallback ────────────────────────────────────────────────────────
+# When the whole-sentence call fails, distinct words are looked up in the word
+# cache and the rest go out as ONE newline-delimited request.  Only if the
+# provider mangles the batch (line count differs) do we fan out per word, at
+# most WORDWISE_CONCURRENCY at a time.
+WORDWISE_CONCURRENCY = int(os.environ.get("WORDWISE_CONCURRENCY", 8))
+WORD_CACHE_ENGINE    = "google-word"
+_BATCH_SEP           = "\n"
+
+
+def _wordwise_keys(words: list[str]) -> dict:
+    return {word: _norm(word) for word in dict.fromkeys(words)}
+
+
+def _wordwise_split(keys: dict, hits: dict) -> tuple[dict, list[str]]:
+    known, pending = {}, []
+    for word, key in keys.items():
+        if key in hits:
+            known[word] = hits[key][0]
+        else:
+            pending.append(word)
+    return known, pending
+
+
+def _wordwise_pending(words: list[str], ctx: dict) -> tuple[dict, list[str]]:
+    """Split distinct words into cached translations and ones still to fetch."""
+    keys = _wordwise_keys(words)
+    hits = get_cache().get_many([k for k in keys.values() if k], ctx["src_lang"], ctx["tgt_lang"],
+                                WORD_CACHE_ENGINE)
+    return _wordwise_split(keys, hits)
+
+
+async def _wordwise_pending_async(words: list[str], ctx: dict) -> tuple[dict, list[str]]:
+    keys = _wordwise_keys(words)
+    hits = await get_cache().get_many_async([k for k in keys.values() if k], ctx["src_lang"],
+                                            ctx["tgt_lang"], WORD_CACHE_ENGINE)
+    return _wordwise_split(keys, hits)
 
-    src_code = LANGUAGES[src_lang].get("google_code", "en")
-    tgt_code = LANGUAGES[tgt_lang].get("google_code", "en")
+
+def _wordwise_store(known: dict, fetched: dict, ctx: dict):
+    for word, tw in fetched.items():
+        key = _norm(word)
+        if tw and key:
+            get_cache().put(key, ctx["src_lang"], ctx["tgt_lang"], tw, "google", WORD_CACHE_ENGINE)
+    known.update(fetched)
+
+
+def _split_batch(pending: list[str], batch) -> dict | None:
+    lines = batch.split(_BATCH_SEP) if batch else []
+    if len(lines) != len(pending):
+        return None
+    return {word: line.strip() for word, line in zip(pending, lines)}
+
+
+def _wordwise(text: str, ctx: dict) -> str:
+    words = text.split()
+    known, pending = _wordwise_pending(words, ctx)
+    if pending:
+        fetched = None
+        try:
+            fetched = _split_batch(pending, _call_google(ctx, _BATCH_SEP.join(pending)))
+        except BreakerOpen:
+            raise
+        except Exception as e:
+            print(f"[!] Word-wise batch error: {e}")
+        if fetched is None:
+            def one(word):
+                try:
+                    return _call_google(ctx, word)
+                except Exception:
+                    return None
+            with ThreadPoolExecutor(max_workers=min(WORDWISE_CONCURRENCY, len(pending))) as pool:
+                fetched = dict(zip(pending, pool.map(one, pending)))
+        _wordwise_store(known, fetched, ctx)
+    if not any(known.values()):
+        return None
+    return " ".join(known.get(word) or word for word in words)
+
+
+async def _wordwise_async(text: str, ctx: dict) -> str:
+    words = text.split()
+    known, pending = await _wordwise_pending_async(words, ctx)
+    if pending:
+        fetched = None
+        try:
+            fetched = _split_batch(pending, await _call_google_async(ctx, _BATCH_SEP.join(pending)))
+        except BreakerOpen:
+            raise
+        except Exception as e:
+            print(f"[!] Word-wise batch error: {e}")
+        if fetched is None:
+            sem = asyncio.Semaphore(WORDWISE_CONCURRENCY)
+            async def one(word):
+                async with sem:
+                    try:
+                        return await _call_google_async(ctx, word)
+                    except Exception:
+                        return None
+            fetched = dict(zip(pending, await asyncio.gather(*(one(w) for w in pending))))
+        _wordwise_store(known, fetched, ctx)
+    if not any(known.values()):
+        return None
+    return " ".join(known.get(word) or word for word in words)
+
+
+def translate(text: str, src_lang: str = "english", tgt_lang: str = "telugu") -> dict:
+    t0 = time.perf_counter()
+    ctx, result = _prepare(text, src_lang, tgt_lang, t0)
+    if result:
+        return result
+    return _provider_translate(text, ctx, t0)
+
+
+def _provider_translate(text: str, ctx: dict, t0: float) -> dict:
+    """Steps 2–4 of translate() for text the dictionary and cache missed."""
+    pairs = _segments(text)
+    if pairs:
+        return _translate_segments(text, pairs, ctx, t0)
 
     translated = None
     source = "not-found"
 
-    # ── 1. Dictionary first (for common phrases — always accurate) ─────────────
-    norm_in = _norm(text)
+    # ── 2. MT engines — Google handles ANY word/sentence ─────────────────────
+    engines     = _engines_for(ctx)
+    provider_up = GOOGLE_AVAILABLE and _GOOGLE in engines
+    for engine in engines:
+        if engine is _GOOGLE and not provider_up:
+            continue
+        try:
+            translated = engine.translate(ctx, text)
+        except BreakerOpen:
+            provider_up = False
+        except Exception as e:
+            print(f"[!] {engine.label} error for '{text}': {e}")
+        if translated:
+            source = engine.name
+            break
+
+    # ── 3. Last resort: try to translate individual words ─────────────────────
+    if not translated and provider_up:
+        try:
+            translated = _wordwise(text, ctx)
+            source = "google-wordwise"
+        except Exception as e:
+            print(f"[!] Word-wise translation error: {e}")
+
+    return _finish(text, translated, source, ctx, t0)
 
-    # Try exact match combined with fuzzy matching
-    en_key = _REVERSE.get(norm_in) or _REVERSE.get(text.lower().strip())
-    if not en_key:
-        en_key = _fuzzy_match(norm_in)
 
-    if en_key and en_key in PHRASE_TABLE:
-        translated = PHRASE_TABLE[en_key].get(tgt_lang)
-        source = "dictionary"
+async def translate_async(text: str, src_lang: str = "english", tgt_lang: str = "telugu") -> dict:
+    """
+    Event-loop friendly translate(): same pipeline, but provider calls go over
+    the shared keep-alive client in http_pool instead of a fresh
+    GoogleTranslator (and TCP/TLS handshake) per call.
+    """
+    if not HTTPX_AVAILABLE:
+        from workers import run_stage
+        return await run_stage("mt", translate, text, src_lang, tgt_lang)
+
+    t0 = time.perf_counter()
+    ctx, result = await _prepare_async(text, src_lang, tgt_lang, t0)
+    if result:
+        return result
+    return await _provider_translate_async(text, ctx, t0)
 
-    # ── 2. Google Translate for custom phrases (handles ANY word/sentence) ────
-    if not translated and GOOGLE_AVAILABLE:
+
+async def _provider_translate_async(text: str, ctx: dict, t0: float) -> dict:
+    """Steps 2–4 of translate_async() for text the dictionary and cache missed."""
+    pairs = _segments(text)
+    if pairs:
+        return await _translate_segments_async(text, pairs, ctx, t0)
+
+    translated = None
+    source = "not-found"
+
+    # ── 2. MT engines — Google over the pooled connection ────────────────────
+    engines     = _engines_for(ctx)
+    provider_up = _GOOGLE in engines
+    for engine in engines:
+        if engine is _GOOGLE and not provider_up:
+            continue
         try:
-            translated = GoogleTranslator(source=src_code, target=tgt_code).translate(text)
-            source = "google"
+            translated = await engine.translate_async(ctx, text)
+        except BreakerOpen:
+            provider_up = False
         except Exception as e:
-            print(f"[!] Google Translate error for '{text}': {e}")
+            print(f"[!] {engine.label} error for '{text}': {e}")
+        if translated:
+            source = engine.name
+            break
 
     # ── 3. Last resort: try to translate individual words ─────────────────────
-    if not translated and GOOGLE_AVAILABLE:
+    if not translated and provider_up:
         try:
-            words = text.split()
-            translated_words = []
-            for word in words:
-                try:
-                    tw = GoogleTranslator(source=src_code, target=tgt_code).translate(word)
-                    translated_words.append(tw)
-                except:
-                    translated_words.append(word)
-            translated = " ".join(translated_words)
+            translated = await _wordwise_async(text, ctx)
             source = "google-wordwise"
         except Exception as e:
             print(f"[!] Word-wise translation error: {e}")
 
-    # ── 4. Graceful message if all methods fail ───────────────────────────────
-    if not translated:
-        translated = f"⚠️ Translation unavailable (no phrase for '{text}')"
-        source = "not-found"
+    return _finish(text, translated, source, ctx, t0)
+
+
+# ── Long inputs: translate sentence by sentence ──────────────────────────────
+# Inputs of SEGMENT_MIN_CHARS or more are split into sentences (segmenter.py).
+# Every segment goes through the normal pipeline on its own — dictionary,
+# cache, provider, word-wise — at most SEGMENT_CONCURRENCY at a time, so a
+# long paragraph costs about one segment's latency and never falls into the
+# word-wise path as a whole.  A segment that cannot be translated is kept as
+# is; the whole result is only cached if every segment came from the provider
+# or the dictionary.
+SEGMENT_MIN_CHARS   = int(os.environ.get("SEGMENT_MIN_CHARS", 400))
+SEGMENT_CONCURRENCY = int(os.environ.get("SEGMENT_CONCURRENCY", 16))
+
+
+def _segments(text: str) -> list[tuple[str, str]] | None:
+    """(segment, separator) pairs if `text` should be segmented, else None."""
+    if len(text) < SEGMENT_MIN_CHARS:
+        return None
+    pairs = segmenter.split(text)
+    return pairs if len(pairs) > 1 else None
+
+
+def _translate_segment(seg: str, ctx: dict, t0: float) -> dict | None:
+    if not seg.strip():
+        return None
+    sctx, result = _prepare(seg, ctx["src_lang"], ctx["tgt_lang"], t0)
+    return result or _provider_translate(seg, sctx, t0)
+
+
+async def _translate_segment_async(seg: str, ctx: dict, t0: float, sem: asyncio.Semaphore) -> dict | None:
+    if not seg.strip():
+        return None
+    sctx, result = await _prepare_async(seg, ctx["src_lang"], ctx["tgt_lang"], t0)
+    if result:
+        return result
+    async with sem:
+        return await _provider_translate_async(seg, sctx, t0)
+
+
+def _join_segments(text: str, pairs: list, outs: list, ctx: dict, t0: float) -> dict:
+    parts, good = [], []
+    for (seg, sep), out in zip(pairs, outs):
+        if out and out["source"] not in ("error", "not-found"):
+            parts.append(out["translated"] + sep)
+            good.append(out)
+        else:
+            parts.append(seg + sep)
+        if out:
+            ctx["round_trips"] += out.get("round_trips", 0)
+            ctx["provider_ms"] += out.get("provider_ms", 0.0)
+            ctx["detected_src"] = ctx["detected_src"] or out.get("detected_src")
+    total      = sum(out is not None for out in outs)       # blank segments are not attempted
+    translated = "".join(parts).strip() if good else None
+    # Label by where the segments really came from: a provider engine if any
+    # segment used one (then _finish caches the join), else the phrase store
+    # (then nothing is written to the provider cache).  Word-wise segments
+    # make the whole join word-wise; untranslated ones make it "partial",
+    # which names no provider and is never cached.
+    sources  = [o["source"].removesuffix("-cached") for o in good]
+    wordwise = next((src for src in sources if src.endswith("-wordwise")), None)
+    engine   = wordwise or next((src for src in sources if src in ENGINES), None)
+    if not engine:
+        engine = sources[0] if len(set(sources)) == 1 else "dictionary"
+    partial = bool(good) and len(good) < total
+    result  = _finish(text, translated, "partial" if partial else engine, ctx, t0)
+    if partial:
+        result["confidence"] = round(min(o["confidence"] for o in good) * len(good) / total, 2)
+        result["model_used"] = f"partial ({len(good)}/{total} segments translated)"
+    else:
+        result["model_used"] = next((o["model_used"] for o in good
+                                     if o["source"].removesuffix("-cached") == result["source"]),
+                                    result["model_used"])
+    result["segments"] = len(pairs)
+    return result
+
+
+def _translate_segments(text: str, pairs: list, ctx: dict, t0: float) -> dict:
+    with ThreadPoolExecutor(max_workers=min(SEGMENT_CONCURRENCY, len(pairs))) as pool:
+        outs = list(pool.map(lambda pair: _translate_segment(pair[0], ctx, t0), pairs))
+    return _join_segments(text, pairs, outs, ctx, t0)
+
+
+async def _translate_segments_async(text: str, pairs: list, ctx: dict, t0: float) -> dict:
+    sem  = asyncio.Semaphore(SEGMENT_CONCURRENCY)
+    outs = await asyncio.gather(*(_translate_segment_async(seg, ctx, t0, sem) for seg, _ in pairs))
+    return _join_segments(text, pairs, outs, ctx, t0)
+
+
+# ── Batch translation ─────────────────────────────────────────────────────────
+# Identical items are translated once; dictionary and cache hits never leave
+# the process; the rest is packed, per language pair, into newline-delimited
+# multi-segment requests of up to BATCH_SEGMENT_CHARS, at most
+# BATCH_CONCURRENCY in flight.  A request whose line count comes back wrong is
+# retried item by item.  The chunk travels in a GET query string, so its size
+# is counted percent-encoded: a Devanagari character is 9 bytes of URL.
+BATCH_CONCURRENCY   = int(os.environ.get("BATCH_CONCURRENCY", 8))
+BATCH_SEGMENT_CHARS = int(os.environ.get("BATCH_SEGMENT_CHARS", 2000))
+
+
+def _url_len(text: str) -> int:
+    return len(quote(text, safe=""))
+
+
+def _batch_chunks(pending: list[tuple]) -> list[list[tuple]]:
+    """Group (text, ctx) pairs by language pair into provider-sized chunks."""
+    by_pair: dict[tuple, list[tuple]] = {}
+    for text, ctx in pending:
+        by_pair.setdefault((ctx["src_code"], ctx["tgt_code"]), []).append((text, ctx))
+    chunks = []
+    for group in by_pair.values():
+        chunk, size = [], 0
+        for text, ctx in group:
+            if _BATCH_SEP in text or len(text) >= SEGMENT_MIN_CHARS or _engines_for(ctx)[:1] != [_GOOGLE]:
+                # can't be delimited / gets segmented / another engine (which batches itself)
+                chunks.append([(text, ctx)])
+                continue
+            length = _url_len(text) + len(quote(_BATCH_SEP))
+            if chunk and size + length > BATCH_SEGMENT_CHARS:
+                chunks.append(chunk)
+                chunk, size = [], 0
+            chunk.append((text, ctx))
+            size += length
+        if chunk:
+            chunks.append(chunk)
+    return chunks
+
+
+async def translate_batch_async(items: list[tuple[str, str, str]]) -> dict:
+    """
+    Translate many (text, src_lang, tgt_lang) items in one go.
+
+    Returns {"results", "unique", "round_trips"}.  Results come back in input
+    order, each with its own source and latency_ms (time from the start of the
+    batch until that item resolved); multi-segment results carry the chunk's
+    round_trips and `batch_size`.
+    """
+    t0      = time.perf_counter()
+    results = [None] * len(items)
+    slots: dict[tuple, list[int]] = {}
+    for i, (text, src, tgt) in enumerate(items):
+        key = (_norm(text) or text, src.lower().strip(), tgt.lower().strip())
+        slots.setdefault(key, []).append(i)
+
+    resolved: dict[tuple, dict] = {}
+    pending:  list[tuple] = []
+    trips = 0
+    keys_by_ctx: dict[int, tuple] = {}
+    prepared = await asyncio.gather(*(_prepare_async(*items[idxs[0]], t0) for idxs in slots.values()))
+    for (key, idxs), (ctx, result) in zip(slots.items(), prepared):
+        text = items[idxs[0]][0]
+        if result:
+            resolved[key] = result
+        else:
+            pending.append((text, ctx))
+            keys_by_ctx[id(ctx)] = key
+
+    if pending and not HTTPX_AVAILABLE:
+        from workers import run_stage
+        outs = await asyncio.gather(*(run_stage("mt", translate, text, ctx["src_lang"], ctx["tgt_lang"])
+                                      for text, ctx in pending))
+        for (text, ctx), out in zip(pending, outs):
+            resolved[keys_by_ctx[id(ctx)]] = out
+            trips += out.get("round_trips", 0)
+        pending = []
+
+    sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run_chunk(chunk: list[tuple]):
+        nonlocal trips
+        if len(chunk) > 1:
+            lead  = dict(chunk[0][1])
+            lines = []
+            async with sem:
+                try:
+                    batch = await _call_google_async(lead, _BATCH_SEP.join(text for text, _ in chunk))
+                    lines = batch.split(_BATCH_SEP)
+                except Exception as e:
+                    print(f"[!] Batch request error ({len(chunk)} segments): {e}")
+            trips += lead["round_trips"]
+            if len(lines) == len(chunk):
+                for (text, ctx), line in zip(chunk, lines):
+                    # One detected source for a whole multi-segment request would mislabel
+                    # mixed-language auto batches; _finish detects those per item instead
+                    ctx["round_trips"], ctx["provider_ms"] = lead["round_trips"], lead["provider_ms"]
+                    ctx["transport"] = lead.get("transport")
+                    out = _finish(text, line.strip() or None, "google", ctx, t0)
+                    out["batch_size"] = len(chunk)
+                    resolved[keys_by_ctx[id(ctx)]] = out
+                return
+        # A single item, or the provider mangled the segment boundaries
+        outs = await asyncio.gather(*(_limited(sem, _provider_translate_async(text, ctx, t0))
+                                      for text, ctx in chunk))
+        for (text, ctx), out in zip(chunk, outs):
+            resolved[keys_by_ctx[id(ctx)]] = out
+            trips += out["round_trips"]
+
+    await asyncio.gather(*(run_chunk(chunk) for chunk in _batch_chunks(pending)))
+
+    for key, idxs in slots.items():
+        for i in idxs:
+            out = resolved[key]
+            results[i] = out if items[i][0] == out["original"] else {**out, "original": items[i][0]}
+    return {"results": results, "unique": len(slots), "round_trips": trips}
+
+
+async def _limited(sem: asyncio.Semaphore, coro):
+    async with sem:
+        return await coro
+
+
+# ── One-to-many fan-out ───────────────────────────────────────────────────────
+def fanout_legs(text: str, src_lang: str = "english", targets: list[str] | None = None) -> dict:
+    """
+    Plan one utterance into many target languages.
+
+    Normalization, source detection and the phrase lookup run once, here;
+    returns {tgt_lang: coroutine} where each coroutine resolves to that
+    language's translate() result, so callers can run them concurrently and
+    stream each as it completes.  `targets` defaults to every
+    TARGET_LANGUAGES entry other than the source.
+    """
+    t0     = time.perf_counter()
+    shared = _analyze(text, src_lang)
+    if targets is None:
+        src     = _local_detect(text) if shared["src_lang"] == AUTO else shared["src_lang"]
+        targets = [t for t in TARGET_LANGUAGES if t != src]
+
+    async def leg(tgt: str) -> dict:
+        ctx, result = await _prepare_async(text, src_lang, tgt, t0, shared)
+        if result:
+            return result
+        if HTTPX_AVAILABLE:
+            return await _provider_translate_async(text, ctx, t0)
+        from workers import run_stage
+        return await run_stage("mt", _provider_translate, text, ctx, t0)
+
+    return {tgt.lower().strip(): leg(tgt) for tgt in dict.fromkeys(targets)}
 
-    return _make(text, translated, source, src_lang, tgt_lang, t0, detected_src)
 
 def _make(original, translated, source, src_lang, tgt_lang, t0, detected_src=None):
     source_map = {
         "google": 0.97,
         "google-wordwise": 0.85,
         "dictionary": 0.99,
+        "corpus": 0.95,
         "same-language": 1.0,
         "error": 0.0,
         "not-found": 0.0,
     }
-    conf = source_map.get(source, 0.5)
+    # Cached results keep the confidence of the provider that produced them
+    base   = source.removesuffix("-cached")
+    engine = ENGINES.get(base.removesuffix("-wordwise"))
+    conf   = source_map.get(base, engine.confidence if engine else 0.5)
 
     result = {
         "original": original,
         "translated": translated,
         "src_lang": src_lang,
         "tgt_lang": tgt_lang,
-        "model_used": "Google Translate (deep-translator)" if "google" in source else "phrase-dictionary",
+        "model_used": engine.label if engine else "phrase-dictionary",
         "source": source,
         "confidence": conf,
         "latency_ms": round((time.perf_counter() - t0) * 1000, 2),
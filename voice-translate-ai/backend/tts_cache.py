@@ -0,0 +1,309 @@
+"""
+=============================================================
+  TTS CACHE — Real-Time Voice Translator
+  Content-addressed store for synthesized speech:
+    1. in-process hot tier: the base64 text the API returns,
+       LRU by bytes
+    2. on-disk tier: raw audio files shared by every uvicorn
+       worker and surviving restarts, LRU by bytes
+=============================================================
+
+The key is sha256 over (text, language, engine, voice params), so a reply
+that has been spoken once in a voice — every PHRASE_TABLE entry, for a
+start — is never sent to gTTS again.  A hot-tier hit skips the network
+round-trip and the base64 encode; a disk hit skips the round-trip.
+
+Clips live at <dir>/<key[:2]>/<key>.mp3 (or .wav).  Writes go to a temp
+file in the same directory that is then os.replace()d into place, so a
+worker reading concurrently sees either no file or the whole clip.  A disk
+hit bumps the file's mtime, and so does a hot-tier hit at most once a
+minute, so clips served from memory do not look cold on disk; once the
+directory grows past
+TTS_CACHE_DISK_BYTES the least recently used files are deleted down to 90 %
+of the limit.
+
+Counters are kept per endpoint (synthesize(..., endpoint=…)): memory / disk
+hits, misses, hit ratio and the audio bytes served from the cache instead
+of synthesized.
+
+Settings (environment):
+  TTS_CACHE_DIR            disk tier directory   (default models/cache/tts,
+                           empty string disables the disk tier)
+  TTS_CACHE_MEMORY_BYTES   hot tier size         (default 64 MiB, 0 disables it)
+  TTS_CACHE_DISK_BYTES     disk tier size        (default 1 GiB)
+"""
+
+import os, sys, json, time, base64, hashlib, tempfile, threading
+from collections import OrderedDict, defaultdict
+
+DEFAULT_DIR = os.path.join(os.path.dirname(__file__), "..", "models", "cache", "tts")
+EXTENSIONS  = {".mp3": "audio/mpeg", ".wav": "audio/wav"}
+STALE_TMP_S = 3600               # leftover temp files from a crashed writer
+TOUCH_S     = 60                 # hot-tier hits refresh the disk file's mtime this often
+
+
+def cache_key(text: str, language: str, engine: str, params: dict | None = None) -> str:
+    """sha256 hex digest identifying one clip."""
+    blob = json.dumps([text, language, engine, params or {}], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, path: str | None = DEFAULT_DIR, memory_bytes: int = 64 << 20,
+                 disk_bytes: int = 1 << 30):
+        self.path         = path
+        self.memory_bytes = memory_bytes
+        self.disk_bytes   = disk_bytes
+        self._mem: OrderedDict[str, list] = OrderedDict()   # key → [b64, mime, audio bytes, last touch]
+        self._mem_size   = 0
+        self._disk_size  = None          # estimate, refreshed by every eviction scan
+        self._lock       = threading.Lock()
+        self._evicting   = threading.Lock()
+        self.counters    = {"writes": 0, "memory_evictions": 0, "disk_evictions": 0, "disk_errors": 0}
+        self.endpoints: dict[str, dict] = defaultdict(
+            lambda: {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bytes_saved": 0})
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key: str, ext: str) -> str:
+        return os.path.join(self.path, key[:2], key + ext)
+
+    def _ext(self, mime: str) -> str:
+        return next((e for e, m in EXTENSIONS.items() if m == mime), ".bin")
+
+    def _touch(self, key: str, mime: str):
+        try:
+            os.utime(self._file(key, self._ext(mime)))
+        except OSError:
+            pass                                           # evicted by another worker; rewritten on the next miss
+
+    # ── Public API ────────────────────────────────────────────────────────────
+    def get(self, key: str, endpoint: str = "default") -> dict | None:
+        """{audio_b64, mime_type, bytes, tier} or None; counted against `endpoint`."""
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                self._mem.move_to_end(key)
+                stats = self.endpoints[endpoint]
+                stats["memory_hits"] += 1
+                stats["bytes_saved"] += entry[2]
+                now   = time.time()
+                touch = self.path and now - entry[3] > TOUCH_S
+                if touch:
+                    entry[3] = now
+        if entry is not None:
+            if touch:
+                self._touch(key, entry[1])
+            return {"audio_b64": entry[0], "mime_type": entry[1], "bytes": entry[2], "tier": "memory"}
+
+        if self.path:
+            for ext, mime in EXTENSIONS.items():
+                fname = self._file(key, ext)
+                try:
+                    with open(fname, "rb") as f:
+                        audio = f.read()
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    print(f"[!] TTS cache read failed: {e}")
+                    self._count("disk_errors")
+                    break
+                try:
+                    os.utime(fname)                        # LRU order for eviction
+                except OSError:
+                    pass
+                audio_b64 = base64.b64encode(audio).decode("ascii")
+                self._remember(key, [audio_b64, mime, len(audio), time.time()])
+                with self._lock:
+                    stats = self.endpoints[endpoint]
+                    stats["disk_hits"]   += 1
+                    stats["bytes_saved"] += len(audio)
+                return {"audio_b64": audio_b64, "mime_type": mime, "bytes": len(audio), "tier": "disk"}
+
+        with self._lock:
+            self.endpoints[endpoint]["misses"] += 1
+        return None
+
+    def put(self, key: str, audio: bytes, mime: str = "audio/mpeg", audio_b64: str | None = None):
+        if audio_b64 is None:
+            audio_b64 = base64.b64encode(audio).decode("ascii")
+        self._remember(key, [audio_b64, mime, len(audio), time.time()])
+        self._count("writes")
+        if self.path:
+            self._write(key, audio, mime)
+
+    def _write(self, key: str, audio: bytes, mime: str):
+        fname = self._file(key, self._ext(mime))
+        tmp = None
+        try:
+            os.makedirs(os.path.dirname(fname), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(fname), prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, fname)                         # atomic: readers never see a partial clip
+        except OSError as e:
+            print(f"[!] TTS cache write failed: {e}")
+            self._count("disk_errors")
+            if tmp:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+            return
+        with self._lock:
+            if self._disk_size is not None:
+                self._disk_size += len(audio)
+            over = self._disk_size is None or self._disk_size > self.disk_bytes
+        if over:
+            self._evict()
+
+    def _remember(self, key: str, entry: list):
+        size = len(entry[0])
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_size -= len(old[0])
+            self._mem[key] = entry
+            self._mem_size += size
+            while self._mem_size > self.memory_bytes:
+                _, old = self._mem.popitem(last=False)
+                self._mem_size -= len(old[0])
+                self.counters["memory_evictions"] += 1
+
+    def _evict(self, limit: int | None = None):
+        """Scan the directory (other workers write to it too) and drop the LRU files."""
+        limit = self.disk_bytes if limit is None else limit
+        if not self._evicting.acquire(blocking=False):
+            return                                         # another thread is already at it
+        try:
+            files, total, now = [], 0, time.time()
+            for sub in os.scandir(self.path):
+                if not sub.is_dir():
+                    continue
+                for f in os.scandir(sub.path):
+                    try:
+                        st = f.stat()
+                    except FileNotFoundError:
+                        continue
+                    if f.name.startswith(".tmp-"):
+                        if now - st.st_mtime > STALE_TMP_S:
+                            self._unlink(f.path)
+                        continue
+                    files.append((st.st_mtime, st.st_size, f.path))
+                    total += st.st_size
+            if total > limit:
+                files.sort()
+                target = int(limit * 0.9)
+                for _, size, path in files:
+                    if total <= target:
+                        break
+                    if self._unlink(path):
+                        total -= size
+                        self._count("disk_evictions")
+            with self._lock:
+                self._disk_size = total
+        except OSError as e:
+            print(f"[!] TTS cache eviction failed: {e}")
+            self._count("disk_errors")
+        finally:
+            self._evicting.release()
+
+    @staticmethod
+    def _unlink(path: str) -> bool:
+        try:
+            os.unlink(path)
+            return True
+        except FileNotFoundError:                         # another worker got there first
+            return False
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self._mem_size = 0
+        if self.path:
+            self._evict(limit=0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+            c["memory_entries"] = len(self._mem)
+            c["memory_bytes"]   = self._mem_size
+            c["disk_bytes"]     = self._disk_size
+            endpoints = {name: dict(s) for name, s in self.endpoints.items()}
+        totals = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bytes_saved": 0}
+        for s in endpoints.values():
+            for k in totals:
+                totals[k] += s[k]
+        for s in list(endpoints.values()) + [totals]:
+            hits  = s["memory_hits"] + s["disk_hits"]
+            total = hits + s["misses"]
+            s["hit_ratio"] = round(hits / total, 4) if total else 0.0
+        c.update(totals)
+        c["endpoints"] = endpoints
+        return c
+
+
+# ── Shared instance used by text_to_speech.py ────────────────────────────────
+_cache: TTSCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> TTSCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSCache(
+                path         = os.environ.get("TTS_CACHE_DIR", DEFAULT_DIR) or None,
+                memory_bytes = int(os.environ.get("TTS_CACHE_MEMORY_BYTES", 64 << 20)),
+                disk_bytes   = int(os.environ.get("TTS_CACHE_DISK_BYTES", 1 << 30)),
+            )
+        return _cache
+
+
+def warm(languages: list[str] | None = None) -> dict:
+    """
+    Synthesize every PHRASE_TABLE reply (in `languages`, default all) into the
+    cache.  Only gTTS clips are cached: a reply that fell back to pyttsx3
+    (gTTS down or its breaker open) is counted as "uncached", not synthesized.
+    """
+    from translator import PHRASE_TABLE
+    from text_to_speech import synthesize
+    done = {"cached": 0, "synthesized": 0, "uncached": 0, "failed": 0}
+    for row in PHRASE_TABLE.values():
+        for lang, text in row.items():
+            if languages and lang not in languages:
+                continue
+            result = synthesize(text, lang, endpoint="warm")
+            if result.get("error"):
+                done["failed"] += 1
+            elif result.get("cache") != "miss":
+                done["cached"] += 1
+            elif result.get("engine") == "gTTS":
+                done["synthesized"] += 1
+            else:
+                done["uncached"] += 1
+    return done
+
+
+if __name__ == "__main__":
+    import argparse
+    sys.path.insert(0, os.path.dirname(__file__))
+    parser = argparse.ArgumentParser(description="TTS audio cache")
+    parser.add_argument("--warm",  action="store_true", help="synthesize every PHRASE_TABLE reply")
+    parser.add_argument("--languages", nargs="*", default=None)
+    parser.add_argument("--clear", action="store_true", help="empty the disk tier")
+    args = parser.parse_args()
+    if args.clear:
+        get_cache().clear()
+    if args.warm:
+        done = warm(args.languages)
+        print(json.dumps(done, indent=2))
+        if done["uncached"] or done["failed"]:
+            print(f"[!] {done['uncached'] + done['failed']} replies not cached — is gTTS reachable?")
+    print(json.dumps(get_cache().stats(), indent=2))
@@ -0,0 +1,199 @@
+"""
+=============================================================
+  VOICE ACTIVITY DETECTION — Real-Time Voice Translator
+  Cuts a continuous 16-bit PCM stream into utterances at
+  pauses, so /ws/audio can run STT → translate → TTS on each
+  utterance as soon as the speaker stops.
+=============================================================
+
+Every frame (VAD_FRAME_MS of audio) gets two features in one vectorized
+pass over the frames a push() completes:
+
+  energy   RMS of the int16 samples.  The threshold starts at
+           VAD_ENERGY_THRESHOLD (SpeechRecognition's energy_threshold of
+           300) and, like its dynamic_energy_threshold, rises to
+           VAD_DYNAMIC_RATIO × the running noise floor in noisy rooms.
+  ZCR      zero crossings per sample.  Voiced speech is well below
+           VAD_ZCR_MAX; broadband hiss sits near 0.5, so a frame above
+           the threshold only counts as speech if its ZCR is low — or its
+           energy is high enough (3×) to be a loud fricative.
+
+An utterance starts at the first speech frame (with VAD_PREROLL_S of audio
+before it) and closes after VAD_PAUSE_S of non-speech — the
+pause_threshold SpeechToText uses for microphone capture — keeping a short
+tail of the pause.  Utterances longer than VAD_MAX_SEGMENT_S are cut
+(phrase_time_limit); ones with less than VAD_MIN_SPEECH_S of speech are
+dropped as clicks.
+
+push() / flush() return events:
+  {"type": "start",   "start_s": …}
+  {"type": "segment", "pcm": bytes, "start_s": …, "end_s": …, "speech_s": …, "forced": bool}
+
+Settings (environment):
+  VAD_FRAME_MS           frame length                    (default 20)
+  VAD_ENERGY_THRESHOLD   minimum speech RMS (int16)      (default 300)
+  VAD_DYNAMIC_RATIO      threshold / noise floor         (default 1.5)
+  VAD_ZCR_MAX            max zero crossings per sample   (default 0.3)
+  VAD_PAUSE_S            silence that ends an utterance  (default 0.8)
+  VAD_PREROLL_S          audio kept before the onset     (default 0.2)
+  VAD_MIN_SPEECH_S       shorter utterances are dropped  (default 0.25)
+  VAD_MAX_SEGMENT_S      longest utterance               (default 15)
+"""
+
+import os, math
+from array import array
+from collections import deque
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+FRAME_MS         = float(os.environ.get("VAD_FRAME_MS", 20))
+ENERGY_THRESHOLD = float(os.environ.get("VAD_ENERGY_THRESHOLD", 300))
+DYNAMIC_RATIO    = float(os.environ.get("VAD_DYNAMIC_RATIO", 1.5))
+ZCR_MAX          = float(os.environ.get("VAD_ZCR_MAX", 0.3))
+PAUSE_S          = float(os.environ.get("VAD_PAUSE_S", 0.8))
+PREROLL_S        = float(os.environ.get("VAD_PREROLL_S", 0.2))
+MIN_SPEECH_S     = float(os.environ.get("VAD_MIN_SPEECH_S", 0.25))
+MAX_SEGMENT_S    = float(os.environ.get("VAD_MAX_SEGMENT_S", 15))
+
+LOUD_RATIO = 3.0      # energy × threshold that counts as speech whatever the ZCR
+NOISE_EMA  = 0.05     # noise-floor smoothing per non-speech frame
+TAIL_S     = 0.2      # pause kept at the end of an utterance
+
+
+def frame_features(pcm: bytes, frame_len: int) -> tuple[list[float], list[float]]:
+    """(rms, zcr) per complete frame of little-endian int16 `pcm`."""
+    n = len(pcm) // (2 * frame_len)
+    if not n:
+        return [], []
+    if NUMPY_AVAILABLE:
+        x    = np.frombuffer(pcm, dtype="<i2", count=n * frame_len).reshape(n, frame_len).astype(np.float32)
+        rms  = np.sqrt(np.einsum("ij,ij->i", x, x) / frame_len)
+        sign = np.signbit(x)
+        zcr  = np.count_nonzero(sign[:, 1:] != sign[:, :-1], axis=1) / (frame_len - 1)
+        return rms.tolist(), zcr.tolist()
+    samples = array("h", pcm[:n * 2 * frame_len])
+    rms, zcr = [], []
+    for i in range(n):
+        f = samples[i * frame_len:(i + 1) * frame_len]
+        rms.append(math.sqrt(sum(s * s for s in f) / frame_len))
+        zcr.append(sum((a < 0) != (b < 0) for a, b in zip(f, f[1:])) / (frame_len - 1))
+    return rms, zcr
+
+
+class VoiceActivityDetector:
+    """Streaming utterance segmenter for one audio stream (not thread-safe)."""
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: float = FRAME_MS,
+                 pause_s: float = PAUSE_S, energy_threshold: float = ENERGY_THRESHOLD):
+        self.sample_rate      = sample_rate
+        self.frame_len        = max(2, int(sample_rate * frame_ms / 1000))
+        self.frame_bytes      = 2 * self.frame_len
+        self.frame_s          = self.frame_len / sample_rate
+        self.energy_threshold = energy_threshold
+        self.pause_frames     = max(1, round(pause_s / self.frame_s))
+        self.tail_frames      = min(self.pause_frames, round(TAIL_S / self.frame_s))
+        self.min_speech       = max(1, round(MIN_SPEECH_S / self.frame_s))
+        self.max_frames       = max(1, round(MAX_SEGMENT_S / self.frame_s))
+        self.noise_rms        = 0.0
+        self._pending         = bytearray()          # bytes short of a full frame
+        self._preroll         = deque(maxlen=max(0, round(PREROLL_S / self.frame_s)))
+        self._segment: bytearray | None = None
+        self._seg_start       = 0                    # frame index
+        self._speech          = 0                    # speech frames in the segment
+        self._silence         = 0                    # trailing non-speech frames
+        self.frames           = 0
+        self.counters         = {"speech_frames": 0, "segments": 0, "dropped": 0, "forced": 0}
+
+    @property
+    def threshold(self) -> float:
+        return max(self.energy_threshold, self.noise_rms * DYNAMIC_RATIO)
+
+    def is_speech(self, rms: float, zcr: float) -> bool:
+        thr = self.threshold
+        return rms >= thr and (zcr <= ZCR_MAX or rms >= thr * LOUD_RATIO)
+
+    # ── Streaming ─────────────────────────────────────────────────────────────
+    def push(self, pcm: bytes) -> list[dict]:
+        self._pending += pcm
+        usable = len(self._pending) - len(self._pending) % self.frame_bytes
+        if not usable:
+            return []
+        chunk = bytes(self._pending[:usable])
+        del self._pending[:usable]
+        rms, zcr = frame_features(chunk, self.frame_len)
+        events = []
+        for i, (r, z) in enumerate(zip(rms, zcr)):
+            frame = chunk[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            self._frame(frame, self.is_speech(r, z), r, events)
+        return events
+
+    def flush(self) -> list[dict]:
+        """End of stream: close the open utterance (a partial last frame is dropped)."""
+        self._pending.clear()
+        events = []
+        if self._segment is not None:
+            self._close(events, forced=False)
+        return events
+
+    def _frame(self, frame: bytes, speech: bool, rms: float, events: list):
+        idx = self.frames
+        self.frames += 1
+        if speech:
+            self.counters["speech_frames"] += 1
+        elif self._segment is None:
+            self.noise_rms = rms if not self.noise_rms else self.noise_rms + NOISE_EMA * (rms - self.noise_rms)
+
+        if self._segment is None:
+            if not speech:
+                self._preroll.append(frame)
+                return
+            self._segment   = bytearray(b"".join(self._preroll))
+            self._seg_start = idx - len(self._preroll)
+            self._speech    = self._silence = 0
+            self._preroll.clear()
+            events.append({"type": "start", "start_s": round(self._seg_start * self.frame_s, 3)})
+
+        self._segment += frame
+        if speech:
+            self._speech += 1
+            self._silence = 0
+        else:
+            self._silence += 1
+        if self._silence >= self.pause_frames:
+            self._close(events, forced=False)
+        elif len(self._segment) >= self.max_frames * self.frame_bytes:
+            self._close(events, forced=True)
+
+    def _close(self, events: list, forced: bool):
+        seg, self._segment = self._segment, None
+        extra = max(0, self._silence - self.tail_frames)
+        if extra:
+            del seg[len(seg) - extra * self.frame_bytes:]
+        if self._speech < self.min_speech:
+            self.counters["dropped"] += 1
+            return
+        self.counters["segments"] += 1
+        self.counters["forced"]   += forced
+        start = self._seg_start * self.frame_s
+        events.append({
+            "type":     "segment",
+            "pcm":      bytes(seg),
+            "start_s":  round(start, 3),
+            "end_s":    round(start + len(seg) / self.frame_bytes * self.frame_s, 3),
+            "speech_s": round(self._speech * self.frame_s, 3),
+            "forced":   forced,
+        })
+
+    def stats(self) -> dict:
+        return {
+            "frames":      self.frames,
+            "seconds":     round(self.frames * self.frame_s, 3),
+            "noise_rms":   round(self.noise_rms, 1),
+            "threshold":   round(self.threshold, 1),
+            "in_speech":   self._segment is not None,
+            **self.counters,
+        }
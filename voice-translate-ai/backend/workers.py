@@ -0,0 +1,145 @@
+"""
+=============================================================
+  WORKER POOLS — Real-Time Voice Translator
+  Bounded thread pools for the blocking pipeline stages
+  (STT → MT → TTS) so async handlers never stall the loop
+=============================================================
+
+Every stage gets its own pool so a burst of slow gTTS calls cannot
+starve speech recognition or translation.  Pool sizes come from the
+environment:
+
+  STT_WORKERS  (default 4)
+  MT_WORKERS   (default 16)
+  TTS_WORKERS  (default 8)
+"""
+
+import os, time, asyncio, threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_SIZES = {
+    "stt": int(os.environ.get("STT_WORKERS", 4)),
+    "mt":  int(os.environ.get("MT_WORKERS", 16)),
+    "tts": int(os.environ.get("TTS_WORKERS", 8)),
+}
+
+
+class StagePool:
+    """
+    ThreadPoolExecutor wrapper that tracks queue depth and wait time.
+
+    queued    — jobs submitted but not yet picked up by a worker
+    running   — jobs currently executing
+    wait_ms   — time between submit and start (avg / max)
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name        = name
+        self.max_workers = max(1, max_workers)
+        self._executor   = ThreadPoolExecutor(max_workers=self.max_workers,
+                                              thread_name_prefix=f"{name}-worker")
+        self._lock       = threading.Lock()
+        self.queued      = 0
+        self.running     = 0
+        self.completed   = 0
+        self.failed      = 0
+        self._wait_total = 0.0
+        self._wait_max   = 0.0
+        self._run_total  = 0.0
+
+    def submit(self, fn, *args, **kwargs):
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+
+        def job():
+            started = time.perf_counter()
+            wait    = started - submitted
+            with self._lock:
+                self.queued      -= 1
+                self.running     += 1
+                self._wait_total += wait
+                self._wait_max    = max(self._wait_max, wait)
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.running    -= 1
+                    self._run_total += time.perf_counter() - started
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        return self._executor.submit(job)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run `fn` on this pool and await its result from the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self.completed + self.failed
+            return {
+                "workers":     self.max_workers,
+                "queued":      self.queued,
+                "running":     self.running,
+                "completed":   self.completed,
+                "failed":      self.failed,
+                "avg_wait_ms": round(self._wait_total / done * 1000, 2) if done else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+                "avg_run_ms":  round(self._run_total / done * 1000, 2) if done else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+# ── Module-level pools (one per pipeline stage) ──────────────────────────────
+_pools: dict[str, StagePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(stage: str) -> StagePool:
+    with _pools_lock:
+        pool = _pools.get(stage)
+        if pool is None:
+            if stage not in DEFAULT_SIZES:
+                raise ValueError(f"Unknown pipeline stage '{stage}'")
+            pool = _pools[stage] = StagePool(stage, DEFAULT_SIZES[stage])
+        return pool
+
+
+def configure(**sizes: int):
+    """Resize stage pools, e.g. configure(mt=32, tts=4).  Existing pools are replaced."""
+    with _pools_lock:
+        for stage, size in sizes.items():
+            if stage not in DEFAULT_SIZES:
+                raise ValueError(f"Unknown pipeline stage '{stage}'")
+            DEFAULT_SIZES[stage] = size
+            old = _pools.pop(stage, None)
+            if old:
+                old.shutdown(wait=False)
+
+
+async def run_stage(stage: str, fn, *args, **kwargs):
+    """Dispatch a blocking call to the pool for `stage` ('stt', 'mt' or 'tts')."""
+    return await get_pool(stage).run(fn, *args, **kwargs)
+
+
+def pool_stats() -> dict:
+    with _pools_lock:
+        pools = dict(_pools)
+    return {stage: (pools[stage].stats() if stage in pools else {"workers": size, "queued": 0, "running": 0})
+            for stage, size in DEFAULT_SIZES.items()}
+
+
+def shutdown_pools(wait: bool = True):
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)